@@ -5,8 +5,10 @@ from typing import Optional, Dict, Any
 from dataclasses import dataclass
 from contextlib import asynccontextmanager
 
+from psycopg import AsyncConnection
 from psycopg_pool import AsyncConnectionPool
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.pool import NullPool
 from sqlmodel import SQLModel # noqa
 
 logger = logging.getLogger(__name__)
@@ -44,6 +46,33 @@ class PostgresPoolConf:
     """PostgreSQL connection pool configuration"""
     min_size: int = 1
     max_size: int = 10
+    # Seconds to wait for a free connection (raw or for a session) before failing
+    timeout: float = 30.0
+
+
+class PooledConnection(AsyncConnection):
+    """
+    Connection of the shared pool. When lent to the SQLAlchemy engine,
+    close() hands it back to the pool instead of closing it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lender: Optional[AsyncConnectionPool] = None
+        self._notice_callbacks = set()
+
+    def add_notice_handler(self, callback) -> None:
+        # SQLAlchemy registers its handler on every checkout; the connection outlives them
+        if callback not in self._notice_callbacks:
+            self._notice_callbacks.add(callback)
+            super().add_notice_handler(callback)
+
+    async def close(self) -> None:
+        lender, self._lender = self._lender, None
+        if lender is not None:
+            await lender.putconn(self)
+        else:
+            await super().close()
 
 
 class PostgresClient:
@@ -51,7 +80,9 @@ class PostgresClient:
     Lightweight PostgreSQL client for connection management.
 
     Handles connection pooling, retries, and provides the SQLAlchemy engine
-    for SQLModel operations.
+    for SQLModel operations. The engine keeps no pool of its own: sessions
+    borrow connections from the same psycopg pool as raw queries, so
+    `PostgresPoolConf.max_size` bounds the process's connections.
 
     Automatically initialized when added via the add-postgres-client tool.
     """
@@ -73,8 +104,12 @@ class PostgresClient:
         if not self._config:
             raise ValueError("PostgresConf required")
 
-        # Create SQLAlchemy engine for SQLModel
-        self._engine = create_async_engine(self._config.get_sqlalchemy_url())
+        # Create SQLAlchemy engine for SQLModel, drawing connections from the pool
+        self._engine = create_async_engine(
+            self._config.get_sqlalchemy_url(),
+            async_creator=self._lend_connection,
+            poolclass=NullPool,
+        )
 
         self._initialized = True
         logger.info("PostgreSQL client initialized")
@@ -119,15 +154,24 @@ class PostgresClient:
 
                 await asyncio.sleep(1)  # Wait 1 second before retry
 
+    async def _lend_connection(self) -> PooledConnection:
+        """Borrow a pool connection for the engine (returned when SQLAlchemy closes it)"""
+        await asyncio.wait_for(self._ensure_connected(), timeout=self._pool_config.timeout)
+        pool = self._pool
+        conn = await pool.getconn()
+        conn._lender = pool
+        return conn
+
     async def _create_pool(self) -> AsyncConnectionPool:
         """Create and return a new connection pool"""
         pool = AsyncConnectionPool(
             conninfo=self._config.get_connection_string(),
             min_size=self._pool_config.min_size,
             max_size=self._pool_config.max_size,
-            timeout=30.0,
+            timeout=self._pool_config.timeout,
             max_lifetime=3600.0,
             max_idle=600.0,
+            connection_class=PooledConnection,
             open=False,  # Don't open in constructor to avoid deprecation warning
         )
         await pool.open()  # Open explicitly
@@ -216,6 +260,9 @@ class PostgresClient:
                 pass
             self._connection_task = None
 
+        if self._engine:
+            await self._engine.dispose()
+
         if self._pool:
             await self._pool.close()
             self._pool = None
@@ -256,6 +303,7 @@ class PostgresClient:
     async def get_session(self):
         """
         Get an AsyncSession for SQLModel operations with automatic transaction management.
+        Its connection comes from the shared pool and goes back when the session ends.
         
         Usage:
             async with client.get_session() as session:
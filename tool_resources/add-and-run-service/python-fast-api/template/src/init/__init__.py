@@ -1,13 +1,65 @@
 """Centralized initialization and deinitialization for the API."""
 
+import asyncio
+
 from fastapi import FastAPI
 
+from utils import log
+
+logger = log.get_logger(__name__)
+
+# Startup work left running in the background, cancelled on shutdown
+_background_tasks: list[asyncio.Task] = []
+
 
 async def init(app: FastAPI) -> None:
     """Initialize all components during app startup."""
-    pass
+    _init_couchbase(app)
 
 
 async def deinit(app: FastAPI) -> None:
     """Deinitialize all components during app shutdown."""
-    pass
+    for task in _background_tasks:
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    _background_tasks.clear()
+
+
+def _init_couchbase(app: FastAPI) -> None:
+    """
+    Expose the Couchbase clients on app.state (for routes and /health) and
+    connect in the background, so startup does not wait for the cluster and
+    requests do not pay the connection cost. Skipped if the client is not installed.
+    """
+    try:
+        from clients.couchbase import get_client, registered_models
+    except ImportError:
+        return
+    # Models register themselves when their module is imported, which the routes have done by now
+    names = list(dict.fromkeys(["couchbase-server", *(model._service_instance for model in registered_models())]))
+    clients = {}
+    for name in names:
+        try:
+            clients[name] = get_client(name)
+        except KeyError as e:
+            logger.warning(f"Couchbase client '{name}' is not configured (missing {e})")
+            continue
+        attr = "couchbase_client" if name == "couchbase-server" else f"{name.replace('-', '_')}_client"
+        setattr(app.state, attr, clients[name])
+    if clients:
+        _background_tasks.append(asyncio.create_task(_warm_up_couchbase(list(clients.values()))))
+
+
+async def _warm_up_couchbase(clients: list) -> None:
+    """Connect every client, then provision the models' collections and indexes."""
+    from clients.couchbase import aprovision
+
+    # Routes use the asyncio API: opening the blocking cluster too would double the connections
+    await asyncio.gather(*(client.warm_up(sync=False) for client in clients))
+    report = await aprovision()
+    logger.info(report.summary())
+    for keyspace, names in report.indexes.items():
+        if names:
+            logger.info(f"Building indexes on {keyspace}: {', '.join(names)}")
+    for target, error in report.errors.items():
+        logger.warning(f"Could not provision Couchbase {target}: {error}")
@@ -2,7 +2,8 @@ import sys
 import time
 from typing import Any, Optional
 
-from fastapi import APIRouter, Query, Request
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
 
 import conf
 from utils import log
@@ -78,7 +79,34 @@ async def health_check(
                 "log_level": conf.get_log_level(),
                 "http_autoreload": conf.env.parse(conf.HTTP_AUTORELOAD),
             },
+            "clients": {
+                name: client.dev_info() for name, client in clients.items() if hasattr(client, "dev_info")
+            },
         }
 
     health_status["response_time_ms"] = round((time.time() - start_time) * 1000, 2)
     return health_status
+
+
+@health_router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Client operation metrics in the Prometheus text format."""
+    sections = []
+    try:
+        from clients.couchbase import get_metrics
+        sections.append(get_metrics().prometheus())
+    except ImportError:
+        pass
+    return "".join(sections)
+
+
+@health_router.get("/debug/slow-queries")
+async def slow_queries(request: Request):
+    """Recent slow query analyses (plan, phase timings, index advice) by client. Dev only."""
+    if not conf.get_http_expose_errors():
+        raise HTTPException(status_code=404, detail="Not Found")
+    return {
+        name: client.slow_queries()
+        for name, client in _discover_clients(request.app).items()
+        if hasattr(client, "slow_queries")
+    }
@@ -109,3 +109,72 @@ def get_couchbase_client(request: Request):
 
 # Type alias for dependency injection
 CouchbaseDB = Annotated['CouchbaseClient', Depends(get_couchbase_client)]
+
+
+async def get_couchbase_loader() -> AsyncGenerator['DocumentLoader', None]:
+    """
+    FastAPI dependency that provides a request-scoped batching loader.
+    Model lookups made concurrently are fetched in one multi-get, and each id
+    is fetched at most once per request.
+
+    Usage in routes:
+        from routes.utils import CouchbaseLoader
+
+        @router.get("/posts/{id}")
+        async def get_post(id: str, loader: CouchbaseLoader):
+            post = await loader.load(Post, id)
+            authors = await loader.load_many(User, post.data.author_ids)
+    """
+    try:
+        from clients.couchbase import DocumentLoader
+    except ImportError:
+        raise HTTPException(status_code=503, detail="Couchbase client is not configured. Run add-couchbase-client to set up Couchbase")
+
+    loader = DocumentLoader()
+    try:
+        yield loader
+    finally:
+        loader.clear()
+
+
+CouchbaseLoader = Annotated['DocumentLoader', Depends(get_couchbase_loader)]
+
+
+async def get_couchbase_session() -> AsyncGenerator['UnitOfWork', None]:
+    """
+    FastAPI dependency that provides a unit of work for Couchbase models.
+    Writes collected during the request are flushed together, concurrently,
+    when the handler returns (discarded if it raises).
+
+    Usage in routes:
+        from routes.utils import CouchbaseSession
+
+        @router.post("/orders")
+        async def create_order(order: Order, session: CouchbaseSession):
+            session.add(OrderEntity(id=str(uuid.uuid4()), data=order))
+            session.mark_dirty(customer)
+
+    Use `CouchbaseTransaction` instead to apply the writes all-or-nothing.
+    """
+    try:
+        from clients.couchbase import unit_of_work
+    except ImportError:
+        raise HTTPException(status_code=503, detail="Couchbase client is not configured. Run add-couchbase-client to set up Couchbase")
+
+    async with unit_of_work() as session:
+        yield session
+
+
+async def get_couchbase_transaction() -> AsyncGenerator['UnitOfWork', None]:
+    """Like `get_couchbase_session`, but the writes are flushed in one Couchbase transaction."""
+    try:
+        from clients.couchbase import unit_of_work
+    except ImportError:
+        raise HTTPException(status_code=503, detail="Couchbase client is not configured. Run add-couchbase-client to set up Couchbase")
+
+    async with unit_of_work(transactional=True) as session:
+        yield session
+
+
+CouchbaseSession = Annotated['UnitOfWork', Depends(get_couchbase_session)]
+CouchbaseTransaction = Annotated['UnitOfWork', Depends(get_couchbase_transaction)]
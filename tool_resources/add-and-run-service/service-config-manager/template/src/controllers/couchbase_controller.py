@@ -3,7 +3,7 @@ import time
 import urllib.request
 import urllib.error
 import urllib.parse
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 from pathlib import Path
 from couchbase.auth import PasswordAuthenticator
 from couchbase.cluster import Cluster
@@ -17,11 +17,19 @@ from couchbase.exceptions import (
     BucketNotFoundException,
     BucketDoesNotExistException,
     ScopeNotFoundException,
-    CollectionNotFoundException
+    CollectionNotFoundException,
+    SearchIndexNotFoundException
 )
 from couchbase.diagnostics import ServiceType
 from couchbase.management.buckets import CreateBucketSettings, BucketType
 from couchbase.management.collections import CollectionSpec
+from couchbase.management.search import SearchIndex
+from couchbase.management.analytics import (
+    CouchbaseAnalyticsEncryptionSettings,
+    CouchbaseRemoteAnalyticsLink,
+    AnalyticsEncryptionLevel,
+    S3ExternalAnalyticsLink
+)
 from datetime import timedelta
 from config import Config
 from utils.logger import get_logger
@@ -110,16 +118,20 @@ class CouchbaseController:
             self.logger.debug(f"❌ Connection test failed: {e}")
             return False
 
-    def _get_cluster_init_params(self) -> Dict[str, Any]:
+    def _get_cluster_init_params(self, couchbase_config: Dict[str, Any] = None) -> Dict[str, Any]:
         """Get parameters for cluster initialization."""
         protocol = "https" if self.tls else "http"
         port = "18091" if self.tls else "8091"
-        return {
+        services = 'kv,n1ql,index,fts,eventing'
+        analytics = (couchbase_config or {}).get('analytics', {})
+        if analytics.get('enabled'):
+            services += ',cbas'
+        params = {
             'url': f"{protocol}://{self.host}:{port}/clusterInit",
             'data': {
                 'username': self.username,
                 'password': self.password,
-                'services': 'kv,n1ql,index,fts,eventing',
+                'services': services,
                 'hostname': '127.0.0.1',
                 'memoryQuota': '256',
                 'sendStats': 'false',
@@ -129,8 +141,11 @@ class CouchbaseController:
                 'port': 'SAME'
             }
         }
+        if analytics.get('enabled') and analytics.get('memory_quota_mb'):
+            params['data']['cbasMemoryQuota'] = str(analytics['memory_quota_mb'])
+        return params
 
-    def ensure_initialized(self) -> None:
+    def ensure_initialized(self, couchbase_config: Dict[str, Any] = None) -> None:
         """Ensure the Couchbase cluster is initialized."""
         import base64
         self.logger.info("🔄 Ensuring Couchbase cluster is initialized...")
@@ -154,7 +169,7 @@ class CouchbaseController:
         except Exception:
             pass  # Try initialization
 
-        params = self._get_cluster_init_params()
+        params = self._get_cluster_init_params(couchbase_config)
         encoded_data = urllib.parse.urlencode(params['data']).encode()
         request = urllib.request.Request(
             params['url'],
@@ -481,6 +496,132 @@ class CouchbaseController:
 
         return self._merge_settings(global_defaults, item_defaults, env_settings)
 
+    def _get_search_index_settings(self, index_config: Dict[str, Any], environment: str) -> Dict[str, Any]:
+        """Get merged settings for a search index (env_settings override the index's own keys)."""
+        item_defaults = {key: value for key, value in index_config.items() if key != 'env_settings'}
+        env_settings = index_config.get('env_settings', {}).get(environment, {})
+
+        return self._merge_settings({}, item_defaults, env_settings)
+
+    def _search_field_mapping(self, field_path: str, field_config: Any) -> Dict[str, Any]:
+        """Mapping for one field; dotted paths become nested child mappings."""
+        if isinstance(field_config, str):
+            field_config = {'type': field_config}
+        parts = field_path.split('.')
+        field = {
+            'name': parts[-1],
+            'type': field_config.get('type', 'text'),
+            'index': True,
+            'store': field_config.get('store', False),
+            'include_in_all': field_config.get('include_in_all', True),
+            'docvalues': field_config.get('docvalues', True)
+        }
+        if field_config.get('analyzer'):
+            field['analyzer'] = field_config['analyzer']
+        mapping = {parts[-1]: {'enabled': True, 'dynamic': False, 'fields': [field]}}
+        for part in reversed(parts[:-1]):
+            mapping = {part: {'enabled': True, 'dynamic': False, 'properties': mapping}}
+        return mapping
+
+    def _merge_mapping_properties(self, properties: Dict[str, Any], field_mapping: Dict[str, Any]) -> None:
+        """Merge a field mapping into a type's properties, combining shared parent objects."""
+        for name, mapping in field_mapping.items():
+            existing = properties.get(name)
+            if existing is None:
+                properties[name] = mapping
+                continue
+            if mapping.get('fields'):
+                existing.setdefault('fields', []).extend(mapping['fields'])
+            if mapping.get('properties'):
+                self._merge_mapping_properties(existing.setdefault('properties', {}), mapping['properties'])
+
+    def _search_index_params(self, scope_name: str, settings: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Build the search index params and plan params from a couchbase.yaml definition."""
+        plan_params = {
+            'indexPartitions': settings.get('partitions', 1),
+            'numReplicas': settings.get('replicas', 0)
+        }
+        # A full index definition (e.g. exported from the UI) is used as given
+        if 'params' in settings:
+            return settings['params'], plan_params
+
+        types = {}
+        for collection_name, mapping_config in settings.get('mappings', {}).items():
+            mapping_config = mapping_config or {}
+            type_mapping = {
+                'enabled': True,
+                'dynamic': mapping_config.get('dynamic', not mapping_config.get('fields')),
+                'properties': {}
+            }
+            if mapping_config.get('analyzer'):
+                type_mapping['default_analyzer'] = mapping_config['analyzer']
+            for field_path, field_config in (mapping_config.get('fields') or {}).items():
+                self._merge_mapping_properties(type_mapping['properties'], self._search_field_mapping(field_path, field_config))
+            types[f"{scope_name}.{collection_name}"] = type_mapping
+
+        analysis = dict(settings.get('analysis', {}))
+        if settings.get('analyzers'):
+            analysis['analyzers'] = {**analysis.get('analyzers', {}), **settings['analyzers']}
+
+        mapping = {
+            'default_analyzer': settings.get('default_analyzer', 'standard'),
+            'default_mapping': {'enabled': False, 'dynamic': True},
+            'types': types
+        }
+        if analysis:
+            mapping['analysis'] = analysis
+
+        params = {
+            'doc_config': {'mode': 'scope.collection.type_field', 'type_field': 'type'},
+            'mapping': mapping,
+            'store': {'indexType': 'scorch'}
+        }
+        return params, plan_params
+
+    def _contains(self, actual: Any, expected: Any) -> bool:
+        """Whether `actual` has every value of `expected` (the server adds defaults to stored definitions)."""
+        if isinstance(expected, dict):
+            return isinstance(actual, dict) and all(
+                key in actual and self._contains(actual[key], value) for key, value in expected.items()
+            )
+        if isinstance(expected, list):
+            return (isinstance(actual, list) and len(actual) == len(expected)
+                    and all(self._contains(a, e) for a, e in zip(actual, expected)))
+        return actual == expected
+
+    def _connect_search(self) -> Cluster:
+        """Connect once the Search service is ready, for ensuring search indexes."""
+        cluster = self.connect_with_retry()
+        cluster.wait_until_ready(timedelta(seconds=300), WaitUntilReadyOptions(service_types=[ServiceType.Search]))
+        return cluster
+
+    def ensure_search_index(self, cluster: Cluster, bucket_name: str, scope_name: str, index_name: str, settings: Dict[str, Any]) -> None:
+        """Ensure a scope-level search index exists with the definition from couchbase.yaml."""
+        index_manager = cluster.bucket(bucket_name).scope(scope_name).search_indexes()
+        params, plan_params = self._search_index_params(scope_name, settings)
+
+        try:
+            existing = index_manager.get_index(index_name)
+        except SearchIndexNotFoundException:
+            existing = None
+
+        if existing is not None and self._contains(existing.params, params) and self._contains(existing.plan_params, plan_params):
+            self.logger.info(f"✅ Search index '{index_name}' is up to date")
+            return
+
+        # Updating an index requires its current uuid
+        index = SearchIndex(
+            name=index_name,
+            source_name=bucket_name,
+            params=params,
+            plan_params=plan_params,
+            uuid=existing.uuid if existing is not None else None
+        )
+        action = "Updating" if existing is not None else "Creating"
+        self.logger.info(f"🔄 {action} search index '{index_name}'...")
+        index_manager.upsert_index(index)
+        self.logger.info(f"✅ Search index '{index_name}' {'updated' if existing is not None else 'created'} successfully")
+
     def run_ops(self) -> None:
         """Run all Couchbase operations for the configured environment."""
         self.logger.info("🔄 Processing Couchbase resources...")
@@ -501,16 +642,18 @@ class CouchbaseController:
             self.logger.debug(f"⏳ Connection test failed, retrying... (attempt {attempt + 1}/{max_connection_retries})")
             time.sleep(2)
 
+        # Load configuration (cluster initialization depends on the services it enables)
+        couchbase_config = self._load_couchbase_config()
+
         # Only initialize cluster if it's a server type (not client)
         if self.couchbase_type == 'server':
-            self.ensure_initialized()
+            self.ensure_initialized(couchbase_config)
 
         # Connect to cluster and verify it's ready
         cluster = self.connect_with_retry()
         self.logger.info("✅ Couchbase cluster is ready and initialized")
 
-        # Load configuration and ensure resources
-        couchbase_config = self._load_couchbase_config()
+        # Ensure resources
         if couchbase_config:
             self._ensure_resources(couchbase_config)
             self.logger.info("🎉 Couchbase resources processed successfully")
@@ -520,6 +663,8 @@ class CouchbaseController:
     def _ensure_resources(self, couchbase_config: Dict[str, Any]) -> None:
         """Ensure all Couchbase resources exist according to configuration."""
         buckets = couchbase_config.get('buckets', {})
+        # Connected on the first search index and shared by the rest
+        search_cluster = None
 
         for bucket_name, bucket_config in buckets.items():
             self.logger.info(f"🪣 Processing bucket: {bucket_name}")
@@ -550,4 +695,135 @@ class CouchbaseController:
                     time.sleep(0.5)
 
                     # Ensure collection exists
-                    self.ensure_collection(bucket_name, scope_name, collection_name, collection_settings)
\ No newline at end of file
+                    self.ensure_collection(bucket_name, scope_name, collection_name, collection_settings)
+
+                # Process full-text search indexes (after the collections they cover)
+                search_indexes = scope_config.get('search_indexes', {})
+                for index_name, index_config in search_indexes.items():
+                    self.logger.info(f"🔎 Processing search index: {index_name}")
+                    index_settings = self._get_search_index_settings(index_config or {}, self.environment)
+                    if search_cluster is None:
+                        search_cluster = self._connect_search()
+                    self.ensure_search_index(search_cluster, bucket_name, scope_name, index_name, index_settings)
+
+        analytics = couchbase_config.get('analytics', {})
+        if analytics.get('enabled'):
+            self.ensure_analytics(analytics)
+
+    def _cluster_services(self) -> set:
+        """Services running on the cluster's nodes (e.g. 'kv', 'n1ql', 'cbas')."""
+        import base64
+        import json
+        protocol = "https" if self.tls else "http"
+        port = "18091" if self.tls else "8091"
+        credentials = base64.b64encode(f'{self.username}:{self.password}'.encode()).decode('ascii')
+        request = urllib.request.Request(f"{protocol}://{self.host}:{port}/pools/default", method='GET')
+        request.add_header('Authorization', f'Basic {credentials}')
+        with urllib.request.urlopen(request, timeout=10) as response:
+            nodes = json.loads(response.read().decode()).get('nodes', [])
+        return {service for node in nodes for service in node.get('services', [])}
+
+    def _analytics_link(self, link_name: str, link_config: Dict[str, Any]):
+        """Build the SDK link object for a link declared under analytics.links."""
+        scope = link_config.get('scope', 'Default')
+        # Secrets are read from the environment variables named by the `*_env` keys
+        def value(key: str) -> str:
+            if f'{key}_env' in link_config:
+                return self._get_env_var(link_config[f'{key}_env'])
+            return link_config.get(key)
+
+        link_type = link_config.get('type', 'couchbase')
+        if link_type == 'couchbase':
+            encryption = CouchbaseAnalyticsEncryptionSettings(
+                AnalyticsEncryptionLevel(link_config.get('encryption', 'none'))
+            )
+            return CouchbaseRemoteAnalyticsLink(
+                scope, link_name, link_config['hostname'], encryption,
+                username=value('username'), password=value('password')
+            )
+        if link_type == 's3':
+            return S3ExternalAnalyticsLink(
+                scope, link_name, value('access_key_id'), link_config['region'],
+                secret_access_key=value('secret_access_key'),
+                service_endpoint=link_config.get('service_endpoint')
+            )
+        raise ValueError(f"Unsupported analytics link type '{link_type}' for link '{link_name}' (expected couchbase or s3)")
+
+    def _analytics_link_refs(self, analytics_config: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Quoted `scope`.`link` reference for every link a collection can ingest through,
+        by the name collections use for it. Only Local and declared couchbase links
+        qualify: S3 links feed external collections, which are not shadowed this way.
+        """
+        refs = {'Local': '`Default`.`Local`'}
+        for link_name, link_config in (analytics_config.get('links') or {}).items():
+            if (link_config or {}).get('type', 'couchbase') == 'couchbase':
+                refs[link_name] = f"`{(link_config or {}).get('scope', 'Default')}`.`{link_name}`"
+        for name, collection_config in (analytics_config.get('collections') or {}).items():
+            link_name = (collection_config or {}).get('link', 'Local')
+            if link_name not in refs:
+                raise ValueError(f"Analytics collection '{name}' uses link '{link_name}', which is neither Local "
+                                 f"nor a couchbase link declared under analytics.links")
+        return refs
+
+    def _analytics_collection_statements(self, name: str, collection_config: Dict[str, Any], link_ref: str) -> list:
+        """DDL creating an analytics scope and collection if they do not exist yet."""
+        def quote(path: str) -> str:
+            return '.'.join(f'`{part}`' for part in path.split('.'))
+
+        # By default the analytics collection has the name of the KV collection it shadows,
+        # which is the name the client's `${keyspace}` expands to in analytics queries
+        source = collection_config.get('source', name)
+        scope = name.rpartition('.')[0]
+        # The link is named with its scope: a collection in scope `main`.`_default` would
+        # otherwise resolve a bare `Local` inside that scope, not the Default scope's link
+        statement = f"CREATE ANALYTICS COLLECTION IF NOT EXISTS {quote(name)} ON {quote(source)} AT {link_ref}"
+        if collection_config.get('where'):
+            statement += f" WHERE {collection_config['where']}"
+        statements = [statement]
+        if scope:
+            statements.insert(0, f"CREATE ANALYTICS SCOPE {quote(scope)} IF NOT EXISTS")
+        return statements
+
+    def ensure_analytics(self, analytics_config: Dict[str, Any]) -> None:
+        """Ensure the analytics links and collections declared in couchbase.yaml exist and are ingesting."""
+        # Validate before touching the cluster
+        link_refs = self._analytics_link_refs(analytics_config)
+
+        if 'cbas' not in self._cluster_services():
+            self.logger.warning("⚠️ Analytics is enabled in couchbase.yaml but the cluster does not run the Analytics service")
+            self.logger.info(f"💡 Hint: services are chosen when the cluster is initialized; to recreate it, run: pt volume rm {self.service_name}-data")
+            return
+
+        cluster = self.connect_with_retry()
+        cluster.wait_until_ready(timedelta(seconds=300), WaitUntilReadyOptions(service_types=[ServiceType.Analytics]))
+        analytics_manager = cluster.analytics_indexes()
+
+        links = analytics_config.get('links', {})
+        if links:
+            existing_links = {(link.dataverse_name(), link.name()) for link in analytics_manager.get_links()}
+            for link_name, link_config in links.items():
+                link = self._analytics_link(link_name, link_config)
+                if (link.dataverse_name(), link.name()) in existing_links:
+                    self.logger.info(f"✅ Analytics link '{link_name}' already exists")
+                    continue
+                self.logger.info(f"🔄 Creating analytics link '{link_name}'...")
+                analytics_manager.create_link(link)
+                self.logger.info(f"✅ Analytics link '{link_name}' created successfully")
+
+        collections = analytics_config.get('collections', {})
+        used_links = set()
+        for name, collection_config in collections.items():
+            self.logger.info(f"📊 Processing analytics collection: {name}")
+            link_ref = link_refs[(collection_config or {}).get('link', 'Local')]
+            for statement in self._analytics_collection_statements(name, collection_config or {}, link_ref):
+                list(cluster.analytics_query(statement))
+            used_links.add(link_ref)
+
+        # Start ingestion through every link the collections use (no-op if already connected)
+        for link_ref in sorted(used_links):
+            try:
+                list(cluster.analytics_query(f"CONNECT LINK {link_ref}"))
+                self.logger.info(f"✅ Analytics link {link_ref} connected")
+            except Exception as e:
+                self.logger.warning(f"⚠️ Could not connect the analytics link {link_ref}: {e}")
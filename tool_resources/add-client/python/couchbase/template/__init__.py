@@ -5,7 +5,25 @@ from .couchbase import (
     register_client,
     Keyspace,
     BaseModelCouchbase,
+    GetManyResult,
+    HedgeStats,
+    BulkResult,
+    Page,
+    InvalidCursorError,
+    MultiOperationError,
+    Index,
+    provision_indexes,
+    aprovision_indexes,
+    ProvisioningReport,
+    registered_models,
+    provision,
+    aprovision,
 )
+from .cache import DocumentCache
+from .loader import DocumentLoader
+from .metrics import LatencyHistograms, MetricsSink, add_sink, get_metrics, remove_sink
+from .unit_of_work import UnitOfWork, unit_of_work
+from .transcoders import FastJsonSerializer, FastJsonTranscoder, MsgpackTranscoder, ZstdTranscoder
 
 __all__ = [
     "CouchbaseConf",
@@ -14,4 +32,30 @@ __all__ = [
     "register_client",
     "Keyspace",
     "BaseModelCouchbase",
+    "GetManyResult",
+    "HedgeStats",
+    "BulkResult",
+    "Page",
+    "InvalidCursorError",
+    "MultiOperationError",
+    "Index",
+    "provision_indexes",
+    "aprovision_indexes",
+    "ProvisioningReport",
+    "registered_models",
+    "provision",
+    "aprovision",
+    "DocumentCache",
+    "DocumentLoader",
+    "MetricsSink",
+    "LatencyHistograms",
+    "get_metrics",
+    "add_sink",
+    "remove_sink",
+    "UnitOfWork",
+    "unit_of_work",
+    "FastJsonSerializer",
+    "FastJsonTranscoder",
+    "MsgpackTranscoder",
+    "ZstdTranscoder",
 ]
@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class DocumentCache:
+    """
+    In-process LRU cache of Couchbase documents keyed by id.
+
+    Entries hold the raw document content and its CAS and expire after `ttl`
+    seconds. At most `max_size` entries are kept; the least recently used
+    entry is evicted first.
+
+    Set `cross_process=True` when other processes also write the collection:
+    the TTL is then capped at `cross_process_ttl` so their writes become
+    visible quickly, while same-process writes still invalidate immediately.
+
+    Reads that race with a write are handled with a read token: take one with
+    `begin_read()` before fetching from Couchbase and pass it to `put()`. If the
+    key was invalidated in the meantime, the (possibly stale) value is dropped.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0,
+                 cross_process: bool = False, cross_process_ttl: float = 1.0):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.max_size = max_size
+        self.ttl = min(ttl, cross_process_ttl) if cross_process else ttl
+        self._entries: OrderedDict[str, Tuple[dict, int, float]] = OrderedDict()
+        # Generation at which each key was last invalidated (bounded like the entries)
+        self._invalidated: OrderedDict[str, int] = OrderedDict()
+        # Reads that started before this generation are rejected: their tombstone may be gone
+        self._floor = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def begin_read(self) -> int:
+        """Returns a token to pass to `put()` for a value about to be fetched."""
+        with self._lock:
+            return self._generation
+
+    def get(self, key: str) -> Optional[Tuple[dict, int]]:
+        """Returns `(content, cas)` for a fresh entry, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            content, cas, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return content, cas
+
+    def put(self, key: str, content: dict, cas: int, token: Optional[int] = None) -> None:
+        """Store a document read from Couchbase, unless a newer write has been seen."""
+        with self._lock:
+            if token is not None and (token < self._floor or self._invalidated.get(key, -1) > token):
+                return
+            existing = self._entries.get(key)
+            if existing is not None and existing[1] > cas:
+                return
+            self._entries[key] = (content, cas, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, *keys: str) -> None:
+        """Drop entries for keys written or deleted by this process."""
+        if not keys:
+            return
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+                self._invalidated[key] = self._generation
+                self._invalidated.move_to_end(key)
+            self._invalidations += len(keys)
+            while len(self._invalidated) > self.max_size:
+                _, generation = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, generation)
+
+    def clear(self) -> None:
+        """Drop every entry (e.g. after a bulk change made outside this process)."""
+        with self._lock:
+            self._generation += 1
+            self._floor = self._generation
+            self._entries.clear()
+            self._invalidated.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters for tuning `max_size` and `ttl`."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+            }
@@ -1,79 +1,830 @@
+import asyncio
+import base64
+import gzip
+import json
+import logging
 import os
+import random
+import re
+import threading
+import time
 import uuid
+import weakref
+from collections import deque
 from datetime import timedelta
-from dataclasses import dataclass
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
 import couchbase.subdocument as SD
 from couchbase.auth import PasswordAuthenticator
 from couchbase.cluster import Cluster
-from couchbase.options import (ClusterOptions, ClusterTimeoutOptions, QueryOptions, MutateInOptions)
-from couchbase.exceptions import ScopeAlreadyExistsException, CollectionAlreadyExistsException, DocumentNotFoundException
-from couchbase.result import MutationResult
-from typing import Tuple, Optional, TypeVar, Generic, List, ClassVar
+from couchbase.durability import DurabilityLevel, ServerDurability
+from acouchbase.cluster import Cluster as AsyncCluster
+from couchbase.options import (AnalyticsOptions, ClusterOptions, ClusterTimeoutOptions, ClusterTracingOptions, Compression,
+                               QueryOptions, MutateInOptions, ScanOptions, SearchOptions)
+from couchbase.analytics import AnalyticsScanConsistency
+from couchbase.n1ql import QueryProfile
+from couchbase.search import DisjunctionQuery, MatchQuery, QueryStringQuery, SearchQuery, SearchScanConsistency
+from couchbase.kv_range_scan import PrefixScan, RangeScan, SamplingScan, ScanTerm
+from couchbase.exceptions import (
+    AmbiguousTimeoutException,
+    CollectionAlreadyExistsException,
+    CouchbaseException,
+    DocumentNotFoundException,
+    DocumentUnretrievableException,
+    ScopeAlreadyExistsException,
+    TimeoutException,
+    UnAmbiguousTimeoutException,
+)
+from couchbase.result import GetResult, MutationResult
+from couchbase.transcoder import Transcoder
+from typing import Any, AsyncIterator, Dict, Iterator, Tuple, Optional, TypeVar, Generic, List, ClassVar, Union
 from pydantic import BaseModel, Field
 
+from . import metrics
+from .cache import DocumentCache
+
+
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class CouchbaseConf:
-    """Couchbase connection configuration"""
+    """
+    Couchbase connection configuration.
+
+    The optional fields tune the SDK; left as None they keep its defaults.
+    Durations are in seconds. Operations slower than `slow_operation_threshold`
+    are logged (see metrics.py), and it is the default for the SDK's tracing
+    thresholds, whose reports then go to the `<module>.sdk` logger.
+    Queries slower than `slow_query_threshold` are analyzed (see
+    `CouchbaseClient.slow_queries`); a `query_profile_sample_rate` share of
+    all queries also runs with `profile=timings` to record phase timings. `compression` is one of "on", "off",
+    "inflate_only", "deflate_only" or "force". `get_client` reads each one
+    from `<PREFIX>_<FIELD>` (e.g. COUCHBASE_SERVER_KV_TIMEOUT=1.5).
+    """
     host: str
     username: str
     password: str
     bucket: str
     protocol: str
+    kv_timeout: Optional[float] = None
+    kv_durable_timeout: Optional[float] = None
+    query_timeout: Optional[float] = None
+    analytics_timeout: Optional[float] = None
+    search_timeout: Optional[float] = None
+    connect_timeout: Optional[float] = None
+    max_http_connections: Optional[int] = None
+    compression: Optional[str] = None
+    compression_min_size: Optional[int] = None
+    compression_min_ratio: Optional[float] = None
+    config_poll_interval: Optional[float] = None
+    tracing_threshold_kv: Optional[float] = None
+    tracing_threshold_query: Optional[float] = None
+    slow_operation_threshold: Optional[float] = None
+    slow_query_threshold: Optional[float] = None
+    query_profile_sample_rate: Optional[float] = None
+
+    def __post_init__(self):
+        for name, value in self.tuning().items():
+            if name == "compression":
+                if value not in _COMPRESSION_MODES:
+                    raise ValueError(f"compression must be one of {', '.join(_COMPRESSION_MODES)}, got {value!r}")
+            elif name in ("compression_min_ratio", "query_profile_sample_rate"):
+                if not 0 < value <= 1:
+                    raise ValueError(f"{name} must be in (0, 1], got {value}")
+            elif value <= 0:
+                raise ValueError(f"{name} must be positive, got {value}")
+
+    @classmethod
+    def from_env(cls, prefix: str) -> 'CouchbaseConf':
+        """Read the configuration from `<prefix>_*` environment variables."""
+        values: Dict[str, Any] = {}
+        for f in fields(cls):
+            raw = os.environ.get(f"{prefix}_{f.name.upper()}")
+            if f.name in _TUNING_FIELDS:
+                if raw is None or raw.strip() == "":
+                    continue
+                parse = _TUNING_FIELDS[f.name]
+                try:
+                    values[f.name] = parse(raw.strip())
+                except ValueError:
+                    raise ValueError(f"{prefix}_{f.name.upper()} must be a valid {parse.__name__}, got {raw!r}") from None
+            else:
+                if raw is None:
+                    raise KeyError(f"{prefix}_{f.name.upper()}")
+                values[f.name] = raw
+        return cls(**values)
+
+    def tuning(self) -> Dict[str, Any]:
+        """The tuning settings that are set (for diagnostics)."""
+        return {name: getattr(self, name) for name in _TUNING_FIELDS if getattr(self, name) is not None}
+
+    def cluster_options(self) -> Dict[str, Any]:
+        """Keyword arguments for ClusterOptions implementing the tuning settings."""
+        tuning = self.tuning()
+        options: Dict[str, Any] = {}
+        timeouts = {name: timedelta(seconds=tuning[name]) for name in _TIMEOUT_SETTINGS if name in tuning}
+        if timeouts:
+            options["timeout_options"] = ClusterTimeoutOptions(**timeouts)
+        tracing = {name: timedelta(seconds=tuning.get(name, self.slow_operation_threshold)) for name in _TRACING_SETTINGS
+                   if name in tuning or self.slow_operation_threshold is not None}
+        if tracing:
+            options["tracing_options"] = ClusterTracingOptions(**tracing)
+        if "config_poll_interval" in tuning:
+            options["config_poll_interval"] = timedelta(seconds=tuning["config_poll_interval"])
+        if "compression" in tuning:
+            options["compression"] = Compression(tuning["compression"])
+            options["enable_compression"] = tuning["compression"] != "off"
+        for name in ("max_http_connections", "compression_min_size", "compression_min_ratio"):
+            if name in tuning:
+                options[name] = tuning[name]
+        return options
+
+
+# Optional CouchbaseConf settings and how to parse them from the environment
+_TUNING_FIELDS: Dict[str, Any] = {
+    "kv_timeout": float,
+    "kv_durable_timeout": float,
+    "query_timeout": float,
+    "analytics_timeout": float,
+    "search_timeout": float,
+    "connect_timeout": float,
+    "max_http_connections": int,
+    "compression": str,
+    "compression_min_size": int,
+    "compression_min_ratio": float,
+    "config_poll_interval": float,
+    "tracing_threshold_kv": float,
+    "tracing_threshold_query": float,
+    "slow_operation_threshold": float,
+    "slow_query_threshold": float,
+    "query_profile_sample_rate": float,
+}
+_TIMEOUT_SETTINGS = ("kv_timeout", "kv_durable_timeout", "query_timeout", "analytics_timeout", "search_timeout",
+                     "connect_timeout")
+_TRACING_SETTINGS = ("tracing_threshold_kv", "tracing_threshold_query")
+_COMPRESSION_MODES = tuple(mode.value for mode in Compression)
+
+
+# Default number of KV operations kept in flight by multi-document helpers
+DEFAULT_MULTI_CONCURRENCY = 32
+
+# Keyset pagination page sizes
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+# Hits returned by full-text searches unless a limit is given
+DEFAULT_SEARCH_LIMIT = 20
+
+# Documents per range-scan batch from each vBucket (bounds client memory during scans and exports)
+DEFAULT_SCAN_BATCH_SIZE = 200
+
+# Slow query analyses kept per client, and the minimum delay before analyzing a statement again
+SLOW_QUERY_BUFFER_SIZE = 100
+SLOW_QUERY_REANALYZE_AFTER = 300.0
+# Distinct statements whose last analysis time is remembered
+SLOW_QUERY_TRACKED_STATEMENTS = 500
+
+# Statements that are not analyzed themselves when slow
+_ANALYSIS_STATEMENTS = ("EXPLAIN", "ADVISE", "CREATE", "BUILD", "DROP")
+
+# Statement kinds the query service can prepare (DDL such as CREATE INDEX cannot be)
+_PREPARABLE_STATEMENTS = ("SELECT", "WITH", "INSERT", "UPSERT", "UPDATE", "DELETE", "MERGE")
+
+_TIMEOUT_EXCEPTIONS = (TimeoutException, AmbiguousTimeoutException, UnAmbiguousTimeoutException)
+_MISSING_EXCEPTIONS = (DocumentNotFoundException, DocumentUnretrievableException)
+
+
+@dataclass
+class HedgeStats:
+    """
+    Counters of hedged reads (`BaseModelCouchbase.aget` with `_hedge_delay`
+    set): reads issued, hedges fired after the delay, and hedges won by a replica.
+    """
+    reads: int = 0
+    fired: int = 0
+    won: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "reads": self.reads,
+            "fired": self.fired,
+            "won": self.won,
+            "fired_ratio": round(self.fired / self.reads, 4) if self.reads else 0.0,
+        }
+
+
+@dataclass
+class GetManyResult:
+    """
+    Outcome of a multi-document KV get.
+
+    `items` follows the order of the requested ids (duplicates included) and
+    holds None for ids that were missing or failed. Missing documents are
+    listed in `missing`; any other per-key failure is reported in `errors`.
+    Ids served by a replica after a primary timeout are listed in `from_replica`.
+    """
+    items: List[Any] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+    errors: Dict[str, Exception] = field(default_factory=dict)
+    from_replica: List[str] = field(default_factory=list)
+
+    @property
+    def found(self) -> List[Any]:
+        return [item for item in self.items if item is not None]
+
+
+@dataclass
+class BulkResult:
+    """
+    Outcome of a bulk mutation.
+
+    `items` lists what was written successfully, in input order (ids at the
+    Keyspace level, model instances at the BaseModelCouchbase level). `cas`
+    maps each successful id to its new CAS value; `errors` maps each failed id
+    to its exception.
+    """
+    items: List[Any] = field(default_factory=list)
+    cas: Dict[str, int] = field(default_factory=dict)
+    errors: Dict[str, Exception] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+@dataclass
+class Index:
+    """
+    Secondary (GSI) index declared on a model through `_indexes`, e.g.
+    `Index(["status", "created_at"], where="status != 'archived'")`.
+
+    `fields` are data field names (dotted paths allowed) or N1QL expressions.
+    `where` makes it a partial index and `partition_by` hash-partitions it.
+    The name defaults to `idx_<collection>_<fields>`.
+    """
+    fields: List[str]
+    where: Optional[str] = None
+    partition_by: List[str] = field(default_factory=list)
+    name: Optional[str] = None
+
+
+@dataclass
+class ProvisioningReport:
+    """
+    Outcome of `provision`/`aprovision`: the collections ensured, the indexes
+    built (by keyspace), failures (by client or keyspace) and the time spent
+    in each step, in seconds.
+    """
+    collections: List[str] = field(default_factory=list)
+    indexes: Dict[str, List[str]] = field(default_factory=dict)
+    errors: Dict[str, Exception] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def summary(self) -> str:
+        built = sum(len(names) for names in self.indexes.values())
+        steps = ", ".join(f"{step} {seconds * 1000:.0f}ms" for step, seconds in self.timings.items())
+        text = f"Provisioned {len(self.collections)} collection(s), built {built} index(es) ({steps})"
+        return text + (f"; {len(self.errors)} error(s)" if self.errors else "")
+
+
+class MultiOperationError(Exception):
+    """Raised when one or more keys of a multi-document operation failed."""
+
+    def __init__(self, message: str, result: Any):
+        super().__init__(message)
+        self.result = result
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def _encode_cursor(position: list) -> str:
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort_field: Optional[str]) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(position, list) or len(position) != (2 if sort_field else 1):
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}")
+    return position
+
+
+def _durability_options(durability: Optional[DurabilityLevel]) -> Dict[str, Any]:
+    return {"durability": ServerDurability(durability)} if durability is not None else {}
+
+
+def _transcoder_options(transcoder: Optional[Transcoder]) -> Dict[str, Any]:
+    return {"transcoder": transcoder} if transcoder is not None else {}
+
+
+_IDENTIFIER_PATH = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*")
+
+
+def _index_expression(field_or_expression: str) -> str:
+    """Quote plain (dotted) field names; pass N1QL expressions through unchanged."""
+    if _IDENTIFIER_PATH.fullmatch(field_or_expression):
+        return ".".join(f"`{part}`" for part in field_or_expression.split("."))
+    return field_or_expression
+
+
+# `where` lookups, written Django-style as `<field>__<lookup>` (default: equality)
+_LOOKUPS = {
+    "eq": "{field} = {param}",
+    "ne": "{field} != {param}",
+    "gt": "{field} > {param}",
+    "gte": "{field} >= {param}",
+    "lt": "{field} < {param}",
+    "lte": "{field} <= {param}",
+    "in": "{field} IN {param}",
+    "nin": "{field} NOT IN {param}",
+    "contains": "ARRAY_CONTAINS({field}, {param})",
+    "like": "{field} LIKE {param}",
+}
+
+_AGGREGATES = {"count", "count_distinct", "sum", "avg", "min", "max", "array_agg"}
+
+
+def _field_ref(path: str) -> str:
+    """Reference a data field (dotted paths allowed) of the document aliased `d`; `id` is the document key."""
+    if path == "id":
+        return "META(d).id"
+    if not _IDENTIFIER_PATH.fullmatch(path):
+        raise ValueError(f"Invalid field name: {path!r}")
+    return "d." + ".".join(f"`{part}`" for part in path.split("."))
+
+
+def _where_clause(where: Optional[Dict[str, Any]], params: Dict[str, Any]) -> str:
+    """Compile `{"status": "open", "priority__gte": 3}` into a WHERE clause, binding values into `params`."""
+    if not where:
+        return ""
+    conditions = []
+    for key, value in where.items():
+        path, lookup = key, "eq"
+        if "__" in key and key.rsplit("__", 1)[1] in _LOOKUPS:
+            path, lookup = key.rsplit("__", 1)
+        field_ref = _field_ref(path)
+        if value is None and lookup in ("eq", "ne"):
+            conditions.append(f"{field_ref} IS {'NOT ' if lookup == 'eq' else ''}VALUED")
+            continue
+        name = f"p{len(params)}"
+        params[name] = value
+        conditions.append(_LOOKUPS[lookup].format(field=field_ref, param=f"${name}"))
+    return " WHERE " + " AND ".join(conditions)
+
+
+def _order_clause(order_by: Optional[Any]) -> str:
+    """Compile `"-created_at"` or `["status", "-created_at"]` into an ORDER BY clause."""
+    if not order_by:
+        return ""
+    terms = [order_by] if isinstance(order_by, str) else order_by
+    return " ORDER BY " + ", ".join(
+        f"{_field_ref(term[1:])} DESC" if term.startswith("-") else _field_ref(term) for term in terms
+    )
+
+
+def _aggregate_expression(spec: Any) -> str:
+    """Compile `"count"`, `("sum", "amount")` or `("count_distinct", "owner")` into an aggregate call."""
+    function, path = (spec, "*") if isinstance(spec, str) else spec
+    function = function.lower()
+    if function not in _AGGREGATES:
+        raise ValueError(f"Unsupported aggregate: {function!r}")
+    argument = "*" if path == "*" else _field_ref(path)
+    if function == "count_distinct":
+        return f"COUNT(DISTINCT {argument})"
+    return f"{function.upper()}({argument})"
+
+
+def _index_statements(advice: Any) -> List[str]:
+    """The `index_statement` values found anywhere in ADVISE output."""
+    if isinstance(advice, dict):
+        found = [advice["index_statement"]] if isinstance(advice.get("index_statement"), str) else []
+        return found + [s for value in advice.values() if isinstance(value, (dict, list)) for s in _index_statements(value)]
+    if isinstance(advice, list):
+        return [s for value in advice for s in _index_statements(value)]
+    return []
+
+
+def _search_query(query: Union[str, SearchQuery], fields: Optional[List[str]]) -> SearchQuery:
+    """A query string searched in `fields` (match queries) or in every indexed field (query string syntax)."""
+    if isinstance(query, SearchQuery):
+        return query
+    if not fields:
+        return QueryStringQuery(query)
+    matches = [MatchQuery(query, field=field) for field in fields]
+    return matches[0] if len(matches) == 1 else DisjunctionQuery(*matches)
+
+
+def _scan_type(prefix: Optional[str], start: Optional[str], end: Optional[str], sample: Optional[int]):
+    if sample is not None:
+        if prefix is not None or start is not None or end is not None:
+            raise ValueError("A sampling scan cannot be combined with prefix/start/end")
+        return SamplingScan(sample)
+    if prefix is not None:
+        if start is not None or end is not None:
+            raise ValueError("Pass either prefix or start/end, not both")
+        return PrefixScan(prefix)
+    return RangeScan(ScanTerm(start) if start is not None else None,
+                     ScanTerm(end, exclusive=True) if end is not None else None)
+
+
+def _scan_options(ids_only: bool, batch_size: int, concurrency: int, transcoder: Optional[Transcoder]) -> ScanOptions:
+    return ScanOptions(ids_only=ids_only, batch_item_limit=max(1, batch_size), concurrency=max(1, concurrency),
+                       **_transcoder_options(transcoder))
+
+
+@contextmanager
+def _open_export(path: Union[str, os.PathLike], compression: Optional[str]):
+    """Binary writer for an NDJSON export: gzip (default), zstd (needs `zstandard`) or uncompressed."""
+    if compression == "gzip":
+        with gzip.open(path, "wb") as out:
+            yield out
+    elif compression == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("zstd exports require the 'zstandard' package (pip install zstandard)") from e
+        with open(path, "wb") as raw, zstandard.ZstdCompressor().stream_writer(raw, closefd=False) as out:
+            yield out
+    elif compression is None:
+        with open(path, "wb") as out:
+            yield out
+    else:
+        raise ValueError(f"Unknown compression: {compression!r} (expected 'gzip', 'zstd' or None)")
+
+
+class _ScanTimer:
+    """
+    Time spent waiting for range-scan results, reported as one "scan"
+    operation per `batch_size` items. The consumer's time between items is
+    not counted, so a slow reader does not show up as a slow scan.
+    """
+
+    def __init__(self, keyspace: 'Keyspace', detail: str, batch_size: int):
+        self.keyspace = keyspace
+        self.detail = detail
+        self.batch_size = max(1, batch_size)
+        self.seconds = 0.0
+        self.items = 0
+
+    def add(self, seconds: float) -> None:
+        self.seconds += seconds
+        self.items += 1
+        if self.items >= self.batch_size:
+            self.flush()
+
+    def fail(self, seconds: float, error: Exception) -> None:
+        self.keyspace._record("scan", self.detail, self.seconds + seconds, type(error).__name__)
+        self.seconds, self.items = 0.0, 0
+
+    def flush(self) -> None:
+        if self.items:
+            self.keyspace._record("scan", self.detail, self.seconds)
+        self.seconds, self.items = 0.0, 0
+
+
+def _ndjson_line(id: str, content: Any, ids_only: bool) -> bytes:
+    record = {"id": id} if ids_only else {"id": id, "data": content}
+    return json.dumps(record, separators=(",", ":"), default=str).encode() + b"\n"
+
+
+def _batched(keys: List[str], size: int) -> Iterator[List[str]]:
+    size = max(1, size)
+    for i in range(0, len(keys), size):
+        yield keys[i:i + size]
 
 
 class CouchbaseClient:
     """
     Couchbase client that holds a connection to a specific cluster.
     Provides lazy, cached cluster access and keyspace creation.
+
+    There is one cluster per API flavour: a blocking one (`get_cluster`) for
+    scripts, workers and tests, shared by all threads, and an asyncio one
+    (`get_async_cluster`) for request handlers, which belongs to the event
+    loop that opened it (the app's loop). A service using both APIs holds two
+    connections. Each is created once, even when first requested
+    concurrently. Services call `warm_up()` in the background at startup so
+    requests do not pay the connection cost, and report readiness through
+    `health_check()`.
     """
 
-    def __init__(self, conf: CouchbaseConf):
+    def __init__(self, conf: CouchbaseConf, transcoder: Optional[Transcoder] = None):
         self._conf = conf
+        # Default transcoder for KV operations (see transcoders.py); query rows use its serializer if it has one
+        self.transcoder = transcoder
         self._cluster: Optional[Cluster] = None
+        self._async_cluster: Optional[AsyncCluster] = None
+        self._cluster_lock = threading.Lock()
+        # In-flight async connection per event loop, shared by concurrent callers on that loop
+        # (a task is bound to its loop: another loop, e.g. a later asyncio.run, starts its own)
+        self._async_connecting: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        # Readiness, reported by health_check()
+        self._connecting = False
+        self._last_connection_error: Optional[str] = None
+        self._connect_seconds: Optional[float] = None
+        # Per-process registry of resolved handles, keyed by (bucket, scope, collection)
+        self._buckets: dict[str, Any] = {}
+        self._async_buckets: dict[str, Any] = {}
+        self._collections: dict[Tuple[str, str, str], Any] = {}
+        self._async_collections: dict[Tuple[str, str, str], Any] = {}
+        self._keyspaces: dict[Tuple[str, str, str], 'Keyspace'] = {}
+        self._provisioned: set[Tuple[str, str, str]] = set()
+        # Analyses of slow queries (newest last), and when each statement was last analyzed
+        self._slow_queries: deque = deque(maxlen=SLOW_QUERY_BUFFER_SIZE)
+        self._analyzed: dict[str, float] = {}
+        self._analysis_tasks: set = set()
+
+    def _get_connection_params(self) -> Tuple[str, ClusterOptions]:
+        auth = PasswordAuthenticator(self._conf.username, self._conf.password)
+        url = self._conf.protocol + "://" + self._conf.host
+        options = self._conf.cluster_options()
+        if self._conf.slow_operation_threshold is not None:
+            _route_sdk_logs()
+        if self.transcoder is not None:
+            options["transcoder"] = self.transcoder
+            serializer = getattr(self.transcoder, "serializer", None)
+            if serializer is not None:
+                options["serializer"] = serializer
+        return url, ClusterOptions(auth, **options)
 
     def get_cluster(self) -> Cluster:
         """Returns a cached Couchbase cluster connection."""
         if self._cluster is None:
-            auth = PasswordAuthenticator(self._conf.username, self._conf.password)
-            url = self._conf.protocol + "://" + self._conf.host
-            self._cluster = Cluster(url, ClusterOptions(auth))
-            self._cluster.wait_until_ready(timedelta(seconds=500))
+            with self._cluster_lock:
+                if self._cluster is None:
+                    started = self._connection_started()
+                    try:
+                        url, options = self._get_connection_params()
+                        cluster = Cluster(url, options)
+                        cluster.wait_until_ready(timedelta(seconds=500))
+                    except Exception as e:
+                        self._connection_failed(e)
+                        raise
+                    self._cluster = cluster
+                    self._connection_ready(started)
         return self._cluster
 
-    def ensure_collection_exists(self, collection_name: str, scope_name: str = "_default", bucket_name: Optional[str] = None):
-        """Ensure a collection exists in the bucket, creating it if necessary."""
+    async def get_async_cluster(self) -> AsyncCluster:
+        """Returns a cached asyncio Couchbase cluster connection (acouchbase)."""
+        if self._async_cluster is not None:
+            return self._async_cluster
+        loop = asyncio.get_running_loop()
+        connecting = self._async_connecting.get(loop)
+        if connecting is None:
+            connecting = self._async_connecting[loop] = loop.create_task(self._connect_async())
+        # Shielded: a cancelled caller must not abort the connection others are waiting for
+        return await asyncio.shield(connecting)
+
+    async def _connect_async(self) -> AsyncCluster:
+        started = self._connection_started()
+        try:
+            url, options = self._get_connection_params()
+            cluster = await AsyncCluster.connect(url, options)
+            await cluster.wait_until_ready(timedelta(seconds=500))
+        except Exception as e:
+            self._connection_failed(e)
+            raise
+        finally:
+            self._async_connecting.pop(asyncio.get_running_loop(), None)
+        self._async_cluster = cluster
+        self._connection_ready(started)
+        return cluster
+
+    def _connection_started(self) -> float:
+        self._connecting = True
+        return time.perf_counter()
+
+    def _connection_ready(self, started: float):
+        self._connecting = False
+        self._last_connection_error = None
+        self._connect_seconds = time.perf_counter() - started
+
+    def _connection_failed(self, error: Exception):
+        self._connecting = False
+        self._last_connection_error = str(error)
+
+    @property
+    def slow_operation_threshold(self) -> Optional[float]:
+        return self._conf.slow_operation_threshold
+
+    @property
+    def connected(self) -> bool:
+        return self._cluster is not None or self._async_cluster is not None
+
+    async def warm_up(self, sync: bool = False, retry_interval: float = 5.0):
+        """
+        Connect (and open the default bucket) ahead of the first request,
+        retrying until it succeeds. Run it as a background task at startup:
+        requests arriving meanwhile wait for this connection instead of
+        starting their own. Only the asyncio cluster is opened by default;
+        pass `sync=True` when the app also uses the blocking API (sync model
+        methods in threadpool routes), which otherwise connects on first use.
+        """
+        last_logged = 0.0
+        while True:
+            try:
+                await self.aget_bucket()
+                if sync:
+                    await asyncio.to_thread(self.get_default_bucket)
+                logger.info(f"Couchbase connection to {self._conf.host} ready in {self._connect_seconds or 0:.2f}s")
+                return
+            except Exception as e:
+                self._connecting = True
+                if time.monotonic() - last_logged >= 30:
+                    logger.warning(f"Couchbase connection to {self._conf.host} failed, retrying: {e}")
+                    last_logged = time.monotonic()
+                await asyncio.sleep(retry_interval)
+
+    def dev_info(self) -> Dict[str, Any]:
+        """Connection target and tuning settings, without credentials (for diagnostics)."""
+        return {
+            "host": self._conf.host,
+            "bucket": self._conf.bucket,
+            "protocol": self._conf.protocol,
+            "tuning": self._conf.tuning() or "sdk defaults",
+        }
+
+    def health_check(self) -> Dict[str, Any]:
+        """Connection readiness, without I/O (for health endpoints)."""
+        if self.connected:
+            return {"connected": True, "status": "healthy", "connect_ms": round((self._connect_seconds or 0) * 1000)}
+        if self._connecting or self._last_connection_error:
+            return {"connected": False, "status": "connecting", "last_error": self._last_connection_error}
+        return {"connected": False, "status": "not_connected"}
+
+    def get_bucket(self, bucket_name: Optional[str] = None):
+        """Returns a cached bucket handle."""
         if bucket_name is None:
             bucket_name = self._conf.bucket
-        cluster = self.get_cluster()
-        bucket = cluster.bucket(bucket_name)
-        collection_manager = bucket.collections()
+        bucket = self._buckets.get(bucket_name)
+        if bucket is None:
+            bucket = self.get_cluster().bucket(bucket_name)
+            self._buckets[bucket_name] = bucket
+        return bucket
+
+    async def aget_bucket(self, bucket_name: Optional[str] = None):
+        """Async variant of `get_bucket`."""
+        if bucket_name is None:
+            bucket_name = self._conf.bucket
+        bucket = self._async_buckets.get(bucket_name)
+        if bucket is None:
+            cluster = await self.get_async_cluster()
+            bucket = cluster.bucket(bucket_name)
+            await bucket.on_connect()
+            self._async_buckets[bucket_name] = bucket
+        return bucket
+
+    def get_collection(self, collection_name: str, scope_name: str = "_default", bucket_name: Optional[str] = None):
+        """Returns a cached collection handle (no provisioning, no network I/O once connected)."""
+        key = self._keyspace_key(collection_name, scope_name, bucket_name)
+        collection = self._collections.get(key)
+        if collection is None:
+            collection = self.get_bucket(key[0]).scope(scope_name).collection(collection_name)
+            self._collections[key] = collection
+        return collection
+
+    async def aget_collection(self, collection_name: str, scope_name: str = "_default", bucket_name: Optional[str] = None):
+        """Async variant of `get_collection`."""
+        key = self._keyspace_key(collection_name, scope_name, bucket_name)
+        collection = self._async_collections.get(key)
+        if collection is None:
+            bucket = await self.aget_bucket(key[0])
+            collection = bucket.scope(scope_name).collection(collection_name)
+            self._async_collections[key] = collection
+        return collection
+
+    def ensure_collection_exists(self, collection_name: str, scope_name: str = "_default", bucket_name: Optional[str] = None):
+        """
+        Ensure a collection exists in the bucket, creating it if necessary.
+        Provisioning happens once per process; call `invalidate_collection` if
+        the collection is dropped so the next access re-creates it.
+        """
+        key = self._keyspace_key(collection_name, scope_name, bucket_name)
+        if key in self._provisioned:
+            return
+        collection_manager = self.get_bucket(key[0]).collections()
         try:
             collection_manager.create_collection(scope_name, collection_name)
-            print(f"Created collection {collection_name} in scope {scope_name} of bucket {bucket_name}")
+            print(f"Created collection {collection_name} in scope {scope_name} of bucket {key[0]}")
         except CollectionAlreadyExistsException:
             pass
+        self._provisioned.add(key)
+
+    async def aensure_collection_exists(self, collection_name: str, scope_name: str = "_default", bucket_name: Optional[str] = None):
+        """Async variant of `ensure_collection_exists`."""
+        key = self._keyspace_key(collection_name, scope_name, bucket_name)
+        if key in self._provisioned:
+            return
+        bucket = await self.aget_bucket(key[0])
+        collection_manager = bucket.collections()
+        try:
+            await collection_manager.create_collection(scope_name, collection_name)
+            print(f"Created collection {collection_name} in scope {scope_name} of bucket {key[0]}")
+        except CollectionAlreadyExistsException:
+            pass
+        self._provisioned.add(key)
 
     def get_keyspace(self, collection_name: str, scope_name: str = "_default", bucket_name: Optional[str] = None) -> 'Keyspace':
-        """Create a Keyspace instance bound to this client."""
-        if bucket_name is None:
-            bucket_name = self._conf.bucket
-        self.ensure_collection_exists(collection_name, scope_name, bucket_name)
-        return Keyspace(bucket_name, scope_name, collection_name, client=self)
+        """Returns the cached Keyspace for a collection, provisioning it on first use."""
+        key = self._keyspace_key(collection_name, scope_name, bucket_name)
+        keyspace = self._keyspaces.get(key)
+        if keyspace is None or key not in self._provisioned:
+            self.ensure_collection_exists(collection_name, scope_name, key[0])
+            keyspace = self._keyspaces.setdefault(key, Keyspace(*key, client=self))
+        return keyspace
+
+    async def aget_keyspace(self, collection_name: str, scope_name: str = "_default", bucket_name: Optional[str] = None) -> 'Keyspace':
+        """Async variant of `get_keyspace`."""
+        key = self._keyspace_key(collection_name, scope_name, bucket_name)
+        keyspace = self._keyspaces.get(key)
+        if keyspace is None or key not in self._provisioned:
+            await self.aensure_collection_exists(collection_name, scope_name, key[0])
+            keyspace = self._keyspaces.setdefault(key, Keyspace(*key, client=self))
+        return keyspace
+
+    def invalidate_collection(self, collection_name: str, scope_name: str = "_default", bucket_name: Optional[str] = None):
+        """
+        Forget the cached handles and provisioning state for a collection.
+        Use this after a collection has been dropped (or recreated) out of band.
+        """
+        key = self._keyspace_key(collection_name, scope_name, bucket_name)
+        self._provisioned.discard(key)
+        self._keyspaces.pop(key, None)
+        self._collections.pop(key, None)
+        self._async_collections.pop(key, None)
+
+    def invalidate_all(self):
+        """Forget all cached bucket/scope/collection handles and provisioning state."""
+        self._provisioned.clear()
+        self._keyspaces.clear()
+        self._collections.clear()
+        self._async_collections.clear()
+        self._buckets.clear()
+        self._async_buckets.clear()
+
+    def slow_queries(self) -> List[Dict[str, Any]]:
+        """
+        Recent slow query analyses, newest last: the statement, its duration,
+        phase timings (when the run was profiled), the EXPLAIN plan and the
+        index statements ADVISE recommends.
+        """
+        return list(self._slow_queries)
+
+    def _claim_analysis(self, statement: str) -> bool:
+        # At most one analysis per statement every SLOW_QUERY_REANALYZE_AFTER seconds
+        now = time.monotonic()
+        last = self._analyzed.get(statement)
+        if last is not None and now - last < SLOW_QUERY_REANALYZE_AFTER:
+            return False
+        if len(self._analyzed) >= SLOW_QUERY_TRACKED_STATEMENTS:
+            self._analyzed.clear()
+        self._analyzed[statement] = now
+        return True
 
     def get_default_bucket(self):
         """Returns the default bucket using the cached cluster connection."""
-        cluster = self.get_cluster()
-        return cluster.bucket(self._conf.bucket)
+        return self.get_bucket(self._conf.bucket)
+
+    def _keyspace_key(self, collection_name: str, scope_name: str, bucket_name: Optional[str]) -> Tuple[str, str, str]:
+        return (bucket_name or self._conf.bucket, scope_name, collection_name)
 
 
-# Client registry keyed by service instance name
+_sdk_logs_routed = False
+
+
+def _route_sdk_logs():
+    """Send the SDK's own log output (threshold and orphan reports included) to Python logging, once."""
+    global _sdk_logs_routed
+    if _sdk_logs_routed:
+        return
+    _sdk_logs_routed = True
+    try:
+        import couchbase
+        couchbase.configure_logging(f"{__name__}.sdk", logging.INFO)
+    except Exception as e:
+        logger.warning(f"Could not route Couchbase SDK logs: {e}")
+
+
+# Client registry keyed by service instance name; writes hold the lock
 _clients: dict[str, CouchbaseClient] = {}
+_clients_lock = threading.RLock()
 
 
-def register_client(name: str, conf: CouchbaseConf):
+def register_client(name: str, conf: CouchbaseConf, transcoder: Optional[Transcoder] = None):
     """Register a CouchbaseClient for the given service instance name."""
-    _clients[name] = CouchbaseClient(conf)
+    with _clients_lock:
+        _clients[name] = CouchbaseClient(conf, transcoder=transcoder)
 
 
 def get_client(name: str) -> CouchbaseClient:
@@ -82,17 +833,14 @@ def get_client(name: str) -> CouchbaseClient:
     Auto-registers from environment variables on first access.
     Env var prefix is derived from the name: e.g. "couchbase-server" -> COUCHBASE_SERVER_*.
     """
-    if name not in _clients:
-        prefix = name.upper().replace("-", "_")
-        conf = CouchbaseConf(
-            host=os.environ[f'{prefix}_HOST'],
-            username=os.environ[f'{prefix}_USERNAME'],
-            password=os.environ[f'{prefix}_PASSWORD'],
-            bucket=os.environ[f'{prefix}_BUCKET'],
-            protocol=os.environ[f'{prefix}_PROTOCOL'],
-        )
-        register_client(name, conf)
-    return _clients[name]
+    client = _clients.get(name)
+    if client is not None:
+        return client
+    with _clients_lock:
+        if name not in _clients:
+            prefix = name.upper().replace("-", "_")
+            register_client(name, CouchbaseConf.from_env(prefix))
+        return _clients[name]
 
 
 @dataclass
@@ -115,41 +863,821 @@ class Keyspace:
     def __str__(self) -> str:
         return f"{self.bucket_name}.{self.scope_name}.{self.collection_name}"
 
-    def query(self, query: str, **kwargs) -> list:
+    def _quoted_name(self) -> str:
+        """`bucket`.`scope`.`collection`, safe for names with dashes or reserved words."""
+        return f"`{self.bucket_name}`.`{self.scope_name}`.`{self.collection_name}`"
+
+    @contextmanager
+    def _measure(self, operation: str, detail: Any):
+        """
+        Time the enclosed operation for the metrics sinks and log it if slow. Missing documents are not errors.
+        Multi-document operations put their failed keys in the yielded dict, to be counted as errors too.
+        """
+        started = time.perf_counter()
+        error = None
+        key_errors: Dict[str, Exception] = {}
+        try:
+            yield key_errors
+        except _MISSING_EXCEPTIONS:
+            raise
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self._record(operation, detail, time.perf_counter() - started, error)
+            counts: Dict[str, int] = {}
+            for exc in key_errors.values():
+                if not isinstance(exc, _MISSING_EXCEPTIONS):
+                    counts[type(exc).__name__] = counts.get(type(exc).__name__, 0) + 1
+            if counts:
+                metrics.record_key_errors(operation, str(self), counts)
+
+    def _record(self, operation: str, detail: Any, seconds: float, error: Optional[str] = None) -> None:
+        metrics.record(operation, str(self), seconds, error)
+        threshold = self.client.slow_operation_threshold
+        if threshold is not None and seconds >= threshold:
+            logger.warning(f"Slow Couchbase {operation} on {self}: {seconds * 1000:.1f}ms, {str(detail)[:500]}")
+
+    def query(self, query: str, *args, adhoc: Optional[bool] = None, **kwargs) -> list:
+        """
+        Run a N1QL statement. `${keyspace}` is replaced by this keyspace.
+
+        Values are passed as parameters, never spliced into the text: positional
+        arguments bind `$1`, `$2`, ... and `named_parameters={...}` binds `$name`.
+        Other keyword arguments are QueryOptions (`profile="timings"` included).
+        DML statements run prepared (`adhoc=False`): the SDK prepares each
+        statement text once and caches the plan, so keep values out of the
+        text. Pass `adhoc=True` for one-off statements.
+
+        Statements slower than the client's `slow_query_threshold` are analyzed
+        in the background (see `CouchbaseClient.slow_queries`).
+        """
         cluster = self.client.get_cluster()
-        query = query.replace("${keyspace}", str(self))
-        options = QueryOptions(**kwargs)
-        result = cluster.query(query, options)
-        return [row for row in result]
+        statement, options = self._query_options(query, args, adhoc, kwargs)
+        started = time.perf_counter()
+        with self._measure("query", statement):
+            result = cluster.query(statement, options)
+            rows = [row for row in result]
+        analysis = self._slow_query(statement, kwargs, result, time.perf_counter() - started)
+        if analysis is not None:
+            thread = threading.Thread(target=self._analyze, args=analysis, daemon=True)
+            thread.start()
+        return rows
 
-    def get_scope(self):
+    def _slow_query(self, statement: str, kwargs: dict, result, seconds: float) -> Optional[tuple]:
+        """Arguments for `_analyze`/`_aanalyze` if this run should be analyzed, else None."""
+        threshold = self.client._conf.slow_query_threshold
+        if threshold is None or seconds < threshold:
+            return None
+        if statement.lstrip().upper().startswith(_ANALYSIS_STATEMENTS) or not self.client._claim_analysis(statement):
+            return None
+        profile = None
+        if kwargs.get("profile") not in (None, QueryProfile.OFF):
+            try:
+                profile = result.metadata().profile()
+            except Exception:
+                pass
+        params = {name: kwargs[name] for name in ("positional_parameters", "named_parameters") if name in kwargs}
+        record = {
+            "statement": statement,
+            "keyspace": str(self),
+            "elapsed_ms": round(seconds * 1000, 1),
+            "at": time.time(),
+            "phase_times": (profile or {}).get("phaseTimes"),
+            "profile": profile,
+        }
+        return record, params
+
+    def _analyze(self, record: Dict[str, Any], params: dict):
+        """Capture EXPLAIN and ADVISE output for a slow statement into the client's ring buffer."""
+        try:
+            record["plan"] = self.query(f"EXPLAIN {record['statement']}", adhoc=True, profile=QueryProfile.OFF, **params)
+        except Exception as e:
+            record["plan_error"] = str(e)
+        try:
+            advice = self.query(f"ADVISE {record['statement']}", adhoc=True, profile=QueryProfile.OFF, **params)
+            record["recommended_indexes"] = _index_statements(advice)
+            record["advice"] = advice
+        except Exception as e:
+            record["advice_error"] = str(e)
+        self._store_analysis(record)
+
+    def _query_options(self, query: str, args: tuple, adhoc: Optional[bool], kwargs: dict) -> Tuple[str, QueryOptions]:
+        statement = query.replace("${keyspace}", str(self))
+        if args:
+            kwargs["positional_parameters"] = list(args)
+        if isinstance(kwargs.get("profile"), str):
+            kwargs["profile"] = QueryProfile(kwargs["profile"])
+        elif "profile" not in kwargs:
+            rate = self.client._conf.query_profile_sample_rate
+            if rate is not None and random.random() < rate:
+                kwargs["profile"] = QueryProfile.TIMINGS
+        if adhoc is None:
+            adhoc = not statement.lstrip().upper().startswith(_PREPARABLE_STATEMENTS)
+        return statement, QueryOptions(adhoc=adhoc, **kwargs)
+
+    def analytics_query(self, query: str, *args, **kwargs) -> List[dict]:
+        """
+        Run a SQL++ statement on the Analytics service instead of the query
+        service, so heavy reporting queries do not compete with API traffic.
+        `${keyspace}` is replaced by the Analytics collection shadowing this
+        keyspace, which has the same name, backtick-quoted (declare it under
+        `analytics:` in couchbase.yaml).
+        Parameters bind as in `query`; other keyword arguments are
+        AnalyticsOptions (`scan_consistency="request_plus"` included).
+        Results lag KV writes slightly unless `request_plus` is requested.
+        """
         cluster = self.client.get_cluster()
-        bucket = cluster.bucket(self.bucket_name)
-        return bucket.scope(self.scope_name)
+        statement, options = self._analytics_options(query, args, kwargs)
+        with self._measure("analytics", statement):
+            return [row for row in cluster.analytics_query(statement, options)]
 
-    def get_collection(self):
+    def search(self, query: Union[str, SearchQuery], limit: int = DEFAULT_SEARCH_LIMIT,
+               fields: Optional[List[str]] = None, index: Optional[str] = None, **kwargs) -> List[Tuple[str, float]]:
+        """
+        Full-text search through a scope-level search index (default
+        `search_index_name()`), restricted to this collection. Returns
+        `(id, score)` pairs, best first. A string `query` is matched against
+        `fields`, or parsed as a query string against every indexed field;
+        SearchQuery objects are used as given. Other keyword arguments are
+        SearchOptions (`scan_consistency="request_plus"` included).
+        Requires Couchbase Server 7.6+.
+        """
         scope = self.get_scope()
-        return scope.collection(self.collection_name)
+        index, search_query, options = self._search_options(query, limit, fields, index, kwargs)
+        with self._measure("search", f"{index}: {search_query.encodable}"):
+            return [(row.id, row.score) for row in scope.search_query(index, search_query, options)]
+
+    def search_index_name(self) -> str:
+        return f"idx_{self.collection_name}_search".replace("-", "_")
+
+    def _search_options(self, query: Union[str, SearchQuery], limit: int, fields: Optional[List[str]],
+                        index: Optional[str], kwargs: dict) -> Tuple[str, SearchQuery, SearchOptions]:
+        if isinstance(kwargs.get("scan_consistency"), str):
+            kwargs["scan_consistency"] = SearchScanConsistency(kwargs["scan_consistency"])
+        kwargs.setdefault("collections", [self.collection_name])
+        options = SearchOptions(limit=limit, **kwargs)
+        return index or self.search_index_name(), _search_query(query, fields), options
+
+    def _analytics_options(self, query: str, args: tuple, kwargs: dict) -> Tuple[str, AnalyticsOptions]:
+        statement = query.replace("${keyspace}", self._quoted_name())
+        if args:
+            kwargs["positional_parameters"] = list(args)
+        if isinstance(kwargs.get("scan_consistency"), str):
+            kwargs["scan_consistency"] = AnalyticsScanConsistency(kwargs["scan_consistency"])
+        return statement, AnalyticsOptions(**kwargs)
+
+    def index_name(self, index: Index) -> str:
+        if index.name:
+            return index.name
+        suffix = re.sub(r"[^A-Za-z0-9]+", "_", "_".join(index.fields)).strip("_")
+        return f"idx_{self.collection_name}_{suffix}".replace("-", "_")
+
+    def index_statement(self, index: Index) -> str:
+        """CREATE INDEX statement for a declared index, created deferred and only if missing."""
+        keys = ", ".join(_index_expression(f) for f in index.fields)
+        statement = f"CREATE INDEX `{self.index_name(index)}` IF NOT EXISTS ON {self._quoted_name()}({keys})"
+        if index.partition_by:
+            statement += f" PARTITION BY HASH({', '.join(_index_expression(f) for f in index.partition_by)})"
+        if index.where:
+            statement += f" WHERE {index.where}"
+        return statement + ' WITH {"defer_build": true}'
+
+    def _deferred_indexes_statement(self, names: List[str]) -> tuple:
+        return ("SELECT RAW name FROM system:indexes WHERE bucket_id = $1 AND scope_id = $2 "
+                "AND keyspace_id = $3 AND state = 'deferred' AND name IN $4",
+                self.bucket_name, self.scope_name, self.collection_name, names)
+
+    def _build_statement(self, names: List[str]) -> str:
+        return f"BUILD INDEX ON {self._quoted_name()}({', '.join(f'`{name}`' for name in names)})"
+
+    def create_indexes(self, indexes: List[Index]) -> List[str]:
+        """Create the given indexes with `defer_build`; existing ones are left untouched."""
+        for index in indexes:
+            self.query(self.index_statement(index))
+        return [self.index_name(index) for index in indexes]
+
+    def build_deferred_indexes(self, names: List[str]) -> List[str]:
+        """
+        Build those of the named indexes that are still deferred, in one BUILD
+        INDEX statement; other deferred indexes of the collection are left
+        alone. Returns the names built.
+        """
+        if not names:
+            return []
+        names = self.query(*self._deferred_indexes_statement(names))
+        if names:
+            self.query(self._build_statement(names))
+        return names
+
+    def get_scope(self):
+        return self.client.get_bucket(self.bucket_name).scope(self.scope_name)
+
+    def get_collection(self):
+        return self.client.get_collection(self.collection_name, self.scope_name, self.bucket_name)
+
+    def get(self, key: str, **kwargs) -> GetResult:
+        collection = self.get_collection()
+        with self._measure("get", key):
+            return collection.get(key, **kwargs)
 
     def insert(self, value: dict, key: Optional[str] = None, **kwargs) -> MutationResult:
         if key is None:
             key = str(uuid.uuid4())
         collection = self.get_collection()
-        return collection.insert(key, value, **kwargs)
+        with self._measure("insert", key):
+            return collection.insert(key, value, **kwargs)
+
+    def replace(self, key: str, value: dict, **kwargs) -> MutationResult:
+        collection = self.get_collection()
+        with self._measure("replace", key):
+            return collection.replace(key, value, **kwargs)
+
+    def upsert_fields(self, key: str, fields: Dict[str, Any], **kwargs) -> MutationResult:
+        """Set the given (dotted) paths of a document in one sub-document mutation."""
+        specs = [SD.upsert(path, value) for path, value in fields.items()]
+        collection = self.get_collection()
+        with self._measure("mutate_in", key):
+            return collection.mutate_in(key, specs, **kwargs)
 
     def remove(self, key: str, **kwargs) -> int:
         collection = self.get_collection()
-        result = collection.remove(key, **kwargs)
+        with self._measure("remove", key):
+            result = collection.remove(key, **kwargs)
         return result.cas
 
+    def get_many(self, keys: List[str], concurrency: int = DEFAULT_MULTI_CONCURRENCY,
+                 replica_fallback: bool = False, transcoder: Optional[Transcoder] = None) -> GetManyResult:
+        """
+        Fetch several documents from the data service in parallel.
+        Keys are sent as SDK multi-gets of at most `concurrency` keys each.
+        With `replica_fallback`, keys whose primary read timed out are retried
+        against any replica.
+        """
+        unique_keys = list(dict.fromkeys(keys))
+        collection = self.get_collection()
+        options = _transcoder_options(transcoder)
+        found: Dict[str, Any] = {}
+        result = GetManyResult()
+        with self._measure("get_many", f"{len(unique_keys)} keys") as key_errors:
+            for batch in _batched(unique_keys, concurrency):
+                batch_result = collection.get_multi(batch, **options)
+                found.update(batch_result.results)
+                timed_out = []
+                for key, exc in batch_result.exceptions.items():
+                    if isinstance(exc, _MISSING_EXCEPTIONS):
+                        result.missing.append(key)
+                    elif replica_fallback and isinstance(exc, _TIMEOUT_EXCEPTIONS):
+                        timed_out.append(key)
+                    else:
+                        result.errors[key] = exc
+                if timed_out:
+                    replica_result = collection.get_any_replica_multi(timed_out, **options)
+                    found.update(replica_result.results)
+                    result.from_replica.extend(replica_result.results)
+                    for key, exc in replica_result.exceptions.items():
+                        if isinstance(exc, _MISSING_EXCEPTIONS):
+                            result.missing.append(key)
+                        else:
+                            result.errors[key] = exc
+            key_errors.update(result.errors)
+        return self._order_many(keys, found, result)
+
+    @staticmethod
+    def _order_many(keys: List[str], found: Dict[str, Any], result: GetManyResult) -> GetManyResult:
+        position = {key: i for i, key in reversed(list(enumerate(keys)))}
+        result.items = [found.get(key) for key in keys]
+        result.missing.sort(key=position.__getitem__)
+        result.from_replica.sort(key=position.__getitem__)
+        return result
+
+    def insert_many(self, docs: Dict[str, Any], batch_size: int = DEFAULT_MULTI_CONCURRENCY,
+                    durability: Optional[DurabilityLevel] = None,
+                    transcoder: Optional[Transcoder] = None) -> BulkResult:
+        """Insert documents keyed by id, one SDK multi-insert per batch."""
+        collection = self.get_collection()
+        options = {**_durability_options(durability), **_transcoder_options(transcoder)}
+        with self._measure("insert_many", f"{len(docs)} keys") as key_errors:
+            result = self._run_bulk(list(docs), batch_size, lambda batch: collection.insert_multi({k: docs[k] for k in batch}, **options))
+            key_errors.update(result.errors)
+            return result
+
+    def replace_many(self, docs: Dict[str, Any], batch_size: int = DEFAULT_MULTI_CONCURRENCY,
+                     durability: Optional[DurabilityLevel] = None,
+                     transcoder: Optional[Transcoder] = None) -> BulkResult:
+        """Replace documents keyed by id, one SDK multi-replace per batch."""
+        collection = self.get_collection()
+        options = {**_durability_options(durability), **_transcoder_options(transcoder)}
+        with self._measure("replace_many", f"{len(docs)} keys") as key_errors:
+            result = self._run_bulk(list(docs), batch_size, lambda batch: collection.replace_multi({k: docs[k] for k in batch}, **options))
+            key_errors.update(result.errors)
+            return result
+
+    def remove_many(self, keys: List[str], batch_size: int = DEFAULT_MULTI_CONCURRENCY,
+                    durability: Optional[DurabilityLevel] = None) -> BulkResult:
+        """Remove documents by id, one SDK multi-remove per batch."""
+        collection = self.get_collection()
+        options = _durability_options(durability)
+        with self._measure("remove_many", f"{len(keys)} keys") as key_errors:
+            result = self._run_bulk(list(dict.fromkeys(keys)), batch_size, lambda batch: collection.remove_multi(batch, **options))
+            key_errors.update(result.errors)
+            return result
+
+    @staticmethod
+    def _run_bulk(keys: List[str], batch_size: int, op) -> BulkResult:
+        result = BulkResult()
+        for batch in _batched(keys, batch_size):
+            batch_result = op(batch)
+            for key, mutation in batch_result.results.items():
+                result.cas[key] = mutation.cas
+            result.errors.update(batch_result.exceptions)
+        result.items = [key for key in keys if key in result.cas]
+        return result
+
+    def find(self, where: Optional[Dict[str, Any]] = None, order_by: Optional[Any] = None,
+             limit: Optional[int] = None, offset: Optional[int] = None) -> List[list]:
+        """
+        Filtered query evaluated by the query service. Returns `[id, content]`
+        pairs (RAW projection). See `BaseModelCouchbase.find` for the syntax.
+        """
+        statement, params = self._find_statement(where, order_by, limit, offset)
+        return self.query(statement, named_parameters=params)
+
+    def count(self, where: Optional[Dict[str, Any]] = None) -> int:
+        statement, params = self._count_statement(where)
+        return self.query(statement, named_parameters=params)[0]
+
+    def aggregate(self, group_by: Optional[Any] = None, where: Optional[Dict[str, Any]] = None,
+                  **aggregations) -> List[dict]:
+        statement, params = self._aggregate_statement(group_by, where, aggregations)
+        return self.query(statement, named_parameters=params)
+
+    def analytics_aggregate(self, group_by: Optional[Any] = None, where: Optional[Dict[str, Any]] = None,
+                            **aggregations) -> List[dict]:
+        """`aggregate` computed by the Analytics service (see `analytics_query`)."""
+        statement, params = self._aggregate_statement(group_by, where, aggregations)
+        return self.analytics_query(statement, named_parameters=params)
+
+    def _find_statement(self, where: Optional[Dict[str, Any]], order_by: Optional[Any],
+                        limit: Optional[int], offset: Optional[int]) -> Tuple[str, dict]:
+        params: Dict[str, Any] = {}
+        statement = (f"SELECT RAW [META(d).id, d] FROM {self} AS d"
+                     f"{_where_clause(where, params)}{_order_clause(order_by)}")
+        if limit is not None:
+            params["limit"] = limit
+            statement += " LIMIT $limit"
+        if offset:
+            params["offset"] = offset
+            statement += " OFFSET $offset"
+        return statement, params
+
+    def _count_statement(self, where: Optional[Dict[str, Any]]) -> Tuple[str, dict]:
+        params: Dict[str, Any] = {}
+        return f"SELECT RAW COUNT(*) FROM {self} AS d{_where_clause(where, params)}", params
+
+    def _aggregate_statement(self, group_by: Optional[Any], where: Optional[Dict[str, Any]],
+                             aggregations: Dict[str, Any]) -> Tuple[str, dict]:
+        if not aggregations:
+            raise ValueError("aggregate() needs at least one aggregation, e.g. total=('sum', 'amount')")
+        groups = [group_by] if isinstance(group_by, str) else list(group_by or [])
+        projections = [f"{_field_ref(path)} AS `{path}`" for path in groups]
+        for alias, spec in aggregations.items():
+            projections.append(f"{_aggregate_expression(spec)} AS `{alias}`")
+        params: Dict[str, Any] = {}
+        statement = f"SELECT {', '.join(projections)} FROM {self._quoted_name()} AS d{_where_clause(where, params)}"
+        if groups:
+            statement += " GROUP BY " + ", ".join(_field_ref(path) for path in groups)
+        return statement, params
+
     def list(self, limit: Optional[int] = None) -> list:
-        limit_clause = f" LIMIT {limit}" if limit is not None else ""
-        query = f"SELECT META().id, * FROM {self}{limit_clause}"
-        return self.query(query)
+        return self.query(*self._list_statement(limit))
+
+    def _list_statement(self, limit: Optional[int] = None) -> tuple:
+        if limit is None:
+            return (f"SELECT META().id, * FROM {self}",)
+        return f"SELECT META().id, * FROM {self} LIMIT $1", limit
+
+    def list_page(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                  sort_field: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """
+        Keyset-paginated listing ordered by `sort_field` (a data field, dotted
+        paths allowed; ties broken by id) or by document id. Documents where
+        the field is missing or null come first. Returns the rows and an
+        opaque cursor for the next page (None on the last page).
+        """
+        statement, params = self._page_statement(limit, cursor, sort_field)
+        rows = self.query(statement, named_parameters=params)
+        return self._finish_page(rows, limit, sort_field)
+
+    def iter_all(self, page_size: int = DEFAULT_PAGE_SIZE, sort_field: Optional[str] = None) -> Iterator[dict]:
+        """Stream every row of the collection, holding at most one page in memory."""
+        cursor = None
+        while True:
+            rows, cursor = self.list_page(page_size, cursor, sort_field)
+            yield from rows
+            if cursor is None:
+                return
+
+    def scan(self, prefix: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None,
+             ids_only: bool = False, sample: Optional[int] = None, batch_size: int = DEFAULT_SCAN_BATCH_SIZE,
+             concurrency: int = 1, transcoder: Optional[Transcoder] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Stream `(id, content)` pairs with a KV range scan, without the query
+        service. Covers every document, those whose id starts with `prefix`, or
+        ids in [`start`, `end`); `sample=n` takes a random sample of about n
+        documents instead. Ids come in key order within each vBucket (not
+        globally). Documents arrive `batch_size` at a time from each of at most
+        `concurrency` vBuckets, so memory stays bounded. With `ids_only`,
+        content is None and document bodies are not transferred.
+        Requires Couchbase Server 7.6+.
+        """
+        collection = self.get_collection()
+        scan_type = _scan_type(prefix, start, end, sample)
+        options = _scan_options(ids_only, batch_size, concurrency, transcoder)
+        timer = _ScanTimer(self, prefix or f"[{start}, {end})", batch_size)
+        items = iter(collection.scan(scan_type, options))
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    break
+                except Exception as e:
+                    timer.fail(time.perf_counter() - started, e)
+                    raise
+                timer.add(time.perf_counter() - started)
+                yield item.id, None if ids_only else item.content_as[dict]
+        finally:
+            timer.flush()
+
+    def export(self, path: Union[str, os.PathLike], prefix: Optional[str] = None, ids_only: bool = False,
+               compression: Optional[str] = "gzip", **scan_options) -> int:
+        """
+        Write the documents (or only their ids) to `path` as NDJSON, one
+        `{"id": ..., "data": ...}` line per document, compressed with gzip
+        (default), zstd or not at all. Streams through `scan`; returns the
+        number of documents written.
+        """
+        count = 0
+        with _open_export(path, compression) as out:
+            for id, content in self.scan(prefix=prefix, ids_only=ids_only, **scan_options):
+                out.write(_ndjson_line(id, content, ids_only))
+                count += 1
+        return count
+
+    def _page_statement(self, limit: int, cursor: Optional[str], sort_field: Optional[str]) -> Tuple[str, dict]:
+        limit = min(max(1, limit), MAX_PAGE_SIZE)
+        # One extra row tells us whether another page follows
+        params: Dict[str, Any] = {"limit": limit + 1}
+        where = ""
+        if not sort_field:
+            if cursor is not None:
+                params["after_id"], = _decode_cursor(cursor, sort_field)
+                where = " WHERE META().id > $after_id"
+            return f"SELECT META().id, * FROM {self}{where} ORDER BY META().id LIMIT $limit", params
+        # MISSING and null sort as one null group, first, so that documents without the field still page
+        value = f"IFMISSING({_field_ref(sort_field)}, NULL)"
+        if cursor is not None:
+            after_value, params["after_id"] = _decode_cursor(cursor, sort_field)
+            if after_value is None:
+                where = f" WHERE ({value} IS NULL AND META(d).id > $after_id) OR {value} IS NOT NULL"
+            else:
+                params["after_value"] = after_value
+                where = f" WHERE {value} > $after_value OR ({value} = $after_value AND META(d).id > $after_id)"
+        return (f"SELECT META(d).id, d AS `{self.collection_name}` FROM {self} AS d{where}"
+                f" ORDER BY {value}, META(d).id LIMIT $limit"), params
+
+    def _finish_page(self, rows: List[dict], limit: int, sort_field: Optional[str]) -> Tuple[List[dict], Optional[str]]:
+        limit = min(max(1, limit), MAX_PAGE_SIZE)
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        last = rows[-1]
+        if sort_field == "id":
+            position = [last["id"], last["id"]]
+        elif sort_field:
+            value = last.get(self.collection_name)
+            for part in sort_field.split("."):
+                value = value.get(part) if isinstance(value, dict) else None
+            position = [value, last["id"]]
+        else:
+            position = [last["id"]]
+        return rows, _encode_cursor(position)
+
+    #### Async (acouchbase) ####
+
+    async def aquery(self, query: str, *args, adhoc: Optional[bool] = None, **kwargs) -> List[dict]:
+        """Async variant of `query`."""
+        cluster = await self.client.get_async_cluster()
+        statement, options = self._query_options(query, args, adhoc, kwargs)
+        started = time.perf_counter()
+        with self._measure("query", statement):
+            result = cluster.query(statement, options)
+            rows = [row async for row in result]
+        analysis = self._slow_query(statement, kwargs, result, time.perf_counter() - started)
+        if analysis is not None:
+            task = asyncio.ensure_future(self._aanalyze(*analysis))
+            self.client._analysis_tasks.add(task)
+            task.add_done_callback(self.client._analysis_tasks.discard)
+        return rows
+
+    def _store_analysis(self, record: Dict[str, Any]):
+        self.client._slow_queries.append(record)
+        advice = f"; recommended indexes: {record['recommended_indexes']}" if record.get("recommended_indexes") else ""
+        logger.warning(f"Slow query on {self} ({record['elapsed_ms']}ms): {record['statement'][:500]}{advice}")
+
+    async def _aanalyze(self, record: Dict[str, Any], params: dict):
+        """Async variant of `_analyze`."""
+        try:
+            record["plan"] = await self.aquery(f"EXPLAIN {record['statement']}", adhoc=True, profile=QueryProfile.OFF, **params)
+        except Exception as e:
+            record["plan_error"] = str(e)
+        try:
+            advice = await self.aquery(f"ADVISE {record['statement']}", adhoc=True, profile=QueryProfile.OFF, **params)
+            record["recommended_indexes"] = _index_statements(advice)
+            record["advice"] = advice
+        except Exception as e:
+            record["advice_error"] = str(e)
+        self._store_analysis(record)
+
+    async def aanalytics_query(self, query: str, *args, **kwargs) -> List[dict]:
+        """Async variant of `analytics_query`."""
+        cluster = await self.client.get_async_cluster()
+        statement, options = self._analytics_options(query, args, kwargs)
+        with self._measure("analytics", statement):
+            return [row async for row in cluster.analytics_query(statement, options)]
+
+    async def asearch(self, query: Union[str, SearchQuery], limit: int = DEFAULT_SEARCH_LIMIT,
+                      fields: Optional[List[str]] = None, index: Optional[str] = None,
+                      **kwargs) -> List[Tuple[str, float]]:
+        """Async variant of `search`."""
+        scope = await self.aget_scope()
+        index, search_query, options = self._search_options(query, limit, fields, index, kwargs)
+        with self._measure("search", f"{index}: {search_query.encodable}"):
+            return [(row.id, row.score) async for row in scope.search_query(index, search_query, options)]
+
+    async def acreate_indexes(self, indexes: List[Index]) -> List[str]:
+        # One statement at a time: the index service rejects concurrent DDL on a bucket
+        for index in indexes:
+            await self.aquery(self.index_statement(index))
+        return [self.index_name(index) for index in indexes]
+
+    async def abuild_deferred_indexes(self, names: List[str]) -> List[str]:
+        if not names:
+            return []
+        names = await self.aquery(*self._deferred_indexes_statement(names))
+        if names:
+            await self.aquery(self._build_statement(names))
+        return names
+
+    async def aget_scope(self):
+        bucket = await self.client.aget_bucket(self.bucket_name)
+        return bucket.scope(self.scope_name)
+
+    async def aget_collection(self):
+        return await self.client.aget_collection(self.collection_name, self.scope_name, self.bucket_name)
+
+    async def aget(self, key: str, **kwargs) -> GetResult:
+        collection = await self.aget_collection()
+        with self._measure("get", key):
+            return await collection.get(key, **kwargs)
+
+    async def aget_hedged(self, key: str, delay: float, stats: Optional[HedgeStats] = None,
+                          **kwargs) -> Tuple[GetResult, bool]:
+        """
+        Get a document, also asking any replica if the active copy has not
+        answered within `delay` seconds. Returns the first successful result
+        and whether it came from a replica (possibly stale); the other read is
+        cancelled. A missing document is reported by the active read only.
+        """
+        collection = await self.aget_collection()
+        if stats is not None:
+            stats.reads += 1
+        with self._measure("get_hedged", key):
+            return await self._hedge(collection, key, delay, stats, kwargs)
+
+    @staticmethod
+    async def _hedge(collection, key: str, delay: float, stats: Optional[HedgeStats], kwargs: dict) -> Tuple[GetResult, bool]:
+        primary = asyncio.ensure_future(collection.get(key, **kwargs))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result(), False
+        if stats is not None:
+            stats.fired += 1
+        replica = asyncio.ensure_future(collection.get_any_replica(key, **kwargs))
+        pending = {primary, replica}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                if primary in done and (primary.exception() is None or isinstance(primary.exception(), _MISSING_EXCEPTIONS)):
+                    return primary.result(), False
+                if replica in done and replica.exception() is None:
+                    if stats is not None:
+                        stats.won += 1
+                    return replica.result(), True
+            # Both failed: report the active copy's error
+            return primary.result(), False
+        finally:
+            for task in (primary, replica):
+                if not task.done():
+                    task.cancel()
+
+    async def ainsert(self, value: dict, key: Optional[str] = None, **kwargs) -> MutationResult:
+        if key is None:
+            key = str(uuid.uuid4())
+        collection = await self.aget_collection()
+        with self._measure("insert", key):
+            return await collection.insert(key, value, **kwargs)
+
+    async def areplace(self, key: str, value: dict, **kwargs) -> MutationResult:
+        collection = await self.aget_collection()
+        with self._measure("replace", key):
+            return await collection.replace(key, value, **kwargs)
+
+    async def aupsert_fields(self, key: str, fields: Dict[str, Any], **kwargs) -> MutationResult:
+        specs = [SD.upsert(path, value) for path, value in fields.items()]
+        collection = await self.aget_collection()
+        with self._measure("mutate_in", key):
+            return await collection.mutate_in(key, specs, **kwargs)
+
+    async def aremove(self, key: str, **kwargs) -> int:
+        collection = await self.aget_collection()
+        with self._measure("remove", key):
+            result = await collection.remove(key, **kwargs)
+        return result.cas
+
+    async def aget_many(self, keys: List[str], concurrency: int = DEFAULT_MULTI_CONCURRENCY,
+                        replica_fallback: bool = False, transcoder: Optional[Transcoder] = None) -> GetManyResult:
+        """Async variant of `get_many`; at most `concurrency` gets are in flight at once."""
+        unique_keys = list(dict.fromkeys(keys))
+        collection = await self.aget_collection()
+        options = _transcoder_options(transcoder)
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        found: Dict[str, Any] = {}
+        result = GetManyResult()
+
+        async def fetch(key: str):
+            async with semaphore:
+                try:
+                    found[key] = await collection.get(key, **options)
+                    return
+                except _MISSING_EXCEPTIONS:
+                    result.missing.append(key)
+                    return
+                except _TIMEOUT_EXCEPTIONS as e:
+                    if not replica_fallback:
+                        result.errors[key] = e
+                        return
+                except CouchbaseException as e:
+                    result.errors[key] = e
+                    return
+                try:
+                    found[key] = await collection.get_any_replica(key, **options)
+                    result.from_replica.append(key)
+                except _MISSING_EXCEPTIONS:
+                    result.missing.append(key)
+                except CouchbaseException as e:
+                    result.errors[key] = e
+
+        with self._measure("get_many", f"{len(unique_keys)} keys") as key_errors:
+            await asyncio.gather(*(fetch(key) for key in unique_keys))
+            key_errors.update(result.errors)
+        return self._order_many(keys, found, result)
+
+    async def ainsert_many(self, docs: Dict[str, Any], batch_size: int = DEFAULT_MULTI_CONCURRENCY,
+                           durability: Optional[DurabilityLevel] = None,
+                           transcoder: Optional[Transcoder] = None) -> BulkResult:
+        """Async variant of `insert_many`; at most `batch_size` inserts are in flight at once."""
+        collection = await self.aget_collection()
+        options = {**_durability_options(durability), **_transcoder_options(transcoder)}
+        with self._measure("insert_many", f"{len(docs)} keys") as key_errors:
+            result = await self._arun_bulk(list(docs), batch_size, lambda key: collection.insert(key, docs[key], **options))
+            key_errors.update(result.errors)
+            return result
+
+    async def areplace_many(self, docs: Dict[str, Any], batch_size: int = DEFAULT_MULTI_CONCURRENCY,
+                            durability: Optional[DurabilityLevel] = None,
+                            transcoder: Optional[Transcoder] = None) -> BulkResult:
+        """Async variant of `replace_many`."""
+        collection = await self.aget_collection()
+        options = {**_durability_options(durability), **_transcoder_options(transcoder)}
+        with self._measure("replace_many", f"{len(docs)} keys") as key_errors:
+            result = await self._arun_bulk(list(docs), batch_size, lambda key: collection.replace(key, docs[key], **options))
+            key_errors.update(result.errors)
+            return result
+
+    async def aremove_many(self, keys: List[str], batch_size: int = DEFAULT_MULTI_CONCURRENCY,
+                           durability: Optional[DurabilityLevel] = None) -> BulkResult:
+        """Async variant of `remove_many`."""
+        collection = await self.aget_collection()
+        options = _durability_options(durability)
+        with self._measure("remove_many", f"{len(keys)} keys") as key_errors:
+            result = await self._arun_bulk(list(dict.fromkeys(keys)), batch_size, lambda key: collection.remove(key, **options))
+            key_errors.update(result.errors)
+            return result
+
+    @staticmethod
+    async def _arun_bulk(keys: List[str], batch_size: int, op) -> BulkResult:
+        semaphore = asyncio.Semaphore(max(1, batch_size))
+        result = BulkResult()
+
+        async def run(key: str):
+            async with semaphore:
+                try:
+                    mutation = await op(key)
+                    result.cas[key] = mutation.cas
+                except CouchbaseException as e:
+                    result.errors[key] = e
+
+        await asyncio.gather(*(run(key) for key in keys))
+        result.items = [key for key in keys if key in result.cas]
+        return result
+
+    async def afind(self, where: Optional[Dict[str, Any]] = None, order_by: Optional[Any] = None,
+                    limit: Optional[int] = None, offset: Optional[int] = None) -> List[list]:
+        statement, params = self._find_statement(where, order_by, limit, offset)
+        return await self.aquery(statement, named_parameters=params)
+
+    async def acount(self, where: Optional[Dict[str, Any]] = None) -> int:
+        statement, params = self._count_statement(where)
+        return (await self.aquery(statement, named_parameters=params))[0]
+
+    async def aaggregate(self, group_by: Optional[Any] = None, where: Optional[Dict[str, Any]] = None,
+                         **aggregations) -> List[dict]:
+        statement, params = self._aggregate_statement(group_by, where, aggregations)
+        return await self.aquery(statement, named_parameters=params)
+
+    async def aanalytics_aggregate(self, group_by: Optional[Any] = None, where: Optional[Dict[str, Any]] = None,
+                                   **aggregations) -> List[dict]:
+        statement, params = self._aggregate_statement(group_by, where, aggregations)
+        return await self.aanalytics_query(statement, named_parameters=params)
+
+    async def alist(self, limit: Optional[int] = None) -> List[dict]:
+        return await self.aquery(*self._list_statement(limit))
+
+    async def alist_page(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                         sort_field: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """Async variant of `list_page`."""
+        statement, params = self._page_statement(limit, cursor, sort_field)
+        rows = await self.aquery(statement, named_parameters=params)
+        return self._finish_page(rows, limit, sort_field)
+
+    async def aiter_all(self, page_size: int = DEFAULT_PAGE_SIZE, sort_field: Optional[str] = None) -> AsyncIterator[dict]:
+        """Async variant of `iter_all`."""
+        cursor = None
+        while True:
+            rows, cursor = await self.alist_page(page_size, cursor, sort_field)
+            for row in rows:
+                yield row
+            if cursor is None:
+                return
+
+    async def ascan(self, prefix: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None,
+                    ids_only: bool = False, sample: Optional[int] = None, batch_size: int = DEFAULT_SCAN_BATCH_SIZE,
+                    concurrency: int = 1, transcoder: Optional[Transcoder] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """Async variant of `scan`."""
+        collection = await self.aget_collection()
+        scan_type = _scan_type(prefix, start, end, sample)
+        options = _scan_options(ids_only, batch_size, concurrency, transcoder)
+        timer = _ScanTimer(self, prefix or f"[{start}, {end})", batch_size)
+        items = collection.scan(scan_type, options).__aiter__()
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = await items.__anext__()
+                except StopAsyncIteration:
+                    break
+                except Exception as e:
+                    timer.fail(time.perf_counter() - started, e)
+                    raise
+                timer.add(time.perf_counter() - started)
+                yield item.id, None if ids_only else item.content_as[dict]
+        finally:
+            timer.flush()
+
+    async def aexport(self, path: Union[str, os.PathLike], prefix: Optional[str] = None, ids_only: bool = False,
+                      compression: Optional[str] = "gzip", **scan_options) -> int:
+        """Async variant of `export` (compression and file writes run on the event loop, a batch at a time)."""
+        count = 0
+        with _open_export(path, compression) as out:
+            async for id, content in self.ascan(prefix=prefix, ids_only=ids_only, **scan_options):
+                out.write(_ndjson_line(id, content, ids_only))
+                count += 1
+        return count
 
 
 DataT = TypeVar("DataT", bound=BaseModel)
 T = TypeVar("T", bound="BaseModelCouchbase")
+ItemT = TypeVar("ItemT")
+
+
+class Page(BaseModel, Generic[ItemT]):
+    """One page of a keyset-paginated listing. Pass `next_cursor` back to get the next page."""
+    items: List[ItemT]
+    next_cursor: Optional[str] = None
+
 
 class BaseModelCouchbase(BaseModel, Generic[DataT]):
     id: str
@@ -157,6 +1685,31 @@ class BaseModelCouchbase(BaseModel, Generic[DataT]):
 
     _collection_name: ClassVar[str] = ""
     _service_instance: ClassVar[str] = "couchbase-server"
+    # Multi-get tuning: max KV gets in flight, and whether timed-out reads retry on a replica
+    _multi_get_concurrency: ClassVar[int] = DEFAULT_MULTI_CONCURRENCY
+    _replica_read_fallback: ClassVar[bool] = False
+    # Field used to order keyset-paginated listings (document id when unset); documents without it come first
+    _sort_field: ClassVar[Optional[str]] = None
+    # Bulk mutation tuning: max KV mutations per SDK multi-op / in flight
+    _bulk_batch_size: ClassVar[int] = DEFAULT_MULTI_CONCURRENCY
+    # Opt-in read-through cache for get/aget, e.g. `_cache = DocumentCache(max_size=10_000, ttl=30)`
+    _cache: ClassVar[Optional[DocumentCache]] = None
+    # Secondary indexes on this collection, created by `provision_indexes` at startup
+    _indexes: ClassVar[List[Index]] = []
+    # KV transcoder for this model's documents (default: the client's), see transcoders.py
+    _transcoder: ClassVar[Optional[Transcoder]] = None
+    # Hedged reads: seconds `aget` waits for the active copy before also asking any replica
+    # (None: off). Only `aget` hedges; `get`, `get_many` and `aget_many` always read the active
+    # copy (the blocking SDK cannot cancel the losing read). Replica reads may be stale; see `hedge_stats()`.
+    _hedge_delay: ClassVar[Optional[float]] = None
+    # Full-text search index used by `search` (default `idx_<collection>_search`), see couchbase.yaml
+    _search_index: ClassVar[Optional[str]] = None
+
+    # Load state, kept in slots rather than private attributes so that equality compares only
+    # id and data. Unset until loaded, and not carried over by model_copy:
+    #   _original     - stored content as loaded, to find the fields changed since (see dirty_fields)
+    #   _from_replica - set when the item was served by a replica (hedged reads only)
+    __slots__ = ("_original", "_from_replica")
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
@@ -168,16 +1721,9 @@ class BaseModelCouchbase(BaseModel, Generic[DataT]):
             if "_collection_name" in private_attrs:
                 collection_name = private_attrs["_collection_name"].default
         if collection_name:
-            service_instance = getattr(cls, "_service_instance", "couchbase-server")
-            if not service_instance:
-                private_attrs = getattr(cls, "__private_attributes__", {})
-                if "_service_instance" in private_attrs:
-                    service_instance = private_attrs["_service_instance"].default
-            try:
-                client = get_client(service_instance)
-                client.ensure_collection_exists(collection_name)
-            except Exception as e:
-                print(f"Warning: Could not auto-create collection '{collection_name}': {e}")
+            # No I/O here: collections are created by `aprovision()` at startup,
+            # or lazily on the model's first operation
+            _models.append(cls)
 
     @classmethod
     def get_keyspace(cls) -> Keyspace:
@@ -186,26 +1732,154 @@ class BaseModelCouchbase(BaseModel, Generic[DataT]):
         client = get_client(cls._service_instance)
         return client.get_keyspace(cls._collection_name)
 
+    @classmethod
+    async def aget_keyspace(cls) -> Keyspace:
+        if not cls._collection_name:
+            raise ValueError(f"_collection_name not set for {cls.__name__}")
+        client = get_client(cls._service_instance)
+        return await client.aget_keyspace(cls._collection_name)
+
+    @classmethod
+    def _kv_transcoder(cls) -> Optional[Transcoder]:
+        return cls._transcoder or get_client(cls._service_instance).transcoder
+
+    @classmethod
+    def _kv_options(cls) -> Dict[str, Any]:
+        return _transcoder_options(cls._transcoder)
+
+    @classmethod
+    def _encode(cls, data: BaseModel) -> Any:
+        """Value handed to the transcoder: the model itself if it can encode models, else a dict."""
+        return data if getattr(cls._kv_transcoder(), "encodes_models", False) else data.model_dump()
+
+    @classmethod
+    def cache_stats(cls) -> Optional[Dict[str, Any]]:
+        """Counters of the model's document cache, or None when caching is off."""
+        return cls._cache.stats() if cls._cache is not None else None
+
+    @classmethod
+    def hedge_stats(cls) -> Optional[Dict[str, Any]]:
+        """Hedged read counters for this model, or None when hedging is off."""
+        if cls._hedge_delay is None:
+            return None
+        return cls._hedge_counters().as_dict()
+
+    @classmethod
+    def _hedge_counters(cls) -> HedgeStats:
+        return _hedge_stats.setdefault(cls, HedgeStats())
+
+    @property
+    def from_replica(self) -> bool:
+        """True if this item was read from a replica by a hedged read (and may be stale)."""
+        return getattr(self, "_from_replica", False)
+
+    @classmethod
+    def _cached(cls: type[T], id: str) -> Optional[T]:
+        hit = cls._cache.get(id) if cls._cache is not None else None
+        return cls._from_document(id, hit[0]) if hit is not None else None
+
+    @classmethod
+    def _read_token(cls) -> Optional[int]:
+        return cls._cache.begin_read() if cls._cache is not None else None
+
+    @classmethod
+    def _cache_result(cls: type[T], id: str, result: GetResult, token: Optional[int]) -> T:
+        data = result.content_as[dict]
+        if cls._cache is not None:
+            cls._cache.put(id, data, result.cas, token)
+        return cls._from_document(id, data)
+
+    @classmethod
+    def _invalidate_cached(cls, ids: List[str]) -> None:
+        if cls._cache is not None:
+            cls._cache.invalidate(*ids)
+
     @classmethod
     def get(cls: type[T], id: str) -> Optional[T]:
+        cached = cls._cached(id)
+        if cached is not None:
+            return cached
+        token = cls._read_token()
         try:
-            result = cls.get_keyspace().get_collection().get(id)
-            data = result.content_as[dict]
-            return cls(id=id, data=data)
+            result = cls.get_keyspace().get(id, **cls._kv_options())
+            return cls._cache_result(id, result, token)
         except DocumentNotFoundException:
             return None
 
     @classmethod
     def create(cls: type[T], data: DataT) -> T:
         key = str(uuid.uuid4())
-        cls.get_keyspace().insert(data.model_dump(), key=key)
+        cls.get_keyspace().insert(cls._encode(data), key=key, **cls._kv_options())
         return cls(id=key, data=data)
 
     @classmethod
     def update(cls: type[T], item: T) -> T:
-        cls.get_keyspace().get_collection().replace(item.id, item.data.model_dump())
+        try:
+            cls.get_keyspace().replace(item.id, cls._encode(item.data), **cls._kv_options())
+        finally:
+            cls._invalidate_cached([item.id])
         return item
 
+    @classmethod
+    def patch(cls, id: str, **fields) -> bool:
+        """
+        Set only the given data fields, in one sub-document mutation.
+        Values are validated against the data model. Returns False if the document does not exist.
+        Requires JSON documents (not available with binary transcoders).
+        """
+        values = cls._dump_fields(fields)
+        if not values:
+            return cls.get(id) is not None
+        try:
+            cls.get_keyspace().upsert_fields(id, values)
+            return True
+        except DocumentNotFoundException:
+            return False
+        finally:
+            cls._invalidate_cached([id])
+
+    @classmethod
+    def update_fields(cls: type[T], item: T) -> T:
+        """
+        Write only the data fields changed since `item` was loaded, in one
+        sub-document mutation. Items that were not loaded from Couchbase are
+        fully replaced, as with `update`.
+        """
+        dirty = item.dirty_fields()
+        if dirty is None:
+            return cls.update(item)
+        if dirty:
+            try:
+                cls.get_keyspace().upsert_fields(item.id, dirty)
+            finally:
+                cls._invalidate_cached([item.id])
+            item._original = {**item._original, **dirty}
+        return item
+
+    def dirty_fields(self) -> Optional[Dict[str, Any]]:
+        """
+        JSON values of the data fields that differ from the stored document,
+        or None when this item was not loaded from Couchbase.
+        """
+        original = getattr(self, "_original", None)
+        if original is None:
+            return None
+        current = self.data.model_dump(mode="json")
+        return {name: value for name, value in current.items()
+                if name not in original or original[name] != value}
+
+    @classmethod
+    def _dump_fields(cls, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate a partial update against the data model and return its JSON values."""
+        data_type = cls._data_type()
+        unknown = set(fields) - set(data_type.model_fields)
+        if unknown:
+            raise ValueError(f"Unknown field(s) for {data_type.__name__}: {', '.join(sorted(unknown))}")
+        probe = data_type.model_construct()
+        for name, value in fields.items():
+            data_type.__pydantic_validator__.validate_assignment(probe, name, value)
+        return probe.model_dump(mode="json", include=set(fields))
+
     @classmethod
     def delete(cls: type[T], id: str) -> bool:
         try:
@@ -213,76 +1887,570 @@ class BaseModelCouchbase(BaseModel, Generic[DataT]):
             return True
         except DocumentNotFoundException:
             return False
+        finally:
+            cls._invalidate_cached([id])
+
+    @classmethod
+    def find(cls: type[T], where: Optional[Dict[str, Any]] = None, order_by: Optional[Any] = None,
+             limit: Optional[int] = None, offset: Optional[int] = None) -> List[T]:
+        """
+        Documents matching `where`, filtered, sorted and limited by the query service.
+
+        `where` maps data fields (dotted paths allowed, `id` for the document key)
+        to values, with an optional `__<lookup>` suffix: eq (default), ne, gt,
+        gte, lt, lte, in, nin, contains (array membership) or like. All
+        conditions must hold; a None value matches missing/null fields.
+        `order_by` is a field or list of fields, prefixed with `-` for descending.
+
+            Task.find(where={"status": "open", "priority__gte": 3}, order_by="-created_at", limit=20)
+        """
+        rows = cls.get_keyspace().find(where, order_by, limit, offset)
+        return [cls._from_document(id, data) for id, data in rows]
+
+    @classmethod
+    def count(cls, where: Optional[Dict[str, Any]] = None) -> int:
+        """Number of documents matching `where` (same syntax as `find`)."""
+        return cls.get_keyspace().count(where)
+
+    @classmethod
+    def aggregate(cls, group_by: Optional[Any] = None, where: Optional[Dict[str, Any]] = None,
+                  **aggregations) -> List[dict]:
+        """
+        Aggregates computed by the query service, one row per group.
+        Each keyword names an output column: `"count"`, or `(function, field)`
+        with function one of count, count_distinct, sum, avg, min, max, array_agg.
+
+            Order.aggregate(group_by="status", where={"total__gt": 0}, n="count", revenue=("sum", "total"))
+        """
+        return cls.get_keyspace().aggregate(group_by, where, **aggregations)
+
+    @classmethod
+    def analytics_aggregate(cls, group_by: Optional[Any] = None, where: Optional[Dict[str, Any]] = None,
+                            **aggregations) -> List[dict]:
+        """
+        Same as `aggregate`, computed by the Analytics service on its own
+        copy of the collection, so reporting queries leave the query and
+        index nodes serving the API alone. The collection must be shadowed
+        in Analytics (`analytics:` in couchbase.yaml); results trail recent
+        writes by the ingestion lag.
+        """
+        return cls.get_keyspace().analytics_aggregate(group_by, where, **aggregations)
+
+    @classmethod
+    def search(cls: type[T], query: Union[str, SearchQuery], limit: int = DEFAULT_SEARCH_LIMIT,
+               fields: Optional[List[str]] = None, **kwargs) -> List[T]:
+        """
+        Items matching a full-text search, best match first, served by the
+        collection's search index instead of a N1QL scan. `query` is matched
+        against `fields` (e.g. ["name", "description"]), or parsed as a query
+        string against every indexed field when `fields` is None. Hits are
+        hydrated with one multi-get; documents deleted since they were
+        indexed are skipped. See `Keyspace.search`.
+        """
+        hits = cls.get_keyspace().search(query, limit, fields, index=cls._search_index, **kwargs)
+        return cls.get_many([id for id, _ in hits])
 
     @classmethod
     def list(cls: type[T], limit: Optional[int] = None) -> List[T]:
         rows = cls.get_keyspace().list(limit=limit)
-        items = []
-        for row in rows:
-            # Row structure: {'id': '...', 'collection_name': {...}} or similar
-            # Extract data using collection name
-            data_dict = row.get(cls._collection_name)
-            if data_dict is None:
-                # Fallback: try to find the data in other keys if needed?
-                # For now assuming standard behavior
-                pass
+        return cls._from_rows(rows)
 
-            if data_dict:
-                items.append(cls(id=row['id'], data=data_dict))
-        return items
+    @classmethod
+    def list_page(cls: type[T], limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Page[T]:
+        """
+        One page of documents in `_sort_field` (or id) order.
+        Pass the returned `next_cursor` to fetch the following page.
+        """
+        rows, next_cursor = cls.get_keyspace().list_page(limit, cursor, cls._sort_field)
+        return Page[cls](items=cls._from_rows(rows), next_cursor=next_cursor)
+
+    @classmethod
+    def iter_all(cls: type[T], page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[T]:
+        """Stream every document of the collection page by page, with constant memory."""
+        cursor = None
+        while True:
+            page = cls.list_page(page_size, cursor)
+            yield from page.items
+            cursor = page.next_cursor
+            if cursor is None:
+                return
 
     @classmethod
-    def get_many(cls: type[T], ids: List[str]) -> List[T]:
-        # TODO: Batch implementation when available. Loop for now.
-        # This is strictly "get", failing if not found?
-        # Or should it return None for missing?
-        # N1QL approach: SELECT META().id, * FROM keyspace USE KEYS [...]
-        keyspace = cls.get_keyspace()
-        # Use N1QL for batch get
-        keys_str = ", ".join([f'"{k}"' for k in ids])
-        query = f"SELECT META().id, * FROM {keyspace} USE KEYS [{keys_str}]"
-        rows = keyspace.query(query)
+    def scan(cls: type[T], prefix: Optional[str] = None, batch_size: int = DEFAULT_SCAN_BATCH_SIZE,
+             concurrency: int = 1) -> Iterator[T]:
+        """
+        Stream the collection's documents with a KV range scan (optionally only
+        ids starting with `prefix`), in bounded batches and without the query
+        service. See `Keyspace.scan`.
+        """
+        for id, data in cls.get_keyspace().scan(prefix=prefix, batch_size=batch_size, concurrency=concurrency,
+                                                transcoder=cls._transcoder):
+            yield cls._from_document(id, data)
 
+    @classmethod
+    def export(cls, path: Union[str, os.PathLike], prefix: Optional[str] = None, ids_only: bool = False,
+               compression: Optional[str] = "gzip", **scan_options) -> int:
+        """Write the collection to `path` as compressed NDJSON (see `Keyspace.export`)."""
+        return cls.get_keyspace().export(path, prefix=prefix, ids_only=ids_only, compression=compression,
+                                         transcoder=cls._transcoder, **scan_options)
+
+    @classmethod
+    def _from_rows(cls: type[T], rows: List[dict]) -> List[T]:
         items = []
         for row in rows:
+            # Row structure: {'id': '...', 'collection_name': {...}}
+            # Extract data using collection name
             data_dict = row.get(cls._collection_name)
             if data_dict:
-                items.append(cls(id=row['id'], data=data_dict))
+                items.append(cls._from_document(row['id'], data_dict))
         return items
 
     @classmethod
-    def create_many(cls: type[T], items: List[DataT]) -> List[T]:
-        keyspace = cls.get_keyspace()
-        results = []
-        for data in items:
-            key = str(uuid.uuid4())
-            keyspace.insert(data.model_dump(), key=key)
-            results.append(cls(id=key, data=data))
-        return results
-
-    @classmethod
-    def update_many(cls: type[T], items: List[T]) -> List[T]:
-        from couchbase.options import ReplaceOptions
-        keyspace = cls.get_keyspace()
-        collection = keyspace.get_collection()
-        results = []
-        for item in items:
-            collection.replace(item.id, item.data.model_dump())
-            results.append(item)
-        return results
-
-    @classmethod
-    def delete_many(cls: type[T], ids: List[str]) -> List[str]:
-        keyspace = cls.get_keyspace()
-        params = {"keys": ids}
-        # N1QL DELETE: DELETE FROM keyspace USE KEYS $keys
-        # But we need to use parametrized query.
-        # Wait, simple loop remove is safer/easier for now.
-        deleted = []
-        for key in ids:
+    def _data_type(cls) -> type[BaseModel]:
+        return cls.model_fields["data"].annotation
+
+    @classmethod
+    def _from_document(cls: type[T], id: str, data: dict) -> T:
+        item = cls(id=id, data=data)
+        item._original = data
+        return item
+
+    @classmethod
+    def _hydrate_many(cls, ids: List[str], result: GetManyResult) -> GetManyResult:
+        result.items = [
+            cls._from_document(id, doc.content_as[dict]) if doc is not None else None
+            for id, doc in zip(ids, result.items)
+        ]
+        return result
+
+    @classmethod
+    def _get_many_items(cls, result: GetManyResult, include_missing: bool) -> List[Optional[T]]:
+        if result.errors:
+            failed = ", ".join(sorted(result.errors))
+            raise MultiOperationError(f"Failed to get {len(result.errors)} document(s) from {cls._collection_name}: {failed}", result)
+        return result.items if include_missing else result.found
+
+    @classmethod
+    def fetch_many(cls, ids: List[str], concurrency: Optional[int] = None,
+                   replica_fallback: Optional[bool] = None) -> GetManyResult:
+        """
+        Multi-get by id over the KV service, reporting per-key outcomes.
+        `items` are model instances in input order (None where missing/failed).
+        """
+        result = cls.get_keyspace().get_many(
+            ids,
+            concurrency=concurrency or cls._multi_get_concurrency,
+            replica_fallback=cls._replica_read_fallback if replica_fallback is None else replica_fallback,
+            transcoder=cls._transcoder,
+        )
+        return cls._hydrate_many(ids, result)
+
+    @classmethod
+    def get_many(cls: type[T], ids: List[str], include_missing: bool = False,
+                 concurrency: Optional[int] = None, replica_fallback: Optional[bool] = None) -> List[Optional[T]]:
+        """
+        Get several documents by id, preserving input order.
+        Missing ids are skipped, or returned as None with `include_missing=True`.
+        Raises MultiOperationError (carrying the full GetManyResult) if any key failed.
+        """
+        result = cls.fetch_many(ids, concurrency=concurrency, replica_fallback=replica_fallback)
+        return cls._get_many_items(result, include_missing)
+
+    @classmethod
+    def create_many(cls, items: List[DataT], batch_size: Optional[int] = None,
+                    durability: Optional[DurabilityLevel] = None) -> BulkResult:
+        """
+        Insert many documents with generated ids.
+        Returns a BulkResult whose `items` are the created model instances.
+        """
+        docs = {str(uuid.uuid4()): data for data in items}
+        result = cls.get_keyspace().insert_many(
+            {key: cls._encode(data) for key, data in docs.items()},
+            batch_size=batch_size or cls._bulk_batch_size,
+            durability=durability,
+            transcoder=cls._transcoder,
+        )
+        result.items = [cls(id=key, data=docs[key]) for key in result.items]
+        return result
+
+    @classmethod
+    def update_many(cls, items: List[T], batch_size: Optional[int] = None,
+                    durability: Optional[DurabilityLevel] = None) -> BulkResult:
+        """Replace many documents. Returns a BulkResult whose `items` are the updated instances."""
+        by_id = {item.id: item for item in items}
+        try:
+            result = cls.get_keyspace().replace_many(
+                {id: cls._encode(item.data) for id, item in by_id.items()},
+                batch_size=batch_size or cls._bulk_batch_size,
+                durability=durability,
+                transcoder=cls._transcoder,
+            )
+        finally:
+            cls._invalidate_cached(list(by_id))
+        result.items = [by_id[id] for id in result.items]
+        return result
+
+    @classmethod
+    def delete_many(cls, ids: List[str], batch_size: Optional[int] = None,
+                    durability: Optional[DurabilityLevel] = None) -> BulkResult:
+        """Remove many documents. Returns a BulkResult whose `items` are the deleted ids."""
+        try:
+            return cls.get_keyspace().remove_many(
+                ids,
+                batch_size=batch_size or cls._bulk_batch_size,
+                durability=durability,
+            )
+        finally:
+            cls._invalidate_cached(ids)
+
+    #### Async (acouchbase) ####
+
+    @classmethod
+    async def aget(cls: type[T], id: str) -> Optional[T]:
+        cached = cls._cached(id)
+        if cached is not None:
+            return cached
+        token = cls._read_token()
+        keyspace = await cls.aget_keyspace()
+        try:
+            if cls._hedge_delay is None:
+                result = await keyspace.aget(id, **cls._kv_options())
+            else:
+                result, from_replica = await keyspace.aget_hedged(
+                    id, cls._hedge_delay, cls._hedge_counters(), **cls._kv_options())
+                if from_replica:
+                    # Not cached: a replica may lag behind the active copy
+                    item = cls._from_document(id, result.content_as[dict])
+                    item._from_replica = True
+                    return item
+            return cls._cache_result(id, result, token)
+        except DocumentNotFoundException:
+            return None
+
+    @classmethod
+    async def afetch_many(cls, ids: List[str], concurrency: Optional[int] = None,
+                          replica_fallback: Optional[bool] = None) -> GetManyResult:
+        keyspace = await cls.aget_keyspace()
+        result = await keyspace.aget_many(
+            ids,
+            concurrency=concurrency or cls._multi_get_concurrency,
+            replica_fallback=cls._replica_read_fallback if replica_fallback is None else replica_fallback,
+            transcoder=cls._transcoder,
+        )
+        return cls._hydrate_many(ids, result)
+
+    @classmethod
+    async def aget_many(cls: type[T], ids: List[str], include_missing: bool = False,
+                        concurrency: Optional[int] = None, replica_fallback: Optional[bool] = None) -> List[Optional[T]]:
+        result = await cls.afetch_many(ids, concurrency=concurrency, replica_fallback=replica_fallback)
+        return cls._get_many_items(result, include_missing)
+
+    @classmethod
+    async def acreate(cls: type[T], data: DataT) -> T:
+        key = str(uuid.uuid4())
+        keyspace = await cls.aget_keyspace()
+        await keyspace.ainsert(cls._encode(data), key=key, **cls._kv_options())
+        return cls(id=key, data=data)
+
+    @classmethod
+    async def acreate_many(cls, items: List[DataT], batch_size: Optional[int] = None,
+                           durability: Optional[DurabilityLevel] = None) -> BulkResult:
+        docs = {str(uuid.uuid4()): data for data in items}
+        keyspace = await cls.aget_keyspace()
+        result = await keyspace.ainsert_many(
+            {key: cls._encode(data) for key, data in docs.items()},
+            batch_size=batch_size or cls._bulk_batch_size,
+            durability=durability,
+            transcoder=cls._transcoder,
+        )
+        result.items = [cls(id=key, data=docs[key]) for key in result.items]
+        return result
+
+    @classmethod
+    async def aupdate(cls: type[T], item: T) -> T:
+        keyspace = await cls.aget_keyspace()
+        try:
+            await keyspace.areplace(item.id, cls._encode(item.data), **cls._kv_options())
+        finally:
+            cls._invalidate_cached([item.id])
+        return item
+
+    @classmethod
+    async def aupdate_many(cls, items: List[T], batch_size: Optional[int] = None,
+                           durability: Optional[DurabilityLevel] = None) -> BulkResult:
+        by_id = {item.id: item for item in items}
+        keyspace = await cls.aget_keyspace()
+        try:
+            result = await keyspace.areplace_many(
+                {id: cls._encode(item.data) for id, item in by_id.items()},
+                batch_size=batch_size or cls._bulk_batch_size,
+                durability=durability,
+                transcoder=cls._transcoder,
+            )
+        finally:
+            cls._invalidate_cached(list(by_id))
+        result.items = [by_id[id] for id in result.items]
+        return result
+
+    @classmethod
+    async def apatch(cls, id: str, **fields) -> bool:
+        values = cls._dump_fields(fields)
+        if not values:
+            return await cls.aget(id) is not None
+        keyspace = await cls.aget_keyspace()
+        try:
+            await keyspace.aupsert_fields(id, values)
+            return True
+        except DocumentNotFoundException:
+            return False
+        finally:
+            cls._invalidate_cached([id])
+
+    @classmethod
+    async def aupdate_fields(cls: type[T], item: T) -> T:
+        dirty = item.dirty_fields()
+        if dirty is None:
+            return await cls.aupdate(item)
+        if dirty:
+            keyspace = await cls.aget_keyspace()
             try:
-                keyspace.remove(key)
-                deleted.append(key)
-            except Exception:
-                pass
-        return deleted
+                await keyspace.aupsert_fields(item.id, dirty)
+            finally:
+                cls._invalidate_cached([item.id])
+            item._original = {**item._original, **dirty}
+        return item
+
+    @classmethod
+    async def adelete(cls: type[T], id: str) -> bool:
+        keyspace = await cls.aget_keyspace()
+        try:
+            await keyspace.aremove(id)
+            return True
+        except DocumentNotFoundException:
+            return False
+        finally:
+            cls._invalidate_cached([id])
+
+    @classmethod
+    async def adelete_many(cls, ids: List[str], batch_size: Optional[int] = None,
+                           durability: Optional[DurabilityLevel] = None) -> BulkResult:
+        keyspace = await cls.aget_keyspace()
+        try:
+            return await keyspace.aremove_many(
+                ids,
+                batch_size=batch_size or cls._bulk_batch_size,
+                durability=durability,
+            )
+        finally:
+            cls._invalidate_cached(ids)
+
+    @classmethod
+    async def afind(cls: type[T], where: Optional[Dict[str, Any]] = None, order_by: Optional[Any] = None,
+                    limit: Optional[int] = None, offset: Optional[int] = None) -> List[T]:
+        keyspace = await cls.aget_keyspace()
+        rows = await keyspace.afind(where, order_by, limit, offset)
+        return [cls._from_document(id, data) for id, data in rows]
+
+    @classmethod
+    async def acount(cls, where: Optional[Dict[str, Any]] = None) -> int:
+        keyspace = await cls.aget_keyspace()
+        return await keyspace.acount(where)
+
+    @classmethod
+    async def aaggregate(cls, group_by: Optional[Any] = None, where: Optional[Dict[str, Any]] = None,
+                         **aggregations) -> List[dict]:
+        keyspace = await cls.aget_keyspace()
+        return await keyspace.aaggregate(group_by, where, **aggregations)
+
+    @classmethod
+    async def aanalytics_aggregate(cls, group_by: Optional[Any] = None, where: Optional[Dict[str, Any]] = None,
+                                   **aggregations) -> List[dict]:
+        keyspace = await cls.aget_keyspace()
+        return await keyspace.aanalytics_aggregate(group_by, where, **aggregations)
+
+    @classmethod
+    async def asearch(cls: type[T], query: Union[str, SearchQuery], limit: int = DEFAULT_SEARCH_LIMIT,
+                      fields: Optional[List[str]] = None, **kwargs) -> List[T]:
+        keyspace = await cls.aget_keyspace()
+        hits = await keyspace.asearch(query, limit, fields, index=cls._search_index, **kwargs)
+        return await cls.aget_many([id for id, _ in hits])
+
+    @classmethod
+    async def alist(cls: type[T], limit: Optional[int] = None) -> List[T]:
+        keyspace = await cls.aget_keyspace()
+        rows = await keyspace.alist(limit=limit)
+        return cls._from_rows(rows)
+
+    @classmethod
+    async def alist_page(cls: type[T], limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Page[T]:
+        keyspace = await cls.aget_keyspace()
+        rows, next_cursor = await keyspace.alist_page(limit, cursor, cls._sort_field)
+        return Page[cls](items=cls._from_rows(rows), next_cursor=next_cursor)
+
+    @classmethod
+    async def aiter_all(cls: type[T], page_size: int = DEFAULT_PAGE_SIZE) -> AsyncIterator[T]:
+        cursor = None
+        while True:
+            page = await cls.alist_page(page_size, cursor)
+            for item in page.items:
+                yield item
+            cursor = page.next_cursor
+            if cursor is None:
+                return
+
+    @classmethod
+    async def ascan(cls: type[T], prefix: Optional[str] = None, batch_size: int = DEFAULT_SCAN_BATCH_SIZE,
+                    concurrency: int = 1) -> AsyncIterator[T]:
+        keyspace = await cls.aget_keyspace()
+        async for id, data in keyspace.ascan(prefix=prefix, batch_size=batch_size, concurrency=concurrency,
+                                             transcoder=cls._transcoder):
+            yield cls._from_document(id, data)
+
+    @classmethod
+    async def aexport(cls, path: Union[str, os.PathLike], prefix: Optional[str] = None, ids_only: bool = False,
+                      compression: Optional[str] = "gzip", **scan_options) -> int:
+        keyspace = await cls.aget_keyspace()
+        return await keyspace.aexport(path, prefix=prefix, ids_only=ids_only, compression=compression,
+                                      transcoder=cls._transcoder, **scan_options)
+
+    @classmethod
+    async def aquery(cls: type[T], query: str, *args, **kwargs) -> List[T]:
+        """Run a N1QL query against this model's keyspace and hydrate the rows.
+
+        The statement must project `META().id` and the document (e.g.
+        `SELECT META().id, * FROM ${keyspace} WHERE status = $1`); values are
+        bound as parameters, see `Keyspace.query`.
+        """
+        keyspace = await cls.aget_keyspace()
+        rows = await keyspace.aquery(query, *args, **kwargs)
+        return cls._from_rows(rows)
+
+
+# Hedged read counters, by model
+_hedge_stats: Dict[type, HedgeStats] = {}
+
+# Concrete models (with a `_collection_name`), registered at class definition
+_models: List[type[BaseModelCouchbase]] = []
+
+
+def registered_models() -> List[type[BaseModelCouchbase]]:
+    """Models defined so far, in definition order (import the models modules first)."""
+    return list(_models)
+
+
+def provision(models: Optional[List[type[BaseModelCouchbase]]] = None) -> ProvisioningReport:
+    """
+    Blocking variant of `aprovision`, for scripts and workers. Steps run one
+    model at a time.
+    """
+    models = registered_models() if models is None else models
+    report = ProvisioningReport()
+    started = step = time.perf_counter()
+    for name in dict.fromkeys(model._service_instance for model in models):
+        try:
+            get_client(name).get_cluster()
+        except Exception as e:
+            report.errors[name] = e
+    report.timings["connect"] = time.perf_counter() - step
+
+    step = time.perf_counter()
+    ready = []
+    for model in models:
+        if model._service_instance in report.errors:
+            continue
+        try:
+            report.collections.append(str(model.get_keyspace()))
+            ready.append(model)
+        except Exception as e:
+            report.errors[f"{model._service_instance}/{model._collection_name}"] = e
+    report.timings["collections"] = time.perf_counter() - step
+
+    step = time.perf_counter()
+    try:
+        report.indexes = provision_indexes([model for model in ready if model._indexes])
+    except Exception as e:
+        report.errors["indexes"] = e
+    report.timings["indexes"] = time.perf_counter() - step
+    report.timings["total"] = time.perf_counter() - started
+    report.collections = sorted(set(report.collections))
+    return report
+
+
+async def aprovision(models: Optional[List[type[BaseModelCouchbase]]] = None) -> ProvisioningReport:
+    """
+    Prepare everything the models (default: all registered models) need:
+    connect each client and create missing collections concurrently, then
+    create declared indexes and build them, one statement at a time (see
+    `aprovision_indexes`).
+
+    Run it once at startup (the FastAPI `init()` hook does). Failures are
+    collected in the report instead of raised; models that were not
+    provisioned still create their collection on first use.
+    """
+    models = registered_models() if models is None else models
+    report = ProvisioningReport()
+    started = step = time.perf_counter()
+    names = list(dict.fromkeys(model._service_instance for model in models))
+
+    async def connect(name: str):
+        try:
+            await get_client(name).get_async_cluster()
+        except Exception as e:
+            report.errors[name] = e
+
+    await asyncio.gather(*(connect(name) for name in names))
+    report.timings["connect"] = time.perf_counter() - step
+
+    step = time.perf_counter()
+    ready = []
+
+    async def ensure(model: type[BaseModelCouchbase]):
+        try:
+            report.collections.append(str(await model.aget_keyspace()))
+            ready.append(model)
+        except Exception as e:
+            report.errors[f"{model._service_instance}/{model._collection_name}"] = e
+
+    await asyncio.gather(*(ensure(model) for model in models if model._service_instance not in report.errors))
+    report.timings["collections"] = time.perf_counter() - step
+
+    step = time.perf_counter()
+    try:
+        report.indexes = await aprovision_indexes([model for model in ready if model._indexes])
+    except Exception as e:
+        report.errors["indexes"] = e
+    report.timings["indexes"] = time.perf_counter() - step
+    report.timings["total"] = time.perf_counter() - started
+    report.collections = sorted(set(report.collections))
+    return report
+
+
+def provision_indexes(models: Optional[List[type[BaseModelCouchbase]]] = None) -> Dict[str, List[str]]:
+    """
+    Create the indexes declared by `models` (default: every registered model
+    declaring `_indexes`) with `defer_build`, then build those still deferred
+    with one BUILD INDEX per collection (other deferred indexes are not
+    touched). Idempotent; safe to run on every startup. Returns
+    the names of the indexes built, by keyspace.
+    """
+    keyspaces: Dict[str, Keyspace] = {}
+    declared: Dict[str, List[str]] = {}
+    for model in models if models is not None else [m for m in _models if m._indexes]:
+        keyspace = model.get_keyspace()
+        keyspaces[str(keyspace)] = keyspace
+        declared.setdefault(str(keyspace), []).extend(keyspace.create_indexes(model._indexes))
+    return {name: keyspace.build_deferred_indexes(declared[name]) for name, keyspace in keyspaces.items()}
+
+
+async def aprovision_indexes(models: Optional[List[type[BaseModelCouchbase]]] = None) -> Dict[str, List[str]]:
+    """
+    Async variant of `provision_indexes`. Statements run one after another, as
+    the index service rejects concurrent DDL on the same bucket.
+    """
+    keyspaces: Dict[str, Keyspace] = {}
+    declared: Dict[str, List[str]] = {}
+    for model in models if models is not None else [m for m in _models if m._indexes]:
+        keyspace = await model.aget_keyspace()
+        keyspaces[str(keyspace)] = keyspace
+        declared.setdefault(str(keyspace), []).extend(await keyspace.acreate_indexes(model._indexes))
+    return {name: await keyspace.abuild_deferred_indexes(declared[name]) for name, keyspace in keyspaces.items()}
@@ -0,0 +1,893 @@
+"""
+In-memory stand-in for a Couchbase cluster, for unit tests and benchmarks.
+Not part of the client's API: tests import it and register it themselves.
+
+    from clients.couchbase.fake import FakeCouchbase
+
+    server = FakeCouchbase(kv_latency=0.0005, query_latency=0.002)
+    server.register("couchbase-server", bucket="main")
+
+`register` registers a client through `register_client` and hands it the
+fake's clusters, so models and keyspaces then run against the fake through
+the regular blocking and asyncio APIs, with no server or network.
+
+Supported:
+- KV get, get_any_replica, insert, replace and remove with CAS checks, and
+  their `*_multi` forms
+- sub-document `lookup_in` (get, exists) and `mutate_in` (upsert, insert,
+  replace, remove)
+- a N1QL subset: SELECT [RAW] over one keyspace with [AS alias] [USE KEYS]
+  [WHERE] [ORDER BY] [LIMIT] [OFFSET], where WHERE is comparisons (=, !=,
+  <, <=, >, >=) and IS [NOT] NULL/MISSING/VALUED combined with AND, OR and
+  parentheses, ORDER BY sorts in N1QL collation order (MISSING, NULL,
+  booleans, numbers, strings, arrays, objects) with ASC/DESC, and
+  expressions are field paths, `META(alias).id`, `IFMISSING(..., NULL)` or
+  `[...]` of those (projections also take `*` and `alias.*`). Index DDL,
+  EXPLAIN and ADVISE are accepted and do nothing.
+
+Anything else (aggregates, DML, scans, analytics, search, transactions)
+raises ParsingFailedException or FeatureUnavailableException. Expiry and
+durability options are accepted and ignored. Collections are created on
+first use.
+
+Each KV round trip sleeps `kv_latency` seconds (a `*_multi` call is one
+round trip, as the SDK pipelines it) and each query `query_latency`, give
+or take a `jitter` share. `stats()` counts round trips by operation, which
+is what batching and caching changes are meant to reduce.
+"""
+import asyncio
+import copy
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import couchbase.subdocument as SD
+from couchbase.exceptions import (
+    CasMismatchException,
+    CollectionAlreadyExistsException,
+    CouchbaseException,
+    DocumentExistsException,
+    DocumentNotFoundException,
+    DocumentNotJsonException,
+    FeatureUnavailableException,
+    ParsingFailedException,
+    PathExistsException,
+    PathMismatchException,
+    PathNotFoundException,
+)
+from couchbase.transcoder import FMT_COMMON_MASK, FMT_JSON, JSONTranscoder, Transcoder
+
+from .couchbase import CouchbaseClient, CouchbaseConf, get_client, register_client
+
+_JSON = JSONTranscoder()
+
+
+class FakeCouchbase:
+    """An in-process "cluster": its buckets' documents, injected latency and round-trip counters."""
+
+    def __init__(self, kv_latency: float = 0.0, query_latency: float = 0.0, jitter: float = 0.0,
+                 seed: Optional[int] = None):
+        self.kv_latency = kv_latency
+        self.query_latency = query_latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._collections: Dict[Tuple[str, str, str], Dict[str, '_Document']] = {}
+        self._stats: Dict[str, int] = {}
+        self._cas = 0
+        self._lock = threading.RLock()
+
+    def register(self, name: str, bucket: str = "main", transcoder: Optional[Transcoder] = None,
+                 **tuning) -> CouchbaseClient:
+        """Register the client for service instance `name` (see `register_client`), served by this fake."""
+        conf = CouchbaseConf(host="fake", username="", password="", bucket=bucket, protocol="couchbase", **tuning)
+        register_client(name, conf, transcoder=transcoder)
+        client = get_client(name)
+        self.install(client)
+        return client
+
+    def install(self, client: CouchbaseClient) -> None:
+        """Serve an existing, not yet connected client from this fake."""
+        client._cluster = FakeCluster(self, client.transcoder)
+        client._async_cluster = AsyncFakeCluster(self, client.transcoder)
+        client._connect_seconds = 0.0
+
+    def documents(self, bucket: str, scope: str = "_default", collection: str = "_default") -> Dict[str, Any]:
+        """Contents of a collection by key, decoded as JSON where possible (for assertions)."""
+        with self._lock:
+            docs = dict(self._collection(bucket, scope, collection))
+        return {key: doc.json() if doc.is_json() else doc.value for key, doc in docs.items()}
+
+    def stats(self) -> Dict[str, int]:
+        """Round trips by operation since creation or the last `reset()`."""
+        with self._lock:
+            return dict(self._stats)
+
+    def reset(self, data: bool = True) -> None:
+        """Clear the round-trip counters, and the documents unless `data=False`."""
+        with self._lock:
+            self._stats.clear()
+            if data:
+                self._collections.clear()
+
+    def _collection(self, bucket: str, scope: str, collection: str) -> Dict[str, '_Document']:
+        return self._collections.setdefault((bucket, scope, collection), {})
+
+    def _next_cas(self) -> int:
+        self._cas += 1
+        return self._cas
+
+    def _round_trip(self, kind: str, operation: str) -> float:
+        with self._lock:
+            self._stats[operation] = self._stats.get(operation, 0) + 1
+            latency = self.kv_latency if kind == "kv" else self.query_latency
+            if latency and self.jitter:
+                latency *= 1 + self._random.uniform(-self.jitter, self.jitter)
+        return max(0.0, latency)
+
+    def _pause(self, kind: str, operation: str) -> None:
+        latency = self._round_trip(kind, operation)
+        if latency:
+            time.sleep(latency)
+
+    async def _apause(self, kind: str, operation: str) -> None:
+        latency = self._round_trip(kind, operation)
+        if latency:
+            await asyncio.sleep(latency)
+
+
+@dataclass
+class _Document:
+    value: bytes
+    flags: int
+    cas: int
+
+    def is_json(self) -> bool:
+        return not self.flags or (self.flags & FMT_COMMON_MASK) == FMT_JSON
+
+    def json(self) -> Any:
+        return json.loads(self.value)
+
+
+#### Results (the attributes of the SDK's results the client reads) ####
+
+class _Content:
+    def __init__(self, value: Any):
+        self._value = value
+
+    def __getitem__(self, typ: type) -> Any:
+        return self._value if isinstance(self._value, typ) else typ(self._value)
+
+
+class FakeGetResult:
+    def __init__(self, key: str, cas: int, value: Any, is_replica: bool = False):
+        self.key = self.id = key
+        self.cas = cas
+        self.value = value
+        self.is_replica = is_replica
+        self.expiry_time = None
+
+    @property
+    def content_as(self) -> _Content:
+        return _Content(self.value)
+
+
+class FakeMutationResult:
+    def __init__(self, key: str, cas: int):
+        self.key = key
+        self.cas = cas
+
+    def mutation_token(self):
+        return None
+
+
+class FakeSubdocResult:
+    """Result of `lookup_in`/`mutate_in`: one value or error per spec."""
+
+    def __init__(self, key: str, cas: int, values: List[Any]):
+        self.key = key
+        self.cas = cas
+        self.value = values
+
+    @property
+    def content_as(self) -> '_ContentAt':
+        return _ContentAt(self.value)
+
+    def exists(self, index: int) -> bool:
+        return not isinstance(self.value[index], Exception)
+
+    def mutation_token(self):
+        return None
+
+
+class _ContentAt:
+    """`result.content_as[typ](index)`, as on the SDK's sub-document results."""
+
+    def __init__(self, values: List[Any]):
+        self._values = values
+
+    def __getitem__(self, typ: type) -> Callable[[int], Any]:
+        def at(index: int) -> Any:
+            value = self._values[index]
+            if isinstance(value, Exception):
+                raise value
+            return _Content(value)[typ]
+        return at
+
+
+class FakeMultiResult:
+    def __init__(self, results: Dict[str, Any], exceptions: Dict[str, Exception]):
+        self.results = results
+        self.exceptions = exceptions
+        self.all_ok = not exceptions
+
+
+class FakeQueryResult:
+    """Rows of a query, iterable with `for` (blocking API) or `async for` (acouchbase)."""
+
+    def __init__(self, rows: List[Any], pause: Optional[Callable] = None):
+        self._rows = rows
+        self._pause = pause
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._rows)
+
+    def __aiter__(self):
+        return self._aiter()
+
+    async def _aiter(self):
+        if self._pause is not None:
+            await self._pause()
+        for row in self._rows:
+            yield row
+
+    def rows(self):
+        return self.__aiter__() if self._pause is not None else iter(self._rows)
+
+    def metadata(self):
+        return SimpleNamespace(profile=lambda: None, metrics=lambda: None, warnings=lambda: [])
+
+
+#### Cluster, buckets, scopes and collections ####
+
+def _options(options: tuple, kwargs: dict) -> Dict[str, Any]:
+    """Merge SDK option objects (dicts) passed positionally with keyword options."""
+    merged: Dict[str, Any] = {}
+    for option in options:
+        if option is not None:
+            merged.update(option)
+    merged.update(kwargs)
+    return merged
+
+
+def _unsupported(feature: str) -> FeatureUnavailableException:
+    return FeatureUnavailableException(message=f"{feature} is not supported by FakeCouchbase")
+
+
+class FakeCluster:
+    """Blocking cluster handle (the `couchbase.cluster.Cluster` calls the client makes)."""
+
+    _async = False
+
+    def __init__(self, server: FakeCouchbase, transcoder: Optional[Transcoder] = None):
+        self._server = server
+        self._transcoder = transcoder or _JSON
+
+    def bucket(self, name: str) -> 'FakeBucket':
+        return FakeBucket(self, name)
+
+    def wait_until_ready(self, *args, **kwargs) -> None:
+        pass
+
+    @property
+    def transactions(self):
+        raise _unsupported("Transactions")
+
+    def analytics_query(self, *args, **kwargs):
+        raise _unsupported("Analytics")
+
+    def query(self, statement: str, *options, **kwargs) -> FakeQueryResult:
+        rows = run_query(self._server, statement, _options(options, kwargs))
+        if self._async:
+            return FakeQueryResult(rows, pause=lambda: self._server._apause("query", "query"))
+        self._server._pause("query", "query")
+        return FakeQueryResult(rows)
+
+
+class AsyncFakeCluster(FakeCluster):
+    """asyncio cluster handle (the `acouchbase.cluster.Cluster` calls the client makes)."""
+
+    _async = True
+
+    def bucket(self, name: str) -> 'FakeBucket':
+        return AsyncFakeBucket(self, name)
+
+    async def wait_until_ready(self, *args, **kwargs) -> None:
+        pass
+
+
+class FakeBucket:
+    def __init__(self, cluster: FakeCluster, name: str):
+        self._cluster = cluster
+        self.name = name
+
+    def scope(self, name: str) -> 'FakeScope':
+        return FakeScope(self, name)
+
+    def default_collection(self) -> 'FakeCollection':
+        return self.scope("_default").collection("_default")
+
+    def collections(self) -> 'FakeCollectionManager':
+        return FakeCollectionManager(self)
+
+
+class AsyncFakeBucket(FakeBucket):
+    async def on_connect(self) -> None:
+        pass
+
+    def collections(self) -> 'AsyncFakeCollectionManager':
+        return AsyncFakeCollectionManager(self)
+
+
+class FakeScope:
+    def __init__(self, bucket: FakeBucket, name: str):
+        self._bucket = bucket
+        self.name = name
+
+    def collection(self, name: str) -> 'FakeCollection':
+        cls = AsyncFakeCollection if isinstance(self._bucket, AsyncFakeBucket) else FakeCollection
+        return cls(self._bucket._cluster, self._bucket.name, self.name, name)
+
+    def search_query(self, *args, **kwargs):
+        raise _unsupported("Full-text search")
+
+
+class FakeCollectionManager:
+    def __init__(self, bucket: FakeBucket):
+        self._bucket = bucket
+        self._server = bucket._cluster._server
+
+    def create_collection(self, scope_name: str, collection_name: str, *args, **kwargs) -> None:
+        key = (self._bucket.name, scope_name, collection_name)
+        with self._server._lock:
+            if key in self._server._collections:
+                raise CollectionAlreadyExistsException(message=f"Collection {collection_name} already exists")
+            self._server._collections[key] = {}
+
+
+class AsyncFakeCollectionManager(FakeCollectionManager):
+    async def create_collection(self, scope_name: str, collection_name: str, *args, **kwargs) -> None:
+        super().create_collection(scope_name, collection_name)
+
+
+class _CollectionOperations:
+    """KV logic shared by the blocking and asyncio collections; the public methods add the round trip."""
+
+    def __init__(self, cluster: FakeCluster, bucket: str, scope: str, name: str):
+        self._server = cluster._server
+        self._transcoder = cluster._transcoder
+        self._keyspace = (bucket, scope, name)
+        self.name = name
+
+    def _docs(self) -> Dict[str, _Document]:
+        return self._server._collection(*self._keyspace)
+
+    def _require(self, key: str, options: Dict[str, Any]) -> _Document:
+        doc = self._docs().get(key)
+        if doc is None:
+            raise DocumentNotFoundException(message=f"Document {key!r} not found")
+        cas = options.get("cas")
+        if cas and cas != doc.cas:
+            raise CasMismatchException(message=f"CAS mismatch for {key!r}")
+        return doc
+
+    def _store(self, key: str, value: bytes, flags: int) -> int:
+        doc = _Document(value, flags, self._server._next_cas())
+        self._docs()[key] = doc
+        return doc.cas
+
+    def _transcoder_for(self, options: Dict[str, Any]) -> Transcoder:
+        return options.get("transcoder") or self._transcoder
+
+    def _get(self, key: str, *options, is_replica: bool = False, **kwargs) -> FakeGetResult:
+        options = _options(options, kwargs)
+        with self._server._lock:
+            doc = self._require(key, {})
+        return FakeGetResult(key, doc.cas, self._transcoder_for(options).decode_value(doc.value, doc.flags), is_replica)
+
+    def _get_any_replica(self, key: str, *options, **kwargs) -> FakeGetResult:
+        return self._get(key, *options, **kwargs)
+
+    def _insert(self, key: str, value: Any, *options, **kwargs) -> FakeMutationResult:
+        options = _options(options, kwargs)
+        encoded, flags = self._transcoder_for(options).encode_value(value)
+        with self._server._lock:
+            if key in self._docs():
+                raise DocumentExistsException(message=f"Document {key!r} already exists")
+            return FakeMutationResult(key, self._store(key, encoded, flags))
+
+    def _replace(self, key: str, value: Any, *options, **kwargs) -> FakeMutationResult:
+        options = _options(options, kwargs)
+        encoded, flags = self._transcoder_for(options).encode_value(value)
+        with self._server._lock:
+            self._require(key, options)
+            return FakeMutationResult(key, self._store(key, encoded, flags))
+
+    def _remove(self, key: str, *options, **kwargs) -> FakeMutationResult:
+        options = _options(options, kwargs)
+        with self._server._lock:
+            self._require(key, options)
+            del self._docs()[key]
+            return FakeMutationResult(key, self._server._next_cas())
+
+    def _multi(self, operation: Callable, items: List[tuple], options: tuple, kwargs: dict) -> FakeMultiResult:
+        results: Dict[str, Any] = {}
+        exceptions: Dict[str, Exception] = {}
+        for item in items:
+            try:
+                results[item[0]] = operation(*item, *options, **kwargs)
+            except CouchbaseException as e:
+                exceptions[item[0]] = e
+        return FakeMultiResult(results, exceptions)
+
+    def _get_multi(self, keys: List[str], *options, **kwargs) -> FakeMultiResult:
+        return self._multi(self._get, [(key,) for key in keys], options, kwargs)
+
+    def _get_any_replica_multi(self, keys: List[str], *options, **kwargs) -> FakeMultiResult:
+        return self._multi(self._get_any_replica, [(key,) for key in keys], options, kwargs)
+
+    def _insert_multi(self, docs: Dict[str, Any], *options, **kwargs) -> FakeMultiResult:
+        return self._multi(self._insert, list(docs.items()), options, kwargs)
+
+    def _replace_multi(self, docs: Dict[str, Any], *options, **kwargs) -> FakeMultiResult:
+        return self._multi(self._replace, list(docs.items()), options, kwargs)
+
+    def _remove_multi(self, keys: List[str], *options, **kwargs) -> FakeMultiResult:
+        return self._multi(self._remove, [(key,) for key in keys], options, kwargs)
+
+    def _lookup_in(self, key: str, specs: List[SD.Spec], *options, **kwargs) -> FakeSubdocResult:
+        with self._server._lock:
+            doc = self._require(key, {})
+        content = _json_content(key, doc)
+        values: List[Any] = []
+        for spec in specs:
+            op, path = spec[0], spec[1]
+            if op not in (SD.SubDocOp.GET, SD.SubDocOp.EXISTS):
+                raise _unsupported(f"Sub-document lookup {op!r}")
+            try:
+                value = _path_get(content, path)
+                values.append(copy.deepcopy(value) if op == SD.SubDocOp.GET else True)
+            except (PathNotFoundException, PathMismatchException) as e:
+                values.append(e)
+        return FakeSubdocResult(key, doc.cas, values)
+
+    def _mutate_in(self, key: str, specs: List[SD.Spec], *options, **kwargs) -> FakeSubdocResult:
+        options = _options(options, kwargs)
+        semantics = options.get("store_semantics", SD.StoreSemantics.REPLACE)
+        with self._server._lock:
+            doc = self._docs().get(key)
+            if doc is None and semantics == SD.StoreSemantics.REPLACE:
+                raise DocumentNotFoundException(message=f"Document {key!r} not found")
+            if doc is not None and semantics == SD.StoreSemantics.INSERT:
+                raise DocumentExistsException(message=f"Document {key!r} already exists")
+            if doc is not None:
+                self._require(key, options)
+            # Specs apply to a decoded copy: the document changes only if all of them succeed
+            content = _json_content(key, doc) if doc is not None else {}
+            for spec in specs:
+                _apply_mutation(content, spec)
+            encoded, flags = _JSON.encode_value(content)
+            cas = self._store(key, encoded, flags)
+        return FakeSubdocResult(key, cas, [None] * len(specs))
+
+
+def _json_content(key: str, doc: _Document) -> Any:
+    if not doc.is_json():
+        raise DocumentNotJsonException(message=f"Document {key!r} is not JSON")
+    return doc.json()
+
+
+class FakeCollection(_CollectionOperations):
+    """Blocking collection handle; every public method is one round trip."""
+
+
+class AsyncFakeCollection(_CollectionOperations):
+    """asyncio collection handle; every public method is one round trip."""
+
+
+_KV_OPERATIONS = ("get", "get_any_replica", "insert", "replace", "remove", "lookup_in", "mutate_in",
+                  "get_multi", "get_any_replica_multi", "insert_multi", "replace_multi", "remove_multi")
+
+
+def _blocking_operation(name: str) -> Callable:
+    def operation(self, *args, **kwargs):
+        self._server._pause("kv", name)
+        return getattr(self, f"_{name}")(*args, **kwargs)
+    operation.__name__ = name
+    return operation
+
+
+def _async_operation(name: str) -> Callable:
+    async def operation(self, *args, **kwargs):
+        await self._server._apause("kv", name)
+        return getattr(self, f"_{name}")(*args, **kwargs)
+    operation.__name__ = name
+    return operation
+
+
+for _name in _KV_OPERATIONS:
+    setattr(FakeCollection, _name, _blocking_operation(_name))
+    setattr(AsyncFakeCollection, _name, _async_operation(_name))
+
+
+#### Paths (sub-document specs and N1QL field references) ####
+
+_PATH_PART = re.compile(r"`((?:[^`]|``)*)`|([^.\[\]`]+)|\[(-?\d+)\]")
+
+
+def _parse_path(path: str) -> List[Any]:
+    parts: List[Any] = []
+    position = 0
+    while position < len(path):
+        if path[position] == ".":
+            position += 1
+            continue
+        match = _PATH_PART.match(path, position)
+        if match is None:
+            raise PathNotFoundException(message=f"Invalid path {path!r}")
+        quoted, name, index = match.groups()
+        parts.append(int(index) if index is not None else (quoted.replace("``", "`") if quoted is not None else name))
+        position = match.end()
+    return parts
+
+
+def _step(value: Any, part: Any, path: str) -> Any:
+    if isinstance(part, int):
+        if not isinstance(value, list):
+            raise PathMismatchException(message=f"Path {path!r} does not reach an array")
+        if not -len(value) <= part < len(value):
+            raise PathNotFoundException(message=f"Path {path!r} not found")
+        return value[part]
+    if not isinstance(value, dict):
+        raise PathMismatchException(message=f"Path {path!r} does not reach an object")
+    if part not in value:
+        raise PathNotFoundException(message=f"Path {path!r} not found")
+    return value[part]
+
+
+def _path_get(content: Any, path: str) -> Any:
+    value = content
+    for part in _parse_path(path):
+        value = _step(value, part, path)
+    return value
+
+
+def _apply_mutation(content: Any, spec: SD.Spec) -> None:
+    op, path, create_parents = spec[0], spec[1], spec[2]
+    value = copy.deepcopy(spec[5]) if len(spec) > 5 else None
+    parts = _parse_path(path)
+    if not parts:
+        raise PathNotFoundException(message="Empty sub-document path")
+    parent = content
+    for part in parts[:-1]:
+        if create_parents and isinstance(part, str) and isinstance(parent, dict) and part not in parent:
+            parent[part] = {}
+        parent = _step(parent, part, path)
+    last = parts[-1]
+    if op in (SD.SubDocOp.REPLACE, SD.SubDocOp.REMOVE):
+        _step(parent, last, path)
+    elif not isinstance(parent, dict) or not isinstance(last, str):
+        raise PathMismatchException(message=f"Path {path!r} cannot be set")
+    if op in (SD.SubDocOp.DICT_UPSERT, SD.SubDocOp.REPLACE):
+        parent[last] = value
+    elif op == SD.SubDocOp.DICT_ADD:
+        if last in parent:
+            raise PathExistsException(message=f"Path {path!r} already exists")
+        parent[last] = value
+    elif op == SD.SubDocOp.REMOVE:
+        del parent[last]
+    else:
+        raise _unsupported(f"Sub-document mutation {op!r}")
+
+
+#### N1QL subset ####
+
+class _Missing:
+    """N1QL MISSING: an absent field (distinct from NULL, which is None)."""
+
+    def __repr__(self) -> str:
+        return "MISSING"
+
+
+MISSING = _Missing()
+
+# Statements accepted and ignored (indexes and plans)
+_IGNORED_STATEMENTS = ("CREATE", "BUILD", "DROP", "EXPLAIN", "ADVISE")
+
+_SELECT = re.compile(r"""
+    SELECT\s+(?P<raw>RAW\s+)?(?P<projection>.+?)
+    \s+FROM\s+(?P<keyspace>\S+)
+    (?:\s+AS\s+(?P<alias>\w+))?
+    (?:\s+USE\s+KEYS\s+(?P<keys>\$\w+|\[.*?\]|"[^"]*"))?
+    (?:\s+WHERE\s+(?P<where>.+?))?
+    (?:\s+ORDER\s+BY\s+(?P<order>.+?))?
+    (?:\s+LIMIT\s+(?P<limit>\$\w+|\d+))?
+    (?:\s+OFFSET\s+(?P<offset>\$\w+|\d+))?
+    \s*;?""", re.IGNORECASE | re.VERBOSE | re.DOTALL)
+
+_CONDITION = re.compile(r"""
+    (?P<field>.+?)\s*
+    (?:(?P<op>==|!=|<>|<=|>=|=|<|>)\s*(?P<value>.+)
+      |\s+IS\s+(?P<negated>NOT\s+)?(?P<state>NULL|MISSING|VALUED))""", re.IGNORECASE | re.VERBOSE | re.DOTALL)
+
+_META_ID = re.compile(r"META\(\s*\w*\s*\)\.`?id`?", re.IGNORECASE)
+_FIELD_PATH = re.compile(r"(?:`(?:[^`]|``)+`|\w+)(?:\.(?:`(?:[^`]|``)+`|\w+)|\[\d+\])*")
+_IF_MISSING = re.compile(r"IFMISSING\(\s*(?P<expression>.+?)\s*,\s*NULL\s*\)", re.IGNORECASE | re.DOTALL)
+_ALIASED_ITEM = re.compile(r"(?P<expression>.+?)\s+AS\s+`?(?P<name>\w+)`?", re.IGNORECASE | re.DOTALL)
+_ORDER_TERM = re.compile(r"(?P<expression>.+?)(?:\s+(?P<direction>ASC|DESC))?", re.IGNORECASE | re.DOTALL)
+_COMMA = re.compile(r"\s*,\s*")
+_OR = re.compile(r"\s+OR\s+", re.IGNORECASE)
+_AND = re.compile(r"\s+AND\s+", re.IGNORECASE)
+
+_STATES = {
+    "NULL": lambda value: value is None,
+    "MISSING": lambda value: value is MISSING,
+    "VALUED": lambda value: value is not None and value is not MISSING,
+}
+
+
+def _syntax_error(message: str) -> ParsingFailedException:
+    return ParsingFailedException(message=f"{message} (FakeCouchbase runs SELECT [RAW] ... FROM keyspace [AS alias] "
+                                          f"[USE KEYS ...] [WHERE ...] [ORDER BY ...] [LIMIT ...] [OFFSET ...] only)")
+
+
+def _split(text: str, separator: re.Pattern) -> List[str]:
+    """Split `text` on the separators outside brackets, parentheses and quotes."""
+    parts, depth, quote, start, i = [], 0, None, 0, 0
+    while i < len(text):
+        char = text[i]
+        if quote:
+            quote = None if char == quote else quote
+        elif char in "`'\"":
+            quote = char
+        elif char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif depth == 0:
+            match = separator.match(text, i)
+            if match and match.end() > i:
+                parts.append(text[start:i].strip())
+                start = i = match.end()
+                continue
+        i += 1
+    parts.append(text[start:].strip())
+    return parts
+
+
+def _enclosed(text: str) -> bool:
+    """Whether `text` is one parenthesized group, e.g. `(a OR b)` but not `(a) OR (b)`."""
+    if not text.startswith("("):
+        return False
+    depth, quote = 0, None
+    for i, char in enumerate(text):
+        if quote:
+            quote = None if char == quote else quote
+        elif char in "`'\"":
+            quote = char
+        elif char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+            if depth == 0:
+                return i == len(text) - 1
+    return False
+
+
+def _expression(text: str) -> str:
+    """Check that `text` is a field path, `META(alias).id`, `IFMISSING(..., NULL)` or `[...]` of those."""
+    text = text.strip()
+    if_missing = _IF_MISSING.fullmatch(text)
+    if if_missing:
+        _expression(if_missing["expression"])
+    elif text.startswith("[") and text.endswith("]"):
+        for item in _split(text[1:-1], _COMMA):
+            _expression(item)
+    elif not (_META_ID.fullmatch(text) or _FIELD_PATH.fullmatch(text)):
+        raise _syntax_error(f"Unsupported expression {text!r}")
+    return text
+
+
+def _literal(text: str, params: Dict[str, Any]) -> Any:
+    """A `$parameter`, or a JSON literal (strings may also use single quotes)."""
+    text = text.strip()
+    if text.startswith("$"):
+        if text[1:] not in params:
+            raise _syntax_error(f"No value for parameter {text}")
+        return params[text[1:]]
+    if len(text) > 1 and text.startswith("'") and text.endswith("'"):
+        return text[1:-1].replace("''", "'")
+    try:
+        return json.loads(text.lower() if text.upper() in ("TRUE", "FALSE", "NULL") else text)
+    except ValueError:
+        raise _syntax_error(f"Unsupported value {text!r}") from None
+
+
+def _compare(op: str, left: Any, right: Any) -> bool:
+    """Comparisons with NULL or MISSING, or between different types, are never true."""
+    if left is None or left is MISSING or right is None:
+        return False
+    numbers = (int, float)
+    if not (isinstance(left, numbers) and isinstance(right, numbers)) and type(left) is not type(right):
+        return False
+    if op in ("=", "=="):
+        return left == right
+    if op in ("!=", "<>"):
+        return left != right
+    return {"<": left < right, "<=": left <= right, ">": left > right, ">=": left >= right}[op]
+
+
+def _collation(value: Any) -> tuple:
+    """Sort key in N1QL order: MISSING, NULL, booleans, numbers, strings, arrays, objects."""
+    if value is MISSING:
+        return (0,)
+    if value is None:
+        return (1,)
+    if isinstance(value, bool):
+        return (2, value)
+    if isinstance(value, (int, float)):
+        return (3, value)
+    if isinstance(value, str):
+        return (4, value)
+    if isinstance(value, list):
+        return (5, [_collation(item) for item in value])
+    return (6, json.dumps(value, sort_keys=True))
+
+
+class _Query:
+    """A parsed SELECT of the supported subset, evaluated one document at a time."""
+
+    def __init__(self, statement: str, params: Dict[str, Any]):
+        match = _SELECT.fullmatch(statement.strip())
+        if match is None:
+            raise _syntax_error(f"Unsupported statement {statement!r}")
+        parts = _parse_path(match["keyspace"])
+        if len(parts) not in (1, 3):
+            raise _syntax_error(f"Unsupported keyspace {match['keyspace']!r}")
+        self.collection = tuple(parts) if len(parts) == 3 else (parts[0], "_default", "_default")
+        self.alias = match["alias"] or str(parts[-1])
+        self.raw = match["raw"] is not None
+        self.items = [self._item(item) for item in _split(match["projection"], _COMMA)]
+        if self.raw and (len(self.items) != 1 or self.items[0][0].endswith("*")):
+            raise _syntax_error("SELECT RAW takes one expression")
+        self.keys = _literal(match["keys"], params) if match["keys"] else None
+        self.where = self._condition(match["where"], params) if match["where"] else None
+        self.order = [self._order_term(term) for term in _split(match["order"], _COMMA)] if match["order"] else []
+        self.limit = _literal(match["limit"], params) if match["limit"] else None
+        self.offset = _literal(match["offset"], params) if match["offset"] else 0
+
+    def _item(self, item: str) -> Tuple[str, Optional[str]]:
+        aliased = _ALIASED_ITEM.fullmatch(item)
+        expression, name = (aliased["expression"], aliased["name"]) if aliased else (item, None)
+        if expression == "*" or expression.endswith(".*"):
+            return (expression if expression == "*" else _expression(expression[:-2]) + ".*"), None
+        return _expression(expression), name
+
+    def _order_term(self, term: str) -> Tuple[str, bool]:
+        match = _ORDER_TERM.fullmatch(term)
+        return _expression(match["expression"]), (match["direction"] or "").upper() == "DESC"
+
+    def _condition(self, condition: str, params: Dict[str, Any]) -> Callable[[str, Any], bool]:
+        """Comparisons and IS [NOT] NULL/MISSING/VALUED tests, combined with AND, OR and parentheses."""
+        condition = condition.strip()
+        for separator, combine in ((_OR, any), (_AND, all)):
+            parts = _split(condition, separator)
+            if len(parts) > 1:
+                tests = [self._condition(part, params) for part in parts]
+                return lambda key, doc: combine(test(key, doc) for test in tests)
+        if _enclosed(condition):
+            return self._condition(condition[1:-1], params)
+        match = _CONDITION.fullmatch(condition)
+        if match is None:
+            raise _syntax_error(f"Unsupported condition {condition!r}")
+        field = _expression(match["field"])
+        if match["state"]:
+            test, negated = _STATES[match["state"].upper()], bool(match["negated"])
+            return lambda key, doc: test(self._value(field, key, doc)) != negated
+        op, expected = match["op"], _literal(match["value"], params)
+        return lambda key, doc: _compare(op, self._value(field, key, doc), expected)
+
+    def _value(self, expression: str, key: str, doc: Any) -> Any:
+        if _META_ID.fullmatch(expression):
+            return key
+        if_missing = _IF_MISSING.fullmatch(expression)
+        if if_missing:
+            value = self._value(if_missing["expression"], key, doc)
+            return None if value is MISSING else value
+        if expression.startswith("["):
+            return [self._value(item, key, doc) for item in _split(expression[1:-1], _COMMA)]
+        parts = _parse_path(expression)
+        if parts and parts[0] == self.alias:
+            parts = parts[1:]
+        value = doc
+        for part in parts:
+            try:
+                value = _step(value, part, expression)
+            except (PathNotFoundException, PathMismatchException):
+                return MISSING
+        return value
+
+    def matches(self, key: str, doc: Any) -> bool:
+        return self.where is None or self.where(key, doc)
+
+    def sort(self, documents: List[Tuple[str, Any]]) -> None:
+        # Stable sorts from the last term to the first give the multi-key order
+        for expression, descending in reversed(self.order):
+            documents.sort(key=lambda item: _collation(self._value(expression, *item)), reverse=descending)
+
+    def project(self, key: str, doc: Any) -> Any:
+        if self.raw:
+            return self._value(self.items[0][0], key, doc)
+        row: Dict[str, Any] = {}
+        for position, (expression, name) in enumerate(self.items, start=1):
+            if expression == "*":
+                row[self.alias] = doc
+            elif expression.endswith(".*"):
+                value = self._value(expression[:-2], key, doc)
+                row.update(value if isinstance(value, dict) else {})
+            else:
+                value = self._value(expression, key, doc)
+                if value is not MISSING:
+                    row[name or _item_name(expression, position)] = value
+        return row
+
+
+def _item_name(expression: str, position: int) -> str:
+    if _META_ID.fullmatch(expression):
+        return "id"
+    if expression.startswith("[") or _IF_MISSING.fullmatch(expression):
+        return f"${position}"
+    return str(_parse_path(expression)[-1])
+
+
+def _query_params(options: Dict[str, Any]) -> Dict[str, Any]:
+    params = {str(i): value for i, value in enumerate(options.get("positional_parameters") or [], start=1)}
+    for name, value in (options.get("named_parameters") or {}).items():
+        params[name.lstrip("$")] = value
+    return params
+
+
+def run_query(server: FakeCouchbase, statement: str, options: Dict[str, Any]) -> List[Any]:
+    """Evaluate a statement of the supported subset against the fake's documents; returns the rows."""
+    first_word = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    # Index DDL and plans, and the index catalog (system:indexes) the client reads when provisioning
+    if first_word in _IGNORED_STATEMENTS or re.search(r"\bFROM\s+system:", statement, re.IGNORECASE):
+        return []
+    query = _Query(statement, _query_params(options))
+
+    with server._lock:
+        docs = dict(server._collection(*query.collection))
+    if query.keys is None:
+        keys = sorted(docs)
+    else:
+        keys = [query.keys] if isinstance(query.keys, str) else [key for key in query.keys if isinstance(key, str)]
+    matching = []
+    for key in dict.fromkeys(keys):
+        doc = docs.get(key)
+        if doc is not None and doc.is_json():
+            content = doc.json()
+            if query.matches(key, content):
+                matching.append((key, content))
+    query.sort(matching)
+    rows = []
+    for key, content in matching[query.offset:]:
+        if query.limit is not None and len(rows) >= query.limit:
+            break
+        row = query.project(key, content)
+        if not (query.raw and row is MISSING):
+            rows.append(row)
+    return rows
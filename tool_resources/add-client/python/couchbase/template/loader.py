@@ -0,0 +1,102 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class DocumentLoader:
+    """
+    Request-scoped batching loader for Couchbase models (a DataLoader).
+
+    `load(Model, id)` calls made in the same event-loop tick are coalesced
+    into one concurrent multi-get per model (`Model.afetch_many`), and each
+    id is fetched at most once per loader: later loads of the same id return
+    the same item. Create one loader per request and `clear()` it at the end
+    (the `CouchbaseLoader` FastAPI dependency does both):
+
+        author, editor = await asyncio.gather(
+            loader.load(User, post.data.author_id),
+            loader.load(User, post.data.editor_id),
+        )
+
+    Loaded items are shared within the request; call `forget()` after writing
+    a document through the model so the next load sees the change.
+    """
+
+    def __init__(self):
+        # Identity map: one future per (model, id) loaded in this request
+        self._items: Dict[Tuple[type, str], asyncio.Future] = {}
+        # Loads queued for the next dispatch, by model
+        self._queue: Dict[type, List[Tuple[str, asyncio.Future]]] = {}
+        # In-flight fetches (the event loop only keeps weak references to tasks)
+        self._tasks: Set[asyncio.Task] = set()
+        self._batches = 0
+        self._keys_fetched = 0
+
+    async def load(self, model: type[T], id: str) -> Optional[T]:
+        """The item with this id, or None if it does not exist."""
+        future = self._items.get((model, id))
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._items[(model, id)] = future
+            queued = self._queue.setdefault(model, [])
+            if not queued:
+                asyncio.get_running_loop().call_soon(self._dispatch, model)
+            queued.append((id, future))
+        # Shielded: a cancelled caller must not fail the load for others waiting on it
+        return await asyncio.shield(future)
+
+    async def load_many(self, model: type[T], ids: List[str]) -> List[Optional[T]]:
+        """Items for `ids`, in order (None for missing ones), fetched in one batch."""
+        return list(await asyncio.gather(*(self.load(model, id) for id in ids)))
+
+    def prime(self, model: type, item: Any) -> None:
+        """Seed the identity map with an item already at hand (e.g. just created)."""
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(item)
+        self._items[(model, item.id)] = future
+
+    def forget(self, model: type, *ids: str) -> None:
+        """Drop ids from the identity map so their next load refetches them."""
+        for id in ids:
+            self._items.pop((model, id), None)
+
+    def clear(self) -> None:
+        """Drop the identity map (end of request)."""
+        self._items.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Multi-gets issued and ids fetched, for spotting N+1 patterns."""
+        return {"batches": self._batches, "keys_fetched": self._keys_fetched, "items": len(self._items)}
+
+    def _dispatch(self, model: type) -> None:
+        queued = self._queue.pop(model, [])
+        if queued:
+            self._batches += 1
+            self._keys_fetched += len(queued)
+            task = asyncio.ensure_future(self._fetch(model, queued))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, model: type, queued: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            result = await model.afetch_many([id for id, _ in queued])
+        except Exception as e:
+            for id, future in queued:
+                self._fail(model, id, future, e)
+            return
+        for (id, future), item in zip(queued, result.items):
+            if id in result.errors:
+                self._fail(model, id, future, result.errors[id])
+            elif not future.done():
+                future.set_result(item)
+
+    def _fail(self, model: type, id: str, future: asyncio.Future, error: Exception) -> None:
+        # Failures are not remembered: a later load retries
+        if self._items.get((model, id)) is future:
+            del self._items[(model, id)]
+        if not future.done():
+            future.set_exception(error)
+            # Mark it retrieved: waiters still get the error, but a load nobody awaits any more
+            # (its caller was cancelled) must not log "Future exception was never retrieved"
+            future.exception()
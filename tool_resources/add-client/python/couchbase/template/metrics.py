@@ -0,0 +1,166 @@
+"""
+Operation metrics for the Couchbase client.
+
+Every Keyspace operation (KV gets and mutations, multi-document helpers and
+N1QL queries) is timed and reported to the registered sinks as
+`record(operation, collection, seconds, error)`. Keys that fail inside a
+multi-document operation that itself completed are reported separately, as
+`record_key_errors(operation, collection, errors)`. The default sink,
+`get_metrics()`, keeps latency histograms and error counters per operation
+and collection, and renders them in the Prometheus text format for a
+/metrics endpoint. Register other sinks (StatsD, OpenTelemetry, ...) with
+`add_sink`.
+
+Operations slower than the client's `slow_operation_threshold` (see
+CouchbaseConf) are also logged with their statement or key.
+"""
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class MetricsSink(ABC):
+    """Receives one call per Couchbase operation; subclass it to export metrics elsewhere."""
+
+    @abstractmethod
+    def record(self, operation: str, collection: str, seconds: float, error: Optional[str] = None) -> None:
+        ...
+
+    def record_key_errors(self, operation: str, collection: str, errors: Dict[str, int]) -> None:
+        """Failed keys of a multi-document operation, counted by error type (not timed: `record` was)."""
+
+
+class LatencyHistograms(MetricsSink):
+    """In-process latency histograms and error counters, by (operation, collection)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, collection: str, seconds: float, error: Optional[str] = None) -> None:
+        with self._lock:
+            series = self._series.get((operation, collection))
+            if series is None:
+                series = {"counts": [0] * (len(self.buckets) + 1), "count": 0, "sum": 0.0, "errors": {}}
+                self._series[(operation, collection)] = series
+            series["counts"][self._bucket(seconds)] += 1
+            series["count"] += 1
+            series["sum"] += seconds
+            if error is not None:
+                series["errors"][error] = series["errors"].get(error, 0) + 1
+
+    def record_key_errors(self, operation: str, collection: str, errors: Dict[str, int]) -> None:
+        with self._lock:
+            series = self._series.get((operation, collection))
+            if series is None:
+                return
+            for error, count in errors.items():
+                series["errors"][error] = series["errors"].get(error, 0) + count
+
+    def _bucket(self, seconds: float) -> int:
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                return i
+        return len(self.buckets)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """One entry per (operation, collection): count, mean and approximate p50/p95/p99 (ms), errors."""
+        with self._lock:
+            series = {key: {**value, "counts": list(value["counts"]), "errors": dict(value["errors"])}
+                      for key, value in self._series.items()}
+        return [
+            {
+                "operation": operation,
+                "collection": collection,
+                "count": value["count"],
+                "mean_ms": round(value["sum"] / value["count"] * 1000, 3),
+                "p50_ms": self._quantile(value["counts"], value["count"], 0.50),
+                "p95_ms": self._quantile(value["counts"], value["count"], 0.95),
+                "p99_ms": self._quantile(value["counts"], value["count"], 0.99),
+                "errors": value["errors"],
+            }
+            for (operation, collection), value in sorted(series.items())
+        ]
+
+    def _quantile(self, counts: List[int], total: int, q: float) -> Optional[float]:
+        # Upper bound of the bucket holding the quantile (None: above the last bound)
+        seen = 0
+        for i, count in enumerate(counts):
+            seen += count
+            if seen >= q * total:
+                return self.buckets[i] * 1000 if i < len(self.buckets) else None
+        return None
+
+    def prometheus(self, prefix: str = "couchbase_operation") -> str:
+        """The histograms and error counters in the Prometheus text exposition format."""
+        with self._lock:
+            series = sorted(self._series.items())
+            lines = [f"# TYPE {prefix}_seconds histogram"]
+            for (operation, collection), value in series:
+                labels = f'operation="{_escape(operation)}",collection="{_escape(collection)}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets, value["counts"]):
+                    cumulative += count
+                    lines.append(f'{prefix}_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{prefix}_seconds_bucket{{{labels},le="+Inf"}} {value["count"]}')
+                lines.append(f"{prefix}_seconds_sum{{{labels}}} {value['sum']}")
+                lines.append(f"{prefix}_seconds_count{{{labels}}} {value['count']}")
+            lines.append(f"# TYPE {prefix}_errors_total counter")
+            for (operation, collection), value in series:
+                for error, count in sorted(value["errors"].items()):
+                    lines.append(f'{prefix}_errors_total{{operation="{_escape(operation)}",'
+                                 f'collection="{_escape(collection)}",error="{_escape(error)}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+def _escape(value: str) -> str:
+    """Escape a Prometheus label value (backslash, double quote and newline)."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_default = LatencyHistograms()
+_sinks: List[MetricsSink] = [_default]
+
+
+def get_metrics() -> LatencyHistograms:
+    """The built-in histograms sink."""
+    return _default
+
+
+def add_sink(sink: MetricsSink) -> None:
+    """Also report every operation to `sink`."""
+    _sinks.append(sink)
+
+
+def remove_sink(sink: MetricsSink) -> None:
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+
+def record(operation: str, collection: str, seconds: float, error: Optional[str] = None) -> None:
+    """Report an operation to every sink; a failing sink is logged and skipped."""
+    for sink in _sinks:
+        try:
+            sink.record(operation, collection, seconds, error)
+        except Exception as e:
+            logger.warning(f"Metrics sink {type(sink).__name__} failed: {e}")
+
+
+def record_key_errors(operation: str, collection: str, errors: Dict[str, int]) -> None:
+    """Report the failed keys of a multi-document operation to every sink."""
+    for sink in _sinks:
+        try:
+            sink.record_key_errors(operation, collection, errors)
+        except Exception as e:
+            logger.warning(f"Metrics sink {type(sink).__name__} failed: {e}")
@@ -0,0 +1,53 @@
+"""
+Check helpers shared by the client's test scripts (test/python/couchbase-*).
+Not part of the client's API: like the fake, tests import it themselves.
+
+    from clients.couchbase.testing import check, finish, raises
+
+    check("create then get", Model.get(item.id) == item)
+    raises("stale CAS", CasMismatchException, lambda: keyspace.replace(id, doc, cas=stale))
+    finish()
+
+Each check prints one `ok`/`FAIL` line and the script keeps going, so one
+run reports every failure; `finish()` exits non-zero if any check failed.
+"""
+import sys
+from typing import Awaitable, Callable, List
+
+failures: List[str] = []
+
+
+def check(name: str, condition: bool) -> None:
+    print(f"{'ok  ' if condition else 'FAIL'} {name}")
+    if not condition:
+        failures.append(name)
+
+
+def raises(name: str, error: type, call: Callable[[], object]) -> None:
+    """Check that `call()` raises `error`."""
+    try:
+        call()
+    except error:
+        check(name, True)
+        return
+    except Exception as e:
+        print(f"     unexpected {type(e).__name__}: {e}")
+    check(name, False)
+
+
+async def araises(name: str, error: type, call: Callable[[], Awaitable[object]]) -> None:
+    """Check that awaiting `call()` raises `error`."""
+    try:
+        await call()
+    except error:
+        check(name, True)
+        return
+    except Exception as e:
+        print(f"     unexpected {type(e).__name__}: {e}")
+    check(name, False)
+
+
+def finish() -> None:
+    """Exit with the failed checks listed, if there are any."""
+    if failures:
+        sys.exit(f"{len(failures)} check(s) failed: {', '.join(failures)}")
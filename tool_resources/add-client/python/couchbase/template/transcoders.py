@@ -0,0 +1,141 @@
+"""
+Fast transcoders for Couchbase documents.
+
+The SDK's default transcoder goes through the stdlib `json` module, and the
+models hand it a `model_dump()` dict. These transcoders encode pydantic models
+straight to bytes and decode with orjson/msgspec, with optional msgpack and
+zstd formats for KV-only collections:
+
+    FastJsonTranscoder()                          # JSON, safe everywhere
+    MsgpackTranscoder()                           # binary, KV access only
+    ZstdTranscoder(FastJsonTranscoder(), 4096)    # compress large values, KV access only
+
+JSON documents stay readable by N1QL, indexes and sub-document operations.
+Binary (msgpack or compressed) documents are opaque to the server: use them
+only for collections accessed by key (get/create/update/delete and `*_many`).
+
+Optional dependencies: orjson or msgspec, msgpack, zstandard.
+
+The couchbase-transcoders run-tests script checks round trips and compares
+throughput with the SDK default.
+"""
+from typing import Any, Callable, Optional, Tuple
+
+from couchbase.serializer import Serializer
+from couchbase.transcoder import FMT_BYTES, FMT_COMMON_MASK, FMT_JSON, JSONTranscoder, Transcoder, ValueFormatException
+from pydantic import BaseModel
+
+# Private markers in the low flag bits (outside the SDK's legacy format mask)
+_FLAG_MSGPACK = 0x10
+_FLAG_ZSTD = 0x20
+
+
+def _require(module: str, extra: str):
+    try:
+        return __import__(module, fromlist=["_"])
+    except ImportError as e:
+        raise ImportError(f"{extra} requires the '{module.split('.')[0]}' package (pip install {extra.lower()})") from e
+
+
+def _is_json_flags(flags: Optional[int]) -> bool:
+    return not flags or (flags & FMT_COMMON_MASK) == FMT_JSON
+
+
+class FastJsonSerializer(Serializer):
+    """JSON serializer for query rows and values, backed by orjson or msgspec."""
+
+    def __init__(self, backend: str = "orjson"):
+        if backend == "orjson":
+            orjson = _require("orjson", "orjson")
+            self._dumps: Callable[[Any], bytes] = orjson.dumps
+            self._loads: Callable[[bytes], Any] = orjson.loads
+        elif backend == "msgspec":
+            msgspec_json = _require("msgspec.json", "msgspec")
+            self._dumps = msgspec_json.encode
+            self._loads = msgspec_json.decode
+        else:
+            raise ValueError(f"Unknown JSON backend: {backend!r} (expected 'orjson' or 'msgspec')")
+        self.backend = backend
+
+    def serialize(self, value: Any) -> bytes:
+        if isinstance(value, BaseModel):
+            return value.__pydantic_serializer__.to_json(value)
+        return self._dumps(value)
+
+    def deserialize(self, value: bytes) -> Any:
+        return self._loads(value)
+
+
+class FastJsonTranscoder(Transcoder):
+    """
+    JSON documents encoded with orjson/msgspec, compatible with the SDK default
+    (same flags, readable by either). Pydantic models are serialized directly.
+    """
+
+    encodes_models = True
+
+    def __init__(self, backend: str = "orjson"):
+        self.serializer = FastJsonSerializer(backend)
+
+    def encode_value(self, value: Any) -> Tuple[bytes, int]:
+        if isinstance(value, (bytes, bytearray)):
+            raise ValueFormatException("FastJsonTranscoder does not support binary data")
+        return self.serializer.serialize(value), FMT_JSON
+
+    def decode_value(self, value: bytes, flags: int) -> Any:
+        if not _is_json_flags(flags):
+            raise ValueFormatException(f"FastJsonTranscoder cannot decode flags {flags:#x}")
+        return self.serializer.deserialize(value)
+
+
+class MsgpackTranscoder(Transcoder):
+    """
+    Compact binary documents in msgpack. Not readable by N1QL, indexes or
+    sub-document operations; JSON documents written earlier are still decoded.
+    """
+
+    encodes_models = True
+
+    def __init__(self):
+        self._msgpack = _require("msgpack", "msgpack")
+        self._json = JSONTranscoder()
+
+    def encode_value(self, value: Any) -> Tuple[bytes, int]:
+        if isinstance(value, BaseModel):
+            value = value.model_dump(mode="json")
+        return self._msgpack.packb(value, use_bin_type=True), FMT_BYTES | _FLAG_MSGPACK
+
+    def decode_value(self, value: bytes, flags: int) -> Any:
+        if flags & _FLAG_MSGPACK:
+            return self._msgpack.unpackb(value, raw=False)
+        return self._json.decode_value(value, flags)
+
+
+class ZstdTranscoder(Transcoder):
+    """
+    Wraps another transcoder and zstd-compresses encoded values of at least
+    `threshold` bytes. Compressed documents are binary to the server (KV access
+    only); smaller values are stored exactly as the inner transcoder encodes them.
+    """
+
+    def __init__(self, inner: Optional[Transcoder] = None, threshold: int = 4096, level: int = 3):
+        zstandard = _require("zstandard", "zstandard")
+        self.inner = inner or FastJsonTranscoder()
+        self.threshold = threshold
+        self.encodes_models = getattr(self.inner, "encodes_models", False)
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def encode_value(self, value: Any) -> Tuple[bytes, int]:
+        data, flags = self.inner.encode_value(value)
+        if len(data) < self.threshold:
+            return data, flags
+        # Keep the inner format marker so the payload can be decoded after decompression
+        return self._compressor.compress(data), FMT_BYTES | _FLAG_ZSTD | (flags & _FLAG_MSGPACK)
+
+    def decode_value(self, value: bytes, flags: int) -> Any:
+        if flags & _FLAG_ZSTD:
+            value = self._decompressor.decompress(value)
+            flags = FMT_BYTES | _FLAG_MSGPACK if flags & _FLAG_MSGPACK else FMT_JSON
+        return self.inner.decode_value(value, flags)
+
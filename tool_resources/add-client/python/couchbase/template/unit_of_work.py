@@ -0,0 +1,185 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from couchbase.durability import DurabilityLevel, ServerDurability
+from couchbase.options import TransactionOptions
+
+from .couchbase import BaseModelCouchbase, BulkResult, MultiOperationError, get_client
+
+
+class UnitOfWork:
+    """
+    Collects model writes and flushes them together, concurrently.
+
+        async with unit_of_work() as session:
+            session.add(Order(id=order_id, data=order))
+            session.mark_dirty(customer)
+            session.delete(Cart, cart_id)
+        # all three written here, in one round of concurrent KV operations
+
+    Writes are grouped by model and operation and sent through the bulk
+    helpers (`ainsert_many`, `areplace_many`, `aremove_many`), so a flush
+    costs about one round trip however many documents it writes. Failed keys
+    do not stop the others; `flush()` raises MultiOperationError listing them.
+
+    With `transactional=True` the flush runs as one Couchbase transaction:
+    either every write is applied or none is. Transactions require JSON
+    documents and models served by the same cluster, and cost extra round
+    trips for the transaction's bookkeeping.
+    """
+
+    def __init__(self, transactional: bool = False, durability: Optional[DurabilityLevel] = None):
+        self.transactional = transactional
+        self.durability = durability
+        # Pending writes by model, keyed by document id; an id is pending in at
+        # most one of them, so that a flush never races two writes to one document
+        self._inserts: Dict[type, Dict[str, BaseModelCouchbase]] = {}
+        self._replaces: Dict[type, Dict[str, BaseModelCouchbase]] = {}
+        self._removes: Dict[type, Dict[str, None]] = {}
+
+    def add(self, item: BaseModelCouchbase) -> None:
+        """
+        Insert a new document (fails at flush if the id already exists).
+        After `delete` or `mark_dirty` of the same id, the document exists
+        and is replaced instead.
+        """
+        model = type(item)
+        removes = self._removes.get(model, {})
+        if item.id in removes or item.id in self._replaces.get(model, {}):
+            removes.pop(item.id, None)
+            self._replaces.setdefault(model, {})[item.id] = item
+            return
+        self._inserts.setdefault(model, {})[item.id] = item
+
+    def mark_dirty(self, item: BaseModelCouchbase) -> None:
+        """Replace an existing document with the item's current data (cancels a pending `delete`)."""
+        model = type(item)
+        pending_insert = self._inserts.get(model, {})
+        if item.id in pending_insert:
+            pending_insert[item.id] = item
+            return
+        self._removes.get(model, {}).pop(item.id, None)
+        self._replaces.setdefault(model, {})[item.id] = item
+
+    def delete(self, model: Union[type[BaseModelCouchbase], BaseModelCouchbase], id: Optional[str] = None) -> None:
+        """Remove a document, given its model and id or a loaded item."""
+        if isinstance(model, BaseModelCouchbase):
+            model, id = type(model), model.id
+        if id is None:
+            raise ValueError("delete() needs an id when given a model class")
+        self._replaces.get(model, {}).pop(id, None)
+        if self._inserts.get(model, {}).pop(id, None) is None:
+            self._removes.setdefault(model, {})[id] = None
+
+    @property
+    def pending(self) -> int:
+        """Number of writes waiting for `flush()`."""
+        return sum(len(group) for pending in (self._inserts, self._replaces, self._removes)
+                   for group in pending.values())
+
+    def discard(self) -> None:
+        """Drop pending writes without applying them."""
+        self._inserts.clear()
+        self._replaces.clear()
+        self._removes.clear()
+
+    async def flush(self) -> BulkResult:
+        """
+        Apply pending writes. Returns a BulkResult whose `items` are the
+        written instances and deleted ids, with CAS values by id (except in
+        transactional mode).
+        """
+        inserts, replaces, removes = self._inserts, self._replaces, self._removes
+        self._inserts, self._replaces, self._removes = {}, {}, {}
+        if not any((inserts, replaces, removes)):
+            return BulkResult()
+        try:
+            if self.transactional:
+                return await self._flush_transaction(inserts, replaces, removes)
+            return await self._flush_bulk(inserts, replaces, removes)
+        finally:
+            for pending in (inserts, replaces, removes):
+                for model, group in pending.items():
+                    model._invalidate_cached(list(group))
+
+    async def _flush_bulk(self, inserts, replaces, removes) -> BulkResult:
+        async def write(model: type[BaseModelCouchbase], op: str, group: Dict[str, Any]) -> Tuple[Dict[str, Any], BulkResult]:
+            keyspace = await model.aget_keyspace()
+            options: Dict[str, Any] = {"batch_size": model._bulk_batch_size, "durability": self.durability}
+            if op == "remove":
+                return group, await keyspace.aremove_many(list(group), **options)
+            docs = {id: model._encode(item.data) for id, item in group.items()}
+            run = keyspace.ainsert_many if op == "insert" else keyspace.areplace_many
+            return group, await run(docs, transcoder=model._transcoder, **options)
+
+        groups = [(model, op, group)
+                  for op, pending in (("insert", inserts), ("replace", replaces), ("remove", removes))
+                  for model, group in pending.items()]
+        outcomes = await asyncio.gather(*(write(*group) for group in groups))
+
+        result = BulkResult()
+        for group, outcome in outcomes:
+            result.items.extend(group[id] if group[id] is not None else id for id in outcome.items)
+            result.cas.update(outcome.cas)
+            result.errors.update(outcome.errors)
+        if result.errors:
+            raise MultiOperationError(f"{len(result.errors)} of {len(result.errors) + len(result.cas)} writes failed", result)
+        return result
+
+    async def _flush_transaction(self, inserts, replaces, removes) -> BulkResult:
+        models = {model for pending in (inserts, replaces, removes) for model in pending}
+        clients = {get_client(model._service_instance) for model in models}
+        if len(clients) > 1:
+            raise ValueError("A transactional unit of work can only write models served by one cluster")
+        cluster = await clients.pop().get_async_cluster()
+        # Resolve handles up front: the transaction logic may run several times
+        collections = {model: await (await model.aget_keyspace()).aget_collection() for model in models}
+
+        async def insert(ctx, model, item):
+            await ctx.insert(collections[model], item.id, item.data.model_dump(mode="json"))
+
+        async def replace(ctx, model, item):
+            doc = await ctx.get(collections[model], item.id)
+            await ctx.replace(doc, item.data.model_dump(mode="json"))
+
+        async def remove(ctx, model, id):
+            doc = await ctx.get(collections[model], id)
+            await ctx.remove(doc)
+
+        async def logic(ctx):
+            # One operation at a time, in a fixed order, so every attempt runs the same sequence
+            for model, group in inserts.items():
+                for item in group.values():
+                    await insert(ctx, model, item)
+            for model, group in replaces.items():
+                for item in group.values():
+                    await replace(ctx, model, item)
+            for model, group in removes.items():
+                for id in group:
+                    await remove(ctx, model, id)
+
+        options = TransactionOptions(durability=ServerDurability(self.durability)) if self.durability else None
+        await cluster.transactions.run(logic, options)
+        items: List[Any] = [item for pending in (inserts, replaces) for group in pending.values() for item in group.values()]
+        items.extend(id for group in removes.values() for id in group)
+        return BulkResult(items=items)
+
+
+@asynccontextmanager
+async def unit_of_work(transactional: bool = False,
+                       durability: Optional[DurabilityLevel] = None) -> AsyncIterator[UnitOfWork]:
+    """
+    Unit of work flushed on successful exit; pending writes are discarded if
+    the block raises.
+
+        async with unit_of_work(transactional=True) as session:
+            session.add(item)
+    """
+    session = UnitOfWork(transactional=transactional, durability=durability)
+    try:
+        yield session
+    except BaseException:
+        session.discard()
+        raise
+    await session.flush()
@@ -0,0 +1,307 @@
+"""
+Run Couchbase models against the in-memory FakeCouchbase: CRUD with CAS,
+partial updates, batch reads and bulk writes, simple queries, keyset
+pagination, the read-through cache, the asyncio API, units of work and the
+DocumentLoader, plus the round trips each of them costs.
+
+Run with: run-tests(language: "python", test: "couchbase-fake-models")
+No cluster is needed.
+"""
+import asyncio
+import time
+from typing import Optional
+
+from couchbase.exceptions import (
+    CasMismatchException,
+    DocumentExistsException,
+    DocumentNotFoundException,
+    ParsingFailedException,
+)
+from pydantic import BaseModel
+
+from clients.couchbase import (
+    BaseModelCouchbase,
+    DocumentCache,
+    DocumentLoader,
+    InvalidCursorError,
+    MultiOperationError,
+    get_metrics,
+    UnitOfWork,
+    unit_of_work,
+)
+from clients.couchbase.fake import FakeCouchbase
+from clients.couchbase.testing import araises, check, finish, raises
+
+SERVICE = "couchbase-server"
+
+
+class Task(BaseModel):
+    title: str
+    status: str = "open"
+    priority: int = 0
+    owner: Optional[str] = None
+
+
+class TaskModel(BaseModelCouchbase[Task]):
+    _collection_name = "fake_tasks"
+
+
+class OwnedTaskModel(BaseModelCouchbase[Task]):
+    _collection_name = "fake_owned_tasks"
+    _sort_field = "owner"
+
+
+class CachedTaskModel(BaseModelCouchbase[Task]):
+    _collection_name = "fake_cached_tasks"
+    _cache = DocumentCache(max_size=100, ttl=0.2)
+
+
+def test_crud(server: FakeCouchbase) -> None:
+    task = TaskModel.create(Task(title="write report", priority=3))
+    check("create then get", TaskModel.get(task.id).data == task.data)
+    check("equal after a round trip", TaskModel.get(task.id) == task)
+    replica = TaskModel.get(task.id)
+    replica._from_replica = True  # as set by a hedged aget served by a replica
+    check("replica reads equal active reads", replica.from_replica and replica == TaskModel.get(task.id))
+    check("stored as JSON", server.documents("main", "_default", "fake_tasks")[task.id]["title"] == "write report")
+
+    task.data.title = "write the report"
+    TaskModel.update(task)
+    check("update", TaskModel.get(task.id).data.title == "write the report")
+
+    check("patch", TaskModel.patch(task.id, status="done") and TaskModel.get(task.id).data.status == "done")
+    check("patch of a missing document", TaskModel.patch("missing", status="done") is False)
+    loaded = TaskModel.get(task.id)
+    loaded.data.priority = 5
+    TaskModel.update_fields(loaded)
+    check("update_fields", TaskModel.get(task.id).data.priority == 5)
+
+    check("delete", TaskModel.delete(task.id) and TaskModel.get(task.id) is None)
+    check("delete of a missing document", TaskModel.delete(task.id) is False)
+
+
+def test_cas() -> None:
+    keyspace = TaskModel.get_keyspace()
+    cas = keyspace.insert({"title": "cas"}, key="cas-1").cas
+    newer = keyspace.replace("cas-1", {"title": "first writer"}, cas=cas).cas
+    check("replace with the current CAS", newer != cas)
+    raises("replace with a stale CAS", CasMismatchException,
+           lambda: keyspace.replace("cas-1", {"title": "second writer"}, cas=cas))
+    raises("insert of an existing id", DocumentExistsException, lambda: keyspace.insert({"title": "again"}, key="cas-1"))
+    keyspace.remove("cas-1")
+
+
+def test_batches(server: FakeCouchbase) -> None:
+    tasks = [TaskModel.create(Task(title=f"task {i}", priority=i)) for i in range(10)]
+    ids = [task.id for task in tasks]
+    server.reset(data=False)
+    items = TaskModel.get_many(ids + ["missing"])
+    check("get_many skips missing ids", sorted(item.id for item in items) == sorted(ids))
+    check("get_many is one multi-get", server.stats() == {"get_multi": 1})
+    items = TaskModel.get_many([ids[3], "missing", ids[0], ids[3]], include_missing=True)
+    check("get_many keeps input order and duplicates",
+          [item and item.id for item in items] == [ids[3], None, ids[0], ids[3]])
+    check("fetch_many reports missing ids", TaskModel.fetch_many([ids[0], "missing"]).missing == ["missing"])
+    TaskModel.delete_many(ids)
+    check("delete_many", TaskModel.get_many(ids) == [])
+
+
+def test_bulk_writes(server: FakeCouchbase) -> None:
+    server.reset(data=False)
+    created = TaskModel.create_many([Task(title=f"bulk {i}", priority=i) for i in range(10)], batch_size=4)
+    check("create_many", created.ok and [task.data.priority for task in created.items] == list(range(10)))
+    check("create_many sends batch_size documents per multi-op", server.stats() == {"insert_multi": 3})
+    ids = [task.id for task in created.items]
+    check("create_many returns the CAS of every document", sorted(created.cas) == sorted(ids))
+
+    for task in created.items:
+        task.data.status = "done"
+    ghost = TaskModel(id="ghost", data=Task(title="never stored"))
+    updated = TaskModel.update_many(created.items + [ghost])
+    check("update_many reports the failed ids", list(updated.errors) == ["ghost"]
+          and isinstance(updated.errors["ghost"], DocumentNotFoundException))
+    check("update_many still writes the others", len(updated.items) == 10
+          and all(task.data.status == "done" for task in TaskModel.get_many(ids)))
+
+    # Keys failing inside a multi-op count as errors of that operation; missing documents do not
+    errors = {entry["operation"]: entry["errors"] for entry in get_metrics().snapshot()
+              if entry["collection"].endswith(".fake_tasks")}
+    check("a missing document is not an error", errors.get("replace_many") == {})
+    TaskModel.get_keyspace().insert_many({ids[0]: {"title": "duplicate"}, "bulk-new": {"title": "new"}})
+    errors = {entry["operation"]: entry["errors"] for entry in get_metrics().snapshot()
+              if entry["collection"].endswith(".fake_tasks")}
+    check("failed keys count as errors", errors.get("insert_many") == {"DocumentExistsException": 1})
+    ids.append("bulk-new")
+
+    deleted = TaskModel.delete_many(ids + ["ghost"])
+    check("delete_many", deleted.items == ids and list(deleted.errors) == ["ghost"] and TaskModel.get_many(ids) == [])
+
+
+def test_queries(server: FakeCouchbase) -> None:
+    for i in range(6):
+        TaskModel.create(Task(title=f"task {i}", priority=i, status="open" if i % 2 else "closed",
+                              owner="ada" if i < 2 else None))
+    open_tasks = TaskModel.find({"status": "open"})
+    check("find by equality", sorted(task.data.priority for task in open_tasks) == [1, 3, 5])
+    check("find by range", sorted(task.data.priority for task in TaskModel.find({"priority__gte": 4})) == [4, 5])
+    check("find without an owner", len(TaskModel.find({"owner": None})) == 4)
+    check("find with limit", len(TaskModel.find({"status": "closed"}, limit=2)) == 2)
+    check("list", len(TaskModel.list()) == 6 and len(TaskModel.list(limit=4)) == 4)
+
+    keyspace = TaskModel.get_keyspace()
+    ids = [task.id for task in open_tasks]
+    rows = keyspace.query(f"SELECT RAW d.priority FROM {keyspace} AS d USE KEYS $1 WHERE d.priority > 1",
+                          ids + ["missing"])
+    check("USE KEYS with WHERE", sorted(rows) == [3, 5])
+    raises("statements outside the subset", ParsingFailedException,
+           lambda: keyspace.query(f"SELECT COUNT(*) FROM {keyspace} GROUP BY status"))
+
+
+def test_pages() -> None:
+    owners = ["bo", "ada", None, "ada", "cy", "bo", None]
+    tasks = [OwnedTaskModel.create(Task(title=f"task {i}", owner=owner)) for i, owner in enumerate(owners)]
+    OwnedTaskModel.get_keyspace().insert({"title": "no owner field"}, key="no-owner")
+    # Missing and null owners sort first, then by owner; ties go by id
+    expected = sorted([(task.data.owner, task.id) for task in tasks] + [(None, "no-owner")],
+                      key=lambda item: (item[0] is not None, item[0] or "", item[1]))
+
+    pages, cursor = [], None
+    while True:
+        page = OwnedTaskModel.list_page(limit=2, cursor=cursor)
+        pages.append(page)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    seen = [(item.data.owner, item.id) for page in pages for item in page.items]
+    check("cursor round trips cover every document once, in order", seen == expected)
+    check("ties on the sort key are split by id", [id for owner, id in seen if owner == "ada"]
+          == sorted(task.id for task in tasks if task.data.owner == "ada"))
+    check("the last page has no cursor", len(pages) == 4 and len(pages[-1].items) == 2)
+    check("a page past a partial last page", OwnedTaskModel.list_page(limit=5, cursor=pages[1].next_cursor).next_cursor
+          is None)
+    check("id order without a sort field", [task.id for task in TaskModel.iter_all(page_size=3)]
+          == sorted(task.id for task in TaskModel.list()))
+    raises("a malformed cursor", InvalidCursorError, lambda: OwnedTaskModel.list_page(cursor="not-a-cursor"))
+    check("ORDER BY in find", [task.data.owner for task in OwnedTaskModel.find({"owner__ne": None}, order_by="-owner")]
+          == ["cy", "bo", "bo", "ada", "ada"])
+
+
+def test_cache(server: FakeCouchbase) -> None:
+    task = CachedTaskModel.create(Task(title="cached"))
+    CachedTaskModel.get(task.id)
+    server.reset(data=False)
+    check("cache hit", CachedTaskModel.get(task.id).data.title == "cached" and server.stats() == {})
+
+    # Writes that bypass the model are seen once the entry expires
+    keyspace = CachedTaskModel.get_keyspace()
+    keyspace.replace(task.id, {"title": "written elsewhere", "status": "open", "priority": 0, "owner": None})
+    check("stale until the TTL", CachedTaskModel.get(task.id).data.title == "cached")
+    time.sleep(CachedTaskModel._cache.ttl + 0.05)
+    check("fresh after the TTL", CachedTaskModel.get(task.id).data.title == "written elsewhere")
+
+    # Writes through the model invalidate at once
+    task.data.title = "updated"
+    CachedTaskModel.update(task)
+    check("update invalidates", CachedTaskModel.get(task.id).data.title == "updated")
+    CachedTaskModel.delete(task.id)
+    check("delete invalidates", CachedTaskModel.get(task.id) is None)
+
+
+async def test_async(server: FakeCouchbase) -> None:
+    task = await TaskModel.acreate(Task(title="async"))
+    check("acreate then aget", (await TaskModel.aget(task.id)).data.title == "async")
+    check("apatch", await TaskModel.apatch(task.id, priority=9) and (await TaskModel.aget(task.id)).data.priority == 9)
+    check("afind", [found.id for found in await TaskModel.afind({"priority": 9})] == [task.id])
+
+    # Concurrent reads overlap their round trips
+    ids = [(await TaskModel.acreate(Task(title=f"concurrent {i}"))).id for i in range(20)]
+    server.kv_latency = 0.01
+    started = asyncio.get_running_loop().time()
+    items = await asyncio.gather(*(TaskModel.aget(id) for id in ids))
+    elapsed = asyncio.get_running_loop().time() - started
+    server.kv_latency = 0.0
+    check("concurrent agets", all(item is not None for item in items) and elapsed < 0.1)
+    check("adelete", await TaskModel.adelete(task.id) and await TaskModel.aget(task.id) is None)
+
+
+async def test_unit_of_work(server: FakeCouchbase) -> None:
+    kept, dropped, replaced = [await TaskModel.acreate(Task(title=title)) for title in ("kept", "dropped", "replaced")]
+    server.reset(data=False)
+    server.kv_latency = 0.02
+    started = asyncio.get_running_loop().time()
+    async with unit_of_work() as session:
+        new = TaskModel(id="uow-new", data=Task(title="new"))
+        session.add(new)
+        kept.data.status = "done"
+        session.mark_dirty(kept)
+        session.delete(TaskModel, dropped.id)
+    elapsed = asyncio.get_running_loop().time() - started
+    server.kv_latency = 0.0
+    check("flush writes concurrently", server.stats() == {"insert": 1, "replace": 1, "remove": 1} and elapsed < 0.04)
+    check("flush applies every write", (await TaskModel.aget("uow-new")).data.title == "new"
+          and (await TaskModel.aget(kept.id)).data.status == "done" and await TaskModel.aget(dropped.id) is None)
+
+    # Later writes to an id supersede earlier ones instead of racing them
+    session = UnitOfWork()
+    session.delete(replaced)
+    session.add(TaskModel(id=replaced.id, data=Task(title="re-added")))
+    session.add(TaskModel(id="uow-temp", data=Task(title="temporary")))
+    session.delete(TaskModel, "uow-temp")
+    session.mark_dirty(new)
+    session.delete(new)
+    check("one pending write per id", session.pending == 2)
+    await session.flush()
+    check("delete then add replaces", (await TaskModel.aget(replaced.id)).data.title == "re-added")
+    check("add then delete writes nothing", await TaskModel.aget("uow-temp") is None)
+    check("mark_dirty then delete removes", await TaskModel.aget("uow-new") is None)
+
+    session = UnitOfWork()
+    session.add(TaskModel(id=kept.id, data=Task(title="duplicate")))
+    session.add(TaskModel(id="uow-other", data=Task(title="other")))
+    await araises("failed writes raise MultiOperationError", MultiOperationError, session.flush)
+    check("the other writes still land", (await TaskModel.aget("uow-other")) is not None)
+
+    async def abandoned() -> None:
+        async with unit_of_work() as session:
+            session.add(TaskModel(id="uow-abandoned", data=Task(title="abandoned")))
+            raise RuntimeError("request failed")
+    await araises("a failing block raises", RuntimeError, abandoned)
+    check("and discards its writes", await TaskModel.aget("uow-abandoned") is None)
+
+
+async def test_loader(server: FakeCouchbase) -> None:
+    ids = [(await TaskModel.acreate(Task(title=f"loaded {i}"))).id for i in range(3)]
+    loader = DocumentLoader()
+    server.reset(data=False)
+    items = await asyncio.gather(*(loader.load(TaskModel, id) for id in ids + [ids[0], "missing"]))
+    check("loads in one tick are one batch of distinct ids", loader.stats()["batches"] == 1
+          and loader.stats()["keys_fetched"] == 4 and server.stats() == {"get": 4})
+    check("loaded items", [item and item.id for item in items] == ids + [ids[0], None])
+    check("repeated ids share the item", items[0] is items[3] and await loader.load(TaskModel, ids[0]) is items[0])
+    check("load_many keeps order", [item.id for item in await loader.load_many(TaskModel, ids[::-1])] == ids[::-1])
+    check("loaded ids cost no further round trips", server.stats() == {"get": 4})
+
+    await TaskModel.apatch(ids[1], title="changed")
+    loader.forget(TaskModel, ids[1])
+    check("forget refetches", (await loader.load(TaskModel, ids[1])).data.title == "changed"
+          and loader.stats()["batches"] == 2)
+
+
+def main() -> None:
+    server = FakeCouchbase()
+    server.register(SERVICE, bucket="main")
+    test_crud(server)
+    test_cas()
+    test_batches(server)
+    test_bulk_writes(server)
+    test_queries(server)
+    test_pages()
+    test_cache(server)
+    asyncio.run(test_async(server))
+    asyncio.run(test_unit_of_work(server))
+    asyncio.run(test_loader(server))
+    finish()
+
+
+if __name__ == "__main__":
+    main()
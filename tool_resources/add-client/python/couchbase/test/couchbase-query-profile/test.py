@@ -0,0 +1,59 @@
+"""
+Profile N1QL statements against the project's Couchbase and print the
+analysis of each: duration, phase timings, EXPLAIN plan and the indexes
+ADVISE recommends.
+
+Run with: run-tests(language: "python", test: "couchbase-query-profile")
+Pass statements as args (`${keyspace}` is the default collection); without
+args, a listing query is profiled on every collection of the default scope.
+"""
+import json
+import sys
+import time
+
+from clients.couchbase import CouchbaseConf, get_client, register_client
+
+SERVICE = "couchbase-server"
+LIST_STATEMENT = "SELECT META(d).id, d.* FROM ${keyspace} AS d ORDER BY META(d).id LIMIT 100"
+
+
+def main(statements: list[str]) -> None:
+    prefix = SERVICE.upper().replace("-", "_")
+    conf = CouchbaseConf.from_env(prefix)
+    # Analyze every statement, with phase timings
+    conf.slow_query_threshold = 1e-6
+    conf.query_profile_sample_rate = 1.0
+    register_client(SERVICE, conf)
+    client = get_client(SERVICE)
+
+    if statements:
+        targets = [(client.get_keyspace("_default"), statement) for statement in statements]
+    else:
+        scopes = client.get_default_bucket().collections().get_all_scopes()
+        collections = [c.name for scope in scopes if scope.name == "_default" for c in scope.collections]
+        targets = [(client.get_keyspace(name), LIST_STATEMENT) for name in collections]
+
+    for keyspace, statement in targets:
+        keyspace.query(statement)
+
+    # Analyses run in background threads
+    deadline = time.monotonic() + 30
+    while len(client.slow_queries()) < len(targets) and time.monotonic() < deadline:
+        time.sleep(0.2)
+
+    for record in client.slow_queries():
+        print(f"\n=== {record['keyspace']}: {record['elapsed_ms']}ms")
+        print(record["statement"])
+        if record.get("phase_times"):
+            print("phase times:", json.dumps(record["phase_times"]))
+        for index in record.get("recommended_indexes") or []:
+            print("recommended:", index)
+        if record.get("plan_error") or record.get("advice_error"):
+            print("errors:", record.get("plan_error"), record.get("advice_error"))
+        print("plan:", json.dumps(record.get("plan"), indent=2)[:4000])
+    if len(client.slow_queries()) < len(targets):
+        sys.exit("Timed out waiting for query analyses")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,132 @@
+"""
+Round-trip checks for the Couchbase client's transcoders (FastJson with orjson
+and msgspec, Msgpack, Zstd), including documents written in another format,
+then a throughput comparison with the SDK's default JSONTranscoder.
+
+Run with: run-tests(language: "python", test: "couchbase-transcoders")
+Pass "--no-benchmark" to skip the throughput comparison. No cluster is needed.
+"""
+import sys
+import time
+from typing import Callable, Dict, List
+
+from couchbase.transcoder import FMT_BYTES, FMT_JSON, JSONTranscoder, RawBinaryTranscoder, Transcoder, ValueFormatException
+from pydantic import BaseModel
+
+from clients.couchbase import FastJsonTranscoder, MsgpackTranscoder, ZstdTranscoder
+from clients.couchbase.testing import check, finish, raises
+
+DOCUMENT = {
+    "title": "Quarterly report",
+    "status": "open",
+    "score": 4.5,
+    "draft": True,
+    "reviewer": None,
+    "tags": ["finance", "q3", "draft"],
+    "owner": {"id": "user-42", "name": "Ada"},
+    "items": [{"sku": f"sku-{i}", "qty": i, "price": i * 1.25} for i in range(40)],
+}
+
+
+class Owner(BaseModel):
+    id: str
+    name: str
+
+
+class Report(BaseModel):
+    title: str
+    tags: List[str]
+    owner: Owner
+
+
+TRANSCODERS: Dict[str, Callable[[], Transcoder]] = {
+    "orjson": lambda: FastJsonTranscoder("orjson"),
+    "msgspec": lambda: FastJsonTranscoder("msgspec"),
+    "msgpack": MsgpackTranscoder,
+    "zstd(orjson)": lambda: ZstdTranscoder(FastJsonTranscoder("orjson"), threshold=0),
+    "zstd(msgpack)": lambda: ZstdTranscoder(MsgpackTranscoder(), threshold=0),
+}
+
+
+def test_round_trips() -> None:
+    report = Report(title="Q3", tags=["finance"], owner=Owner(id="user-42", name="Ada"))
+    for name, factory in TRANSCODERS.items():
+        transcoder = factory()
+        encoded, flags = transcoder.encode_value(DOCUMENT)
+        check(f"{name}: dict round trip", transcoder.decode_value(encoded, flags) == DOCUMENT)
+        encoded, flags = transcoder.encode_value(report)
+        check(f"{name}: model round trip", transcoder.decode_value(encoded, flags) == report.model_dump(mode="json"))
+
+
+def test_json_compatibility() -> None:
+    sdk = JSONTranscoder()
+    sdk_encoded, sdk_flags = sdk.encode_value(DOCUMENT)
+    for backend in ("orjson", "msgspec"):
+        fast = FastJsonTranscoder(backend)
+        encoded, flags = fast.encode_value(DOCUMENT)
+        check(f"{backend}: same flags as the SDK", flags == sdk_flags == FMT_JSON)
+        check(f"{backend}: SDK decodes it", sdk.decode_value(encoded, flags) == DOCUMENT)
+        check(f"{backend}: decodes SDK documents", fast.decode_value(sdk_encoded, sdk_flags) == DOCUMENT)
+        check(f"{backend}: decodes documents without flags", fast.decode_value(sdk_encoded, 0) == DOCUMENT)
+
+
+def test_format_mismatches() -> None:
+    fast = FastJsonTranscoder()
+    msgpack_encoded, msgpack_flags = MsgpackTranscoder().encode_value(DOCUMENT)
+    zstd_encoded, zstd_flags = ZstdTranscoder(FastJsonTranscoder(), threshold=0).encode_value(DOCUMENT)
+    binary_encoded, binary_flags = RawBinaryTranscoder().encode_value(b"\x00\x01")
+
+    raises("FastJson rejects msgpack documents", ValueFormatException,
+           lambda: fast.decode_value(msgpack_encoded, msgpack_flags))
+    raises("FastJson rejects compressed documents", ValueFormatException,
+           lambda: fast.decode_value(zstd_encoded, zstd_flags))
+    raises("FastJson rejects binary documents", ValueFormatException,
+           lambda: fast.decode_value(binary_encoded, binary_flags))
+    raises("FastJson refuses to encode bytes", ValueFormatException, lambda: fast.encode_value(b"raw"))
+    raises("SDK transcoder rejects msgpack documents", ValueFormatException,
+           lambda: JSONTranscoder().decode_value(msgpack_encoded, msgpack_flags))
+
+    # Collections switched to a binary format still read the JSON documents written before
+    sdk_encoded, sdk_flags = JSONTranscoder().encode_value(DOCUMENT)
+    check("msgpack decodes earlier JSON documents", MsgpackTranscoder().decode_value(sdk_encoded, sdk_flags) == DOCUMENT)
+    zstd = ZstdTranscoder(FastJsonTranscoder(), threshold=0)
+    check("zstd decodes earlier uncompressed documents", zstd.decode_value(sdk_encoded, sdk_flags) == DOCUMENT)
+    zstd_msgpack = ZstdTranscoder(MsgpackTranscoder(), threshold=0)
+    check("zstd(msgpack) decodes uncompressed msgpack documents",
+          zstd_msgpack.decode_value(msgpack_encoded, msgpack_flags) == DOCUMENT)
+
+    # Values below the threshold are stored exactly as the inner transcoder writes them
+    small = ZstdTranscoder(FastJsonTranscoder(), threshold=1 << 20)
+    encoded, flags = small.encode_value(DOCUMENT)
+    check("zstd leaves small values as plain JSON", flags == FMT_JSON and fast.decode_value(encoded, flags) == DOCUMENT)
+    check("compressed documents are binary to the server", zstd_flags & FMT_BYTES == FMT_BYTES)
+
+
+def benchmark(iterations: int = 20_000) -> None:
+    candidates: Dict[str, Callable[[], Transcoder]] = {"default (json)": JSONTranscoder, **TRANSCODERS}
+    print(f"\nthroughput over {iterations:,} operations")
+    for name, factory in candidates.items():
+        transcoder = factory()
+        encoded, flags = transcoder.encode_value(DOCUMENT)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            transcoder.encode_value(DOCUMENT)
+        encode_ops = iterations / (time.perf_counter() - start)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            transcoder.decode_value(encoded, flags)
+        decode_ops = iterations / (time.perf_counter() - start)
+        print(f"{name:16} {len(encoded):6} bytes  encode {encode_ops:>11,.0f}/s  decode {decode_ops:>11,.0f}/s")
+
+
+def main(args: List[str]) -> None:
+    test_round_trips()
+    test_json_compatibility()
+    test_format_mismatches()
+    finish()
+    if "--no-benchmark" not in args:
+        benchmark()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,28 +1,36 @@
-from typing import Optional, List
+from typing import Optional
+from couchbase.exceptions import DocumentNotFoundException
+from clients.couchbase import Page
 from models.entities.{{ entity_plural }} import {{ entity_singular | capitalize }}, {{ entity_singular | capitalize }}Data
 from models.types.{{ entity_plural }} import Create{{ entity_singular | capitalize }}Request, Update{{ entity_singular | capitalize }}Request
 
 
-def create_{{ entity_singular }}(request: Create{{ entity_singular | capitalize }}Request) -> {{ entity_singular | capitalize }}:
+async def create_{{ entity_singular }}(request: Create{{ entity_singular | capitalize }}Request) -> {{ entity_singular | capitalize }}:
     data = {{ entity_singular | capitalize }}Data(**request.model_dump())
-    return {{ entity_singular | capitalize }}.create(data)
+    return await {{ entity_singular | capitalize }}.acreate(data)
 
 
-def get_{{ entity_singular }}({{ entity_singular }}_id: str) -> Optional[{{ entity_singular | capitalize }}]:
-    return {{ entity_singular | capitalize }}.get({{ entity_singular }}_id)
+async def get_{{ entity_singular }}({{ entity_singular }}_id: str) -> Optional[{{ entity_singular | capitalize }}]:
+    return await {{ entity_singular | capitalize }}.aget({{ entity_singular }}_id)
 
 
-def list_{{ entity_plural }}(limit: Optional[int] = None) -> List[{{ entity_singular | capitalize }}]:
-    return {{ entity_singular | capitalize }}.list(limit=limit)
+async def list_{{ entity_plural }}(limit: int = 50, cursor: Optional[str] = None) -> Page[{{ entity_singular | capitalize }}]:
+    return await {{ entity_singular | capitalize }}.alist_page(limit=limit, cursor=cursor)
 
 
-def update_{{ entity_singular }}({{ entity_singular }}_id: str, request: Update{{ entity_singular | capitalize }}Request) -> Optional[{{ entity_singular | capitalize }}]:
-    existing = {{ entity_singular | capitalize }}.get({{ entity_singular }}_id)
-    if existing is None:
+async def patch_{{ entity_singular }}({{ entity_singular }}_id: str, request: Update{{ entity_singular | capitalize }}Request) -> bool:
+    # Only the fields set in the request are written, as one sub-document mutation
+    return await {{ entity_singular | capitalize }}.apatch({{ entity_singular }}_id, **request.model_dump(exclude_none=True))
+
+
+async def update_{{ entity_singular }}({{ entity_singular }}_id: str, request: Create{{ entity_singular | capitalize }}Request) -> Optional[{{ entity_singular | capitalize }}]:
+    # Full replace in one round trip, without reading the document first
+    item = {{ entity_singular | capitalize }}(id={{ entity_singular }}_id, data={{ entity_singular | capitalize }}Data(**request.model_dump()))
+    try:
+        return await {{ entity_singular | capitalize }}.aupdate(item)
+    except DocumentNotFoundException:
         return None
-{{ update_logic }}
-    return {{ entity_singular | capitalize }}.update(existing)
 
 
-def delete_{{ entity_singular }}({{ entity_singular }}_id: str) -> bool:
-    return {{ entity_singular | capitalize }}.delete({{ entity_singular }}_id)
+async def delete_{{ entity_singular }}({{ entity_singular }}_id: str) -> bool:
+    return await {{ entity_singular | capitalize }}.adelete({{ entity_singular }}_id)
@@ -1,10 +1,12 @@
-from typing import Optional, List
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from clients.couchbase import InvalidCursorError, Page
 from models.operations.{{ entity_plural }} import (
     create_{{ entity_singular }},
     get_{{ entity_singular }},
     list_{{ entity_plural }},
     update_{{ entity_singular }},
+    patch_{{ entity_singular }},
     delete_{{ entity_singular }},
 )
 from models.types.{{ entity_plural }} import Create{{ entity_singular | capitalize }}Request, Update{{ entity_singular | capitalize }}Request
@@ -15,33 +17,47 @@ from models.entities.{{ entity_plural }} import {{ entity_singular | capitalize
 
 @{{ entity_plural }}_router.post("/", response_model={{ entity_singular | capitalize }})
 async def create_{{ entity_singular }}_route(request: Create{{ entity_singular | capitalize }}Request):
-    return create_{{ entity_singular }}(request)
+    return await create_{{ entity_singular }}(request)
 
 
 @{{ entity_plural }}_router.get("/{{{ entity_singular }}_id}", response_model={{ entity_singular | capitalize }})
 async def get_{{ entity_singular }}_route({{ entity_singular }}_id: str):
-    result = get_{{ entity_singular }}({{ entity_singular }}_id)
+    result = await get_{{ entity_singular }}({{ entity_singular }}_id)
     if result is None:
         raise HTTPException(status_code=404, detail="{{ entity_singular | capitalize }} not found")
     return result
 
 
-@{{ entity_plural }}_router.get("/", response_model=List[{{ entity_singular | capitalize }}])
-async def list_{{ entity_plural }}_route(limit: Optional[int] = None):
-    return list_{{ entity_plural }}(limit=limit)
+@{{ entity_plural }}_router.get("/", response_model=Page[{{ entity_singular | capitalize }}])
+async def list_{{ entity_plural }}_route(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+):
+    try:
+        return await list_{{ entity_plural }}(limit=limit, cursor=cursor)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 @{{ entity_plural }}_router.put("/{{{ entity_singular }}_id}", response_model={{ entity_singular | capitalize }})
-async def update_{{ entity_singular }}_route({{ entity_singular }}_id: str, request: Update{{ entity_singular | capitalize }}Request):
-    result = update_{{ entity_singular }}({{ entity_singular }}_id, request)
+async def update_{{ entity_singular }}_route({{ entity_singular }}_id: str, request: Create{{ entity_singular | capitalize }}Request):
+    result = await update_{{ entity_singular }}({{ entity_singular }}_id, request)
     if result is None:
         raise HTTPException(status_code=404, detail="{{ entity_singular | capitalize }} not found")
     return result
 
 
+@{{ entity_plural }}_router.patch("/{{{ entity_singular }}_id}")
+async def patch_{{ entity_singular }}_route({{ entity_singular }}_id: str, request: Update{{ entity_singular | capitalize }}Request):
+    success = await patch_{{ entity_singular }}({{ entity_singular }}_id, request)
+    if not success:
+        raise HTTPException(status_code=404, detail="{{ entity_singular | capitalize }} not found")
+    return {"updated": True}
+
+
 @{{ entity_plural }}_router.delete("/{{{ entity_singular }}_id}")
 async def delete_{{ entity_singular }}_route({{ entity_singular }}_id: str):
-    success = delete_{{ entity_singular }}({{ entity_singular }}_id)
+    success = await delete_{{ entity_singular }}({{ entity_singular }}_id)
     if not success:
         raise HTTPException(status_code=404, detail="{{ entity_singular | capitalize }} not found")
     return {"deleted": True}
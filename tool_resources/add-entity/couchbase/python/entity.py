@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from clients.couchbase import BaseModelCouchbase
+from clients.couchbase import BaseModelCouchbase{{ index_import }}
 
 
 class {{ entity_singular | capitalize }}Data(BaseModel):
@@ -9,3 +9,4 @@ class {{ entity_singular | capitalize }}Data(BaseModel):
 class {{ entity_singular | capitalize }}(BaseModelCouchbase[{{ entity_singular | capitalize }}Data]):
     _collection_name = "{{ entity_plural_raw }}"
     _service_instance = "{{ service_instance }}"
+{{ indexes }}
\ No newline at end of file